@@ -1 +1,3 @@
 from .book import Book
+from .compact_book import CompactBook
+from .compact_checkout_history import CompactCheckoutHistory
@@ -0,0 +1,40 @@
+from dataclasses import field, fields, make_dataclass
+import sys
+from src.domain.book import Book
+
+# low-cardinality text fields: every record shares one string object per distinct value.
+# Book annotates genre as an int, but catalogs store it as text, so string genres are interned too
+INTERNED_FIELDS = ('genre', 'publisher', 'language', 'format')
+
+def _from_dict(cls, data: dict):
+    data = dict(data)
+    for name in INTERNED_FIELDS:
+        value = data.get(name)
+        if isinstance(value, str):
+            data[name] = sys.intern(value)
+    return cls(**data)
+
+def _show_info(self):
+    # no __dict__ to walk, unlike Book.show_info
+    for key, value in self.to_dict().items():
+        print(f'{key}: {value}')
+
+# built from Book's own fields and methods, so a field added to Book shows up here too
+CompactBook = make_dataclass(
+    'CompactBook',
+    [(f.name, f.type, field(default=f.default, default_factory=f.default_factory)) for f in fields(Book)],
+    namespace={
+        'check_out': Book.check_out,
+        'check_in': Book.check_in,
+        'to_dict': Book.to_dict,
+        'show_info': _show_info,
+        'from_dict': classmethod(_from_dict),
+    },
+    slots=True,
+)
+CompactBook.__module__ = __name__
+CompactBook.__doc__ = """Book without a per-instance __dict__, for catalogs held in memory.
+
+Same fields and behaviour as Book. from_dict interns the repeated
+categorical strings so millions of rows don't each carry their own copy.
+"""
@@ -0,0 +1,27 @@
+from dataclasses import field, fields, make_dataclass
+import sys
+from src.domain.checkout_history import CheckoutHistory
+
+def _from_dict(cls, data: dict):
+    data = dict(data)
+    if isinstance(data.get('book_id'), str):
+        data['book_id'] = sys.intern(data['book_id'])
+    return cls(**data)
+
+# built from CheckoutHistory's own fields and methods, like CompactBook
+CompactCheckoutHistory = make_dataclass(
+    'CompactCheckoutHistory',
+    [(f.name, f.type, field(default=f.default, default_factory=f.default_factory)) for f in fields(CheckoutHistory)],
+    namespace={
+        'check_in': CheckoutHistory.check_in,
+        'is_checked_out': CheckoutHistory.is_checked_out,
+        'to_dict': CheckoutHistory.to_dict,
+        'from_dict': classmethod(_from_dict),
+    },
+    slots=True,
+)
+CompactCheckoutHistory.__module__ = __name__
+CompactCheckoutHistory.__doc__ = """CheckoutHistory without a per-instance __dict__.
+
+book_id repeats across a book's whole history, so from_dict interns it.
+"""
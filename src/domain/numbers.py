@@ -0,0 +1,17 @@
+import math
+
+def to_float(value) -> float:
+    """A numeric Book field as a float, NaN when it isn't a usable number.
+
+    Ints, floats and numeric strings ("12.5") parse; None, bools, junk
+    strings and infinities come back as NaN. BookBatch and
+    GenrePriceAggregates both coerce with this, so the columnar analytics
+    and the repository aggregates agree on which prices count.
+    """
+    if value is None or isinstance(value, bool):
+        return math.nan
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return value if math.isfinite(value) else math.nan
@@ -4,15 +4,33 @@ from src.services.book_generator_bad_data_service import generate_books as get_b
 from src.domain.book import Book
 from src.services.book_service import BookService
 from src.services.book_analytics_service import BookAnalyticsService
+from src.services.memoized_analytics_service import MemoizedAnalyticsService
 from src.services.checkout_history_service import CheckoutHistoryService
+from src.services.checkout_analytics_service import CheckoutAnalyticsService
 from src.services.book_visualization_service import BookVisualizationService
+from src.services.book_column_store import BookColumnStore
+from src.services.instrumentation import Instrumentation
 from src.repositories.book_repository import BookRepository
 from src.repositories.checkout_history_repository import CheckoutHistoryRepository
+from src.repositories.file_checkout_transaction import FileCheckoutTransaction
+from src.repositories.parsed_file_cache import parsed_file_cache
+from src.repositories.indexed_book_repository import IndexedBookRepository
+from src.repositories.indexed_checkout_history_repository import IndexedCheckoutHistoryRepository
+from src.repositories.journaled_book_repository import JournaledBookRepository
+from src.repositories.partitioned_checkout_history_repository import PartitionedCheckoutHistoryRepository, partition_checkout_history
+from src.repositories.sqlite_book_repository import SqliteBookRepository
+from src.repositories.sqlite_checkout_history_repository import SqliteCheckoutHistoryRepository
+from src.repositories.sqlite_database import connect, migrate_json_to_sqlite
+import argparse
+import os
+import re
 import requests
 
 class BookREPL:
-    def __init__(self, book_svc, book_analytics_svc, checkout_history_svc, visualization_svc, checkout_history_repo):
+    def __init__(self, book_svc, book_analytics_svc, checkout_history_svc, visualization_svc, checkout_history_repo, column_store=None, instrumentation=None):
         self.running = True
+        self.column_store = column_store
+        self.instrumentation = instrumentation
         self.book_svc = book_svc
         self.book_analytics_svc = book_analytics_svc
         self.checkout_history_svc = checkout_history_svc
@@ -33,6 +51,8 @@ class BookREPL:
             self.get_all_records()
         elif cmd == 'addBook':
             self.add_book()
+        elif cmd == 'importBooks':
+            self.import_books()
         elif cmd == "removeBook":
             self.remove_book()
         elif cmd == "editBook":
@@ -55,8 +75,14 @@ class BookREPL:
             self.checkout_book()
         elif cmd == 'checkinBook':
             self.checkin_book()
+        elif cmd == 'checkoutBooks':
+            self.checkout_books()
+        elif cmd == 'checkinBooks':
+            self.checkin_books()
         elif cmd == 'getCheckoutHistory':
             self.get_checkout_history()
+        elif cmd == 'getCheckoutStats':
+            self.get_checkout_stats()
         elif cmd == 'generateVisualizations':
             self.generate_visualizations()
         elif cmd == 'plotCommonGenres':
@@ -69,36 +95,102 @@ class BookREPL:
             self.plot_books_by_year()
         elif cmd == 'plotCheckoutStatus':
             self.plot_checkout_status()
+        elif cmd == 'archiveHistory':
+            self.archive_history()
+        elif cmd == 'cacheStats':
+            self.get_cache_stats()
+        elif cmd == 'stats':
+            self.print_stats()
+        elif cmd == 'dumpStats':
+            self.dump_stats()
         elif cmd == 'help':
-            print('Available commands: addBook, removeBook, editBook, getMedianPriceByGenre, getMostPopularGenre, getAllRecords, findByName, getJoke, getAveragePrice, getTopBooks, getValueScores, checkoutBook, checkinBook, getCheckoutHistory, generateVisualizations, plotCommonGenres, plotRatedGenres, plotPriceRating, plotBooksByYear, plotCheckoutStatus, help, exit')
+            print('Available commands: addBook, importBooks, removeBook, editBook, getMedianPriceByGenre, getMostPopularGenre, getAllRecords, findByName, getJoke, getAveragePrice, getTopBooks, getValueScores, checkoutBook, checkinBook, checkoutBooks, checkinBooks, getCheckoutHistory, getCheckoutStats, generateVisualizations, plotCommonGenres, plotRatedGenres, plotPriceRating, plotBooksByYear, plotCheckoutStatus, archiveHistory, cacheStats, stats, dumpStats, help, exit')
         else:
             print('Please use a valid command!')
 
+    def _analytics_books(self):
+        # versioned batches let the analytics service reuse its frame between commands
+        if self.column_store is not None:
+            return self.column_store.load()
+        return self.book_svc.get_book_batch()
+
     def get_median_price_by_genre(self):
-        books = self.book_svc.get_all_books()
+        aggregates = self.book_svc.get_price_aggregates()
+        if aggregates is not None:
+            print(aggregates.median_price_by_genre())
+            return
+        books = self._analytics_books()
         median_price = self.book_analytics_svc.median_price_by_genre(books)
         print(median_price)
 
     def get_average_price(self):
-        books = self.book_svc.get_all_books()
+        aggregates = self.book_svc.get_price_aggregates()
+        if aggregates is not None:
+            print(aggregates.average_price())
+            return
+        books = self._analytics_books()
         avg_price = self.book_analytics_svc.average_price(books)
         print(avg_price)
 
     def get_most_popular_genre(self):
-        books = self.book_svc.get_all_books()
-        most_popular_genre = self.book_analytics_svc.most_popular_genre(books, 2025)
-        print(most_popular_genre)
+        try:
+            table = self.book_svc.get_genre_year_table()
+            print(table.most_popular(2025))
+            print(table.top_genres(2025, 5))
+        except IndexError as e:
+            print(e)
 
     def get_top_books(self):
-        books = self.book_svc.get_all_books()
+        books = self._analytics_books()
         top_rated_books = self.book_analytics_svc.top_rated_with_pandas(books)
         print(top_rated_books)
 
     def get_value_scores(self):
-        books = self.book_svc.get_all_books()
+        books = self._analytics_books()
         value_scores = self.book_analytics_svc.value_scores_with_pandas(books)
         print(value_scores)
 
+    def archive_history(self):
+        if not hasattr(self.checkout_history_repo, 'archive'):
+            print('Archiving needs the partitioned backend (--backend partitioned).')
+            return
+        try:
+            print("Archive checkout history for months before (YYYY-MM): ")
+            before = input("Before: ").strip()
+            archived = self.checkout_history_repo.archive(before)
+            print(f"Archived {len(archived)} months: {', '.join(archived)}" if archived else "Nothing to archive.")
+        except Exception as e:
+            print(f'An unexpected error has occurred: {e}')
+
+    def get_cache_stats(self):
+        stats = parsed_file_cache.stats()
+        print(f"Parsed file cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} files cached")
+        if isinstance(self.book_analytics_svc, MemoizedAnalyticsService):
+            stats = self.book_analytics_svc.stats()
+            print(
+                f"Analytics results: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evicted, "
+                f"{stats['expirations']} expired, {stats['invalidations']} invalidated, {stats['entries']} cached"
+            )
+
+    def print_stats(self):
+        if self.instrumentation is None:
+            print('Instrumentation is off, start the app with --instrument to collect stats.')
+            return
+        print(self.instrumentation.format_table())
+        if self.instrumentation.profile:
+            print(self.instrumentation.profile_report())
+
+    def dump_stats(self):
+        if self.instrumentation is None:
+            print('Instrumentation is off, start the app with --instrument to collect stats.')
+            return
+        try:
+            filepath = input('File: ').strip() or 'stats.json'
+            self.instrumentation.dump(filepath)
+            print(f'Stats written to {filepath}')
+        except Exception as e:
+            print(f'An unexpected error has occurred: {e}')
+
     def get_joke(self):
         try:
             url = 'https://api.chucknorris.io/jokes/random'
@@ -114,7 +206,10 @@ class BookREPL:
 
     def find_book_by_name(self):
         query = input('Please enter book name: ')
-        book = self.book_svc.find_book_by_name(query)[0]
+        book = self.book_svc.find_first_book_by_name(query)
+        if book is None:
+            print(f'No book found with the name: {query}')
+            return
         book.show_info()
 
     def get_all_records(self):
@@ -132,6 +227,17 @@ class BookREPL:
         except Exception as e:
             print(f'An unexpected error has occurred: {e}')
 
+    def import_books(self):
+        try:
+            print('Enter the path of a JSON or NDJSON file of books:')
+            filepath = input('File: ').strip()
+            result = self.book_svc.import_books(filepath)
+            print(f"Imported {result['added']} books, skipped {result['duplicates']} duplicates.")
+            for problem in result['invalid']:
+                print(f'Invalid {problem}')
+        except Exception as e:
+            print(f'An unexpected error has occurred: {e}')
+
     def remove_book(self):
         try:
             print("Enter book ID to remove: ")
@@ -143,7 +249,11 @@ class BookREPL:
     def edit_Book(self):
         try:
             print("What is the title of the Book you would like to edit?")
-            book = self.book_svc.find_book_by_name((input("Book Title: ")))[0]
+            title = input("Book Title: ")
+            book = self.book_svc.find_first_book_by_name(title)
+            if book is None:
+                print(f"No book found with the name: {title}")
+                return
             print(f"\n\n\n{book}")
             print("Which field would you like to edit?")
             key = input("Choose your field: ")
@@ -172,6 +282,35 @@ class BookREPL:
         except Exception as e:
             print(f'An unexpected error has occurred: {e}')
 
+    def _read_book_ids(self) -> list[str]:
+        print("Enter book IDs separated by commas or spaces, or the path of a file with one ID per line: ")
+        entry = input("Book IDs: ").strip()
+        if os.path.isfile(entry):
+            with open(entry, 'r', encoding='utf-8') as f:
+                entry = f.read()
+        return [book_id for book_id in re.split(r'[\s,]+', entry) if book_id]
+
+    def _print_batch(self, result, action):
+        print(f"{action} {len(result['succeeded'])} books, {len(result['failed'])} failed.")
+        for message in result['succeeded'].values():
+            print(message)
+        for book_id, reason in result['failed'].items():
+            print(f"{book_id}: {reason}")
+
+    def checkout_books(self):
+        try:
+            book_ids = self._read_book_ids()
+            self._print_batch(self.checkout_history_svc.checkout_books(book_ids), 'Checked out')
+        except Exception as e:
+            print(f'An unexpected error has occurred: {e}')
+
+    def checkin_books(self):
+        try:
+            book_ids = self._read_book_ids()
+            self._print_batch(self.checkout_history_svc.checkin_books(book_ids), 'Checked in')
+        except Exception as e:
+            print(f'An unexpected error has occurred: {e}')
+
     def get_checkout_history(self):
         try:
             print("Enter book ID to view checkout history: ")
@@ -193,6 +332,21 @@ class BookREPL:
         except Exception as e:
             print(f'An unexpected error has occurred: {e}')
 
+    def get_checkout_stats(self):
+        try:
+            history = self.checkout_history_svc.get_all_checkout_history()
+            stats = CheckoutAnalyticsService(history, self._analytics_books())
+            print(f"Loan durations: {stats.loan_duration_summary()}")
+            print(f"Loan length histogram: {stats.loan_duration_histogram()}")
+            per_day = stats.checkouts_per_day(days=7)
+            print("Checkouts per day, last 7 days: " + ', '.join(f"{day}: {n}" for day, n in per_day.items()))
+            print(f"Utilisation by genre, last 30 days: {stats.utilisation_by_genre()}")
+            print("Busiest books, last 30 days:")
+            for row in stats.busiest_books(window_days=30, limit=5):
+                print(f"  {row['checkouts']:>4}  {row['title']} by {row['author']} ({row['book_id']})")
+        except Exception as e:
+            print(f'An unexpected error has occurred: {e}')
+
     def generate_visualizations(self):
         """Generate all visualizations."""
         try:
@@ -249,14 +403,61 @@ class BookREPL:
         except Exception as e:
             print(f'An unexpected error has occurred: {e}')
 
+def build_repositories(backend: str, db_path: str = 'library.db'):
+    """Return (book_repo, checkout_history_repo, transaction) for the chosen storage backend.
+
+    `transaction` commits a checkout's history record and availability flag
+    together. The journaled and sqlite repositories do that themselves; for
+    the file backends a FileCheckoutTransaction writes both files behind a
+    recovery record.
+    """
+    if backend == 'sqlite':
+        connection = connect(db_path)
+        migrate_json_to_sqlite(connection, 'books.json', 'checkout_history.json')
+        repo = SqliteBookRepository(connection)
+        return repo, SqliteCheckoutHistoryRepository(connection), repo
+    if backend == 'indexed':
+        repo, history = IndexedBookRepository('books.json'), IndexedCheckoutHistoryRepository('checkout_history.json')
+        return repo, history, FileCheckoutTransaction(repo, history)
+    if backend == 'partitioned':
+        # monthly history segments; the old single file is split up on first run
+        partition_checkout_history('checkout_history.json', 'checkout_history')
+        repo, history = IndexedBookRepository('books.json'), PartitionedCheckoutHistoryRepository('checkout_history', cache=parsed_file_cache)
+        return repo, history, FileCheckoutTransaction(repo, history)
+    if backend == 'journaled':
+        # checkouts go through the book log, which replays them into the history on load
+        history = IndexedCheckoutHistoryRepository('checkout_history.json')
+        repo = JournaledBookRepository('books.json', history_repo=history)
+        return repo, history, repo
+    repo = BookRepository('books.json', cache=parsed_file_cache)
+    history = CheckoutHistoryRepository('checkout_history.json', cache=parsed_file_cache)
+    return repo, history, FileCheckoutTransaction(repo, history)
+
 if __name__ == '__main__':
-    generate_books_json()
-    get_bad_books()
-    repo = BookRepository('books.json')
+    parser = argparse.ArgumentParser(description='Book app REPL')
+    parser.add_argument('--backend', choices=['json', 'indexed', 'partitioned', 'journaled', 'sqlite'], default='json')
+    parser.add_argument('--db', default='library.db', help='sqlite database path (sqlite backend only)')
+    parser.add_argument('--instrument', action='store_true', help='record call counts and latencies for the stats command')
+    parser.add_argument('--profile', action='store_true', help='also run instrumented calls under cProfile (implies --instrument)')
+    args = parser.parse_args()
+
+    # journaled/sqlite keep state outside books.json, regenerating the snapshot would desync it
+    if args.backend in ('json', 'indexed', 'partitioned'):
+        generate_books_json()
+        get_bad_books()
+    repo, checkout_history_repo, checkout_transaction = build_repositories(args.backend, args.db)
     book_service = BookService(repo)
-    book_analytics_service = BookAnalyticsService()
-    checkout_history_repo = CheckoutHistoryRepository('checkout_history.json')
-    checkout_history_service = CheckoutHistoryService(checkout_history_repo, repo)
+    # repeated analytics commands between writes are answered from the result cache
+    book_analytics_service = MemoizedAnalyticsService(BookAnalyticsService(), max_entries=64, ttl_seconds=600)
+    checkout_history_service = CheckoutHistoryService(checkout_history_repo, repo, checkout_transaction)
     visualization_service = BookVisualizationService()
-    repl = BookREPL(book_service, book_analytics_service, checkout_history_service, visualization_service, checkout_history_repo)
+    # the sidecar tracks books.json, which only holds the whole catalog for these backends
+    column_store = BookColumnStore('books.json') if args.backend in ('json', 'indexed', 'partitioned') else None
+    # without the flags nothing is wrapped, so the services run exactly as before
+    instrumentation = None
+    if args.instrument or args.profile:
+        instrumentation = Instrumentation(profile=args.profile)
+        for service in (book_service, book_analytics_service, checkout_history_service, visualization_service):
+            instrumentation.instrument(service)
+    repl = BookREPL(book_service, book_analytics_service, checkout_history_service, visualization_service, checkout_history_repo, column_store, instrumentation)
     repl.start()
@@ -1,2 +1,7 @@
 from .book_repository import BookRepository
 from .book_repository_protocol import BookRepositoryProtocol
+from .indexed_book_repository import IndexedBookRepository
+from .journaled_book_repository import JournaledBookRepository
+from .sqlite_book_repository import SqliteBookRepository
+from .sqlite_checkout_history_repository import SqliteCheckoutHistoryRepository
+from .indexed_checkout_history_repository import IndexedCheckoutHistoryRepository
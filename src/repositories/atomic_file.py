@@ -0,0 +1,51 @@
+import json
+import os
+import tempfile
+
+def atomic_write_json(filepath: str, data, indent: int = 2) -> None:
+    """Write data as JSON so readers see either the old file or the new one."""
+    atomic_write(filepath, lambda f: json.dump(data, f, indent=indent))
+
+def create_json_if_missing(filepath: str, data) -> bool:
+    """Create filepath holding data unless it exists; returns whether this call created it.
+
+    The file is written and fsynced under a temp name and hard-linked into
+    place, which fails if the name is taken. So a concurrent reader never
+    sees it empty, and a racing creator can't overwrite a file that has
+    already been filled in.
+    """
+    if os.path.exists(filepath):
+        return False
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.link(tmp_path, filepath)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp_path)
+
+def atomic_write(filepath: str, write, binary: bool = False) -> None:
+    """Call write(f) on a temp file, then swap it in for filepath.
+
+    The temp file lives in the same directory, is fsynced, and is renamed
+    over the target (rename is atomic on the same filesystem), so a crash
+    never leaves a half-written file behind. With binary=True, f takes bytes.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8')) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
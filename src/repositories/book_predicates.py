@@ -0,0 +1,73 @@
+import operator
+from dataclasses import dataclass
+from typing import Any, Iterable
+from src.repositories.sqlite_database import BOOK_COLUMNS
+
+# operators a filter can use, as the `field__op` suffix (no suffix means eq)
+OPERATORS = ('eq', 'ne', 'lt', 'le', 'gt', 'ge', 'between', 'in', 'isnull')
+
+_SQL = {'eq': '=', 'ne': '!=', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>='}
+_COMPARE = {'eq': operator.eq, 'ne': operator.ne, 'lt': operator.lt, 'le': operator.le, 'gt': operator.gt, 'ge': operator.ge}
+
+@dataclass(frozen=True)
+class Predicate:
+    """One `field op value` condition on a Book.
+
+    Missing values (None) never match anything except isnull, the same rule
+    SQL uses for NULL, so every backend agrees on what a filter selects.
+    """
+    field: str
+    op: str
+    value: Any = None
+
+    def matches(self, book) -> bool:
+        return self.test(getattr(book, self.field))
+
+    def test(self, actual) -> bool:
+        """Whether a single field value satisfies the predicate."""
+        if self.op == 'isnull':
+            return (actual is None) == bool(self.value)
+        if actual is None:
+            return False
+        if self.op == 'between':
+            low, high = self.value
+            return low <= actual <= high
+        if self.op == 'in':
+            return actual in self.value
+        return _COMPARE[self.op](actual, self.value)
+
+def parse_filters(**filters) -> list[Predicate]:
+    """Turn keyword filters like `publication_year__between=(2000, 2010)` into Predicates."""
+    predicates = []
+    for key, value in filters.items():
+        field, _, op = key.partition('__')
+        op = op or 'eq'
+        if field not in BOOK_COLUMNS:
+            raise ValueError(f"Unknown book field: {field}")
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown filter operator: {op}")
+        if op == 'between':
+            low, high = value
+            value = (low, high)
+        elif op == 'in':
+            value = tuple(value)
+        predicates.append(Predicate(field, op, value))
+    return predicates
+
+def predicates_to_sql(predicates: Iterable[Predicate]) -> tuple[str, list]:
+    """A parameterised WHERE clause (without the WHERE) and its parameters."""
+    clauses, params = [], []
+    for p in predicates:
+        # field names were checked against BOOK_COLUMNS, values only ever go in as parameters
+        if p.op == 'isnull':
+            clauses.append(f"{p.field} IS {'' if p.value else 'NOT '}NULL")
+        elif p.op == 'between':
+            clauses.append(f"{p.field} BETWEEN ? AND ?")
+            params.extend(p.value)
+        elif p.op == 'in':
+            clauses.append(f"{p.field} IN ({', '.join('?' for _ in p.value)})" if p.value else "0")
+            params.extend(p.value)
+        else:
+            clauses.append(f"{p.field} {_SQL[p.op]} ?")
+            params.append(p.value)
+    return ' AND '.join(clauses) or '1', params
@@ -1,90 +1,257 @@
+import copy
 import json
+import os
+from typing import Iterable, Iterator, Optional
 from src.domain.book import Book
+from src.repositories.atomic_file import atomic_write
+from src.repositories.book_predicates import Predicate
 from src.repositories.book_repository_protocol import BookRepositoryProtocol
+from src.repositories.file_lock import file_lock
+from src.repositories.json_stream import is_ndjson_path, iter_json_records
+from src.repositories.parsed_file_cache import ParsedFileCache
 
 class BookRepository(BookRepositoryProtocol):
-    def __init__(self, filepath: str="books.json"):
+    """Book catalog in a single JSON (or NDJSON) file.
+
+    Every write reads the catalog, changes it and replaces the file. Writers
+    hold an flock on `<filepath>.lock` for the whole read-modify-write, so
+    two processes sharing the file never lose each other's updates.
+    """
+
+    def __init__(self, filepath: str="books.json", cache: Optional[ParsedFileCache]=None, book_type: type=Book):
         self.filepath = filepath
+        # Book, or CompactBook for large catalogs - anything with from_dict/to_dict
+        self.book_type = book_type
+        # books.ndjson / books.jsonl are written one record per line, anything else as a JSON array
+        self.ndjson = is_ndjson_path(filepath)
+        self.cache = cache
+        self.write_lock_filepath = f"{filepath}.lock"
+        # (cached parse, book_id -> Book) built over the shared parse, rebuilt when the cache reloads
+        self._id_index: Optional[tuple[tuple, dict[str, Book]]] = None
 
     def get_all_books(self) -> list[Book]:
+        if self.cache is not None:
+            # callers mutate what they get back, so hand out copies of the cached books
+            return [copy.copy(b) for b in self.cache.get(self.filepath, self._load_books)]
+        return self._load_books()
+
+    def _load_books(self) -> list[Book]:
+        if self.ndjson:
+            return [self.book_type.from_dict(item) for item in self._iter_records()]
         with open(self.filepath, 'r', encoding='utf-8') as f:
             data = json.load(f)
-            return [Book.from_dict(item) for item in data]
+            return [self.book_type.from_dict(item) for item in data]
+
+    def data_version(self) -> tuple:
+        """Changes whenever the catalog file does (path, mtime, size, inode)."""
+        stat = os.stat(self.filepath)
+        return (os.path.abspath(self.filepath), stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _iter_records(self) -> Iterator[dict]:
+        with open(self.filepath, 'r', encoding='utf-8') as f:
+            yield from iter_json_records(f)
+
+    def iter_books(self, fields: Optional[list[str]] = None) -> Iterator[Book]:
+        """Lazily yield books one record at a time.
+
+        With `fields`, only those attributes are set on the yielded Books and
+        everything else (including title/author/book_id) is left as None, so
+        callers that need one column don't pay for building the rest.
+        """
+        if self.cache is not None:
+            # the cached books are already decoded, projection would only cost more
+            yield from self.get_all_books()
+            return
+        for item in self._iter_records():
+            yield _to_book(item, fields, self.book_type)
+
+    def iter_books_where(self, predicates: Iterable[Predicate], fields: Optional[list[str]] = None) -> Iterator[Book]:
+        """Yield the books matching every predicate, reading only `fields` plus the filtered ones."""
+        predicates = list(predicates)
+        if fields is not None:
+            fields = list(dict.fromkeys([*fields, *(p.field for p in predicates)]))
+        for book in self.iter_books(fields):
+            if all(p.matches(book) for p in predicates):
+                yield book
+
+    def find_book_by_id(self, book_id: str) -> Optional[Book]:
+        found = self._find_book_by_id(book_id)
+        return found[0] if found else None
+
+    def find_books_by_ids(self, book_ids: Iterable[str]) -> dict[str, Book]:
+        """book_id -> Book for the ids that exist, from a single read of the catalog."""
+        wanted = set(book_ids)
+        if self.cache is not None:
+            index = self._books_by_id()
+            return {book_id: copy.copy(index[book_id]) for book_id in wanted if book_id in index}
+        return {b.book_id: b for b in self.iter_books() if b.book_id in wanted}
+
+    def _books_by_id(self) -> dict[str, Book]:
+        """Id index over the cached parse; the first book wins, like a scan would."""
+        books = self.cache.get(self.filepath, self._load_books)
+        if self._id_index is None or self._id_index[0] is not books:
+            index: dict[str, Book] = {}
+            for book in books:
+                index.setdefault(book.book_id, book)
+            self._id_index = (books, index)
+        return self._id_index[1]
+
+    def find_first_book_by_name(self, query: str) -> Optional[Book]:
+        """Return the first book with this title, stopping the scan at the match."""
+        return next((b for b in self.iter_books() if b.title == query), None)
 
     def add_book(self, book:Book) -> str:
-        books = self.get_all_books()
-        books.append(book)
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump([b.to_dict() for b in books], f, indent=2)
+        with file_lock(self.write_lock_filepath):
+            books = self.get_all_books()
+            books.append(book)
+            self._write_books(books)
         return book.book_id
 
+    def add_books(self, books: Iterable[Book]) -> list[str]:
+        """Add many books with a single write, skipping book_ids already present.
+
+        Returns the ids that were actually added, in order.
+        """
+        with file_lock(self.write_lock_filepath):
+            all_books = self.get_all_books()
+            new_books = dedupe_books(books, {b.book_id for b in all_books})
+            if new_books:
+                self._write_books(all_books + new_books)
+        return [b.book_id for b in new_books]
+
     def remove_book(self, book_id:str) -> str:
-        books = self.get_all_books()  # list of Book objects
-        original_len = len(books)
-        books = [b for b in books if b.book_id != book_id]
+        with file_lock(self.write_lock_filepath):
+            books = self.get_all_books()  # list of Book objects
+            original_len = len(books)
+            books = [b for b in books if b.book_id != book_id]
 
-        if len(books) == original_len:
-            return f"Book {book_id} Not Found"
+            if len(books) == original_len:
+                return f"Book {book_id} Not Found"
 
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump([b.to_dict() for b in books], f, indent=2)
+            self._write_books(books)
 
         return f"Book {book_id} Successfully Removed"
     
-    def _convert_value(self, field_name: str, value: str):
-        if not value.strip():
-            return None
-        elif field_name in ['genre', 'publication_year', 'page_count', 'ratings_count']:
-            return int(value)
-        elif field_name in ['average_rating', 'price_usd', 'sales_millions']:
-            return float(value)
-        elif field_name in ['in_print', 'available']:
-            return value.lower() in ['true', '1', 'yes', 'y']
-        
-        return value
-    
     def edit_book(self, book:Book, key:str) -> str:
-        field_change = input(f"What would you like to change {book.title}'s {key} to?\n{key} Change To: ")
-        
-        try:
-            field_change = self._convert_value(key, field_change)
-        except ValueError:
-            print(f"Error: Invalid value for {key}. Please enter a valid number.")
-            return self.edit_book(book, key)
-        
-        setattr(book, key, field_change)
-        all_books = self.get_all_books()
-        books = [book if b.book_id == book.book_id else b for b in all_books]
+        return prompt_book_edit(self, book, key)
 
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump([b.to_dict() for b in books], f, indent=2)
-        
-        book_check = self.__find_book_by_id(book.book_id)[0]
-        if getattr(book_check, key) == field_change:
-            return f"Successfully changed {book.title}'s {key} to: {field_change}"
-        else:
-            return f"Failed to Edit {book.title}'s {key}"
+    def update_book(self, book: Book) -> str:
+        with file_lock(self.write_lock_filepath):
+            all_books = self.get_all_books()
+            updated = False
+            for i, b in enumerate(all_books):
+                if b.book_id == book.book_id:
+                    all_books[i] = book
+                    updated = True
+                    break
 
+            if not updated:
+                return f"Book {book.book_id} not found"
 
-    def update_book(self, book: Book) -> str:
-        all_books = self.get_all_books()
-        updated = False
-        for i, b in enumerate(all_books):
-            if b.book_id == book.book_id:
-                all_books[i] = book
-                updated = True
-                break
-        
-        if not updated:
-            return f"Book {book.book_id} not found"
-        
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump([b.to_dict() for b in all_books], f, indent=2)
+            self._write_books(all_books)
         
         return f"Successfully updated book {book.book_id}"
 
-    def __find_book_by_id(self, book_id:str) -> Book:
-        return [b for b in self.get_all_books() if b.book_id == book_id]
+    def update_books(self, books: Iterable[Book]) -> list[str]:
+        """Replace many books with a single write; returns the ids that existed and were updated."""
+        changed = {b.book_id: b for b in books}
+        with file_lock(self.write_lock_filepath):
+            all_books = self.get_all_books()
+            updated = []
+            for i, b in enumerate(all_books):
+                if b.book_id in changed:
+                    all_books[i] = changed[b.book_id]
+                    updated.append(b.book_id)
+            if updated:
+                self._write_books(all_books)
+        return updated
+
+    def update_book_fields(self, changes: dict[str, dict]) -> list[str]:
+        """Set only the given fields ({book_id: {field: value}}) on the stored books, with a single write.
+
+        The books are read under the write lock, so an edit another process
+        made to any other field is kept. Returns the ids that existed.
+        """
+        with file_lock(self.write_lock_filepath):
+            all_books = self.get_all_books()
+            updated = []
+            for b in all_books:
+                if b.book_id in changes:
+                    for key, value in changes[b.book_id].items():
+                        setattr(b, key, value)
+                    updated.append(b.book_id)
+            if updated:
+                self._write_books(all_books)
+        return updated
+
+    def _write_books(self, books) -> None:
+        # temp file + rename, so readers never see a half-written catalog
+        atomic_write(self.filepath, lambda f: self._dump_books(books, f))
+        if self.cache is not None:
+            self.cache.invalidate(self.filepath)
+
+    def _dump_books(self, books, f) -> None:
+        if self.ndjson:
+            for b in books:
+                f.write(json.dumps(b.to_dict()) + '\n')
+        else:
+            json.dump([b.to_dict() for b in books], f, indent=2)
 
-    def find_book_by_name(self, query) -> Book:
+    def _find_book_by_id(self, book_id:str) -> list[Book]:
+        if self.cache is not None:
+            book = self._books_by_id().get(book_id)
+            return [] if book is None else [copy.copy(book)]
+        return [b for b in self.iter_books() if b.book_id == book_id]
+
+    def find_book_by_name(self, query) -> list[Book]:
         return [b for b in self.get_all_books() if b.title == query]
+
+def convert_value(field_name: str, value: str):
+    if not value.strip():
+        return None
+    elif field_name in ['genre', 'publication_year', 'page_count', 'ratings_count']:
+        return int(value)
+    elif field_name in ['average_rating', 'price_usd', 'sales_millions']:
+        return float(value)
+    elif field_name in ['in_print', 'available']:
+        return value.lower() in ['true', '1', 'yes', 'y']
+
+    return value
+
+def prompt_book_edit(repo: BookRepositoryProtocol, book: Book, key: str) -> str:
+    """Ask for a new value of `key`, save it through repo.update_book and check it stuck."""
+    while True:
+        field_change = input(f"What would you like to change {book.title}'s {key} to?\n{key} Change To: ")
+        try:
+            field_change = convert_value(key, field_change)
+            break
+        except ValueError:
+            print(f"Error: Invalid value for {key}. Please enter a valid number.")
+
+    setattr(book, key, field_change)
+    repo.update_book(book)
+
+    book_check = repo.find_book_by_id(book.book_id)
+    if book_check is not None and getattr(book_check, key) == field_change:
+        return f"Successfully changed {book.title}'s {key} to: {field_change}"
+    else:
+        return f"Failed to Edit {book.title}'s {key}"
+
+def _to_book(item: dict, fields: Optional[list[str]], book_type: type=Book) -> Book:
+    if fields is None:
+        return book_type.from_dict(item)
+    projected = {'title': None, 'author': None, 'book_id': None}
+    for name in fields:
+        projected[name] = item.get(name)
+    return book_type.from_dict(projected)
+
+def dedupe_books(books: Iterable[Book], existing_ids: set[str]) -> list[Book]:
+    """Keep the first occurrence of each book_id not already in existing_ids."""
+    seen = set(existing_ids)
+    new_books = []
+    for book in books:
+        if book.book_id in seen:
+            continue
+        seen.add(book.book_id)
+        new_books.append(book)
+    return new_books
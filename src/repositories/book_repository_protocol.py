@@ -1,5 +1,6 @@
-from typing import Protocol
+from typing import Hashable, Iterable, Iterator, Optional, Protocol
 from src.domain.book import Book
+from src.repositories.book_predicates import Predicate
 
 class BookRepositoryProtocol(Protocol):
     def get_all_books(self) -> list[Book]:
@@ -8,6 +9,9 @@ class BookRepositoryProtocol(Protocol):
     def add_book(self, book:Book) -> str:
         ...
     
+    def add_books(self, books:Iterable[Book]) -> list[str]:
+        ...
+
     def remove_book(self, book_id:str) -> str:
         ...
     
@@ -16,3 +20,30 @@ class BookRepositoryProtocol(Protocol):
 
     def find_book_by_name(self, query:str) -> list[Book]:
         ...
+
+    def iter_books(self, fields: Optional[list[str]] = None) -> Iterator[Book]:
+        ...
+
+    def iter_books_where(self, predicates: Iterable[Predicate], fields: Optional[list[str]] = None) -> Iterator[Book]:
+        ...
+
+    def find_book_by_id(self, book_id:str) -> Optional[Book]:
+        ...
+
+    def find_books_by_ids(self, book_ids:Iterable[str]) -> dict[str, Book]:
+        ...
+
+    def update_book(self, book:Book) -> str:
+        ...
+
+    def update_books(self, books:Iterable[Book]) -> list[str]:
+        ...
+
+    def update_book_fields(self, changes:dict[str, dict]) -> list[str]:
+        ...
+
+    def find_first_book_by_name(self, query:str) -> Optional[Book]:
+        ...
+
+    def data_version(self) -> Hashable:
+        ...
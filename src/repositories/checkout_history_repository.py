@@ -1,32 +1,48 @@
+import copy
 import json
-import os
+from typing import Iterable, Optional
 from src.domain.checkout_history import CheckoutHistory
+from src.repositories.atomic_file import atomic_write, create_json_if_missing
 from src.repositories.checkout_history_repository_protocol import CheckoutHistoryRepositoryProtocol
+from src.repositories.file_lock import file_lock
+from src.repositories.parsed_file_cache import ParsedFileCache
 
 class CheckoutHistoryRepository(CheckoutHistoryRepositoryProtocol):
-    
-    def __init__(self, filepath: str = "checkout_history.json"):
+    """Checkout history in a single JSON file.
+
+    Writes hold an flock on `<filepath>.lock` from the read to the replace,
+    so concurrent processes never lose each other's records.
+    """
+
+    def __init__(self, filepath: str = "checkout_history.json", cache: Optional[ParsedFileCache] = None,
+                 history_type: type = CheckoutHistory):
         self.filepath = filepath
-        
-        if not os.path.exists(self.filepath):
-            with open(self.filepath, 'w', encoding='utf-8') as f:
-                json.dump([], f)
+        # CheckoutHistory, or CompactCheckoutHistory for long histories
+        self.history_type = history_type
+        self.cache = cache
+        self.write_lock_filepath = f"{filepath}.lock"
+
+        # other processes may be reading or creating it at the same moment
+        create_json_if_missing(self.filepath, [])
 
     def get_all_checkout_history(self) -> list[CheckoutHistory]:
         """Get all checkout history records from the file."""
+        if self.cache is not None:
+            return [copy.copy(h) for h in self.cache.get(self.filepath, self._load_checkout_history)]
+        return self._load_checkout_history()
+
+    def _load_checkout_history(self) -> list[CheckoutHistory]:
         with open(self.filepath, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
-        return [CheckoutHistory.from_dict(item) for item in data]
+        return [self.history_type.from_dict(item) for item in data]
 
     def add_checkout_history(self, checkout_history: CheckoutHistory) -> str:
-        all_history = self.get_all_checkout_history()
-        all_history.append(checkout_history)
-        
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            history_dicts = [h.to_dict() for h in all_history]
-            json.dump(history_dicts, f, indent=2)
-        
+        with file_lock(self.write_lock_filepath):
+            all_history = self.get_all_checkout_history()
+            all_history.append(checkout_history)
+            self._write_history(all_history)
+
         return checkout_history.checkout_history_id
 
     def get_checkout_history_by_book_id(self, book_id: str) -> list[CheckoutHistory]:
@@ -37,22 +53,46 @@ class CheckoutHistoryRepository(CheckoutHistoryRepositoryProtocol):
         all_history = self.get_all_checkout_history()
         return [h for h in all_history if h.book_id == book_id and h.is_checked_out()]
 
+    def get_active_checkouts_by_book_ids(self, book_ids: Iterable[str]) -> dict[str, list[CheckoutHistory]]:
+        """Open checkouts for each of book_ids that has any, from a single read."""
+        wanted = set(book_ids)
+        active = {}
+        for h in self.get_all_checkout_history():
+            if h.book_id in wanted and h.is_checked_out():
+                active.setdefault(h.book_id, []).append(h)
+        return active
+
+    def save_checkout_histories(self, checkout_histories: Iterable[CheckoutHistory]) -> None:
+        """Add or replace many records (matched by checkout_history_id) with a single write."""
+        changed = {h.checkout_history_id: h for h in checkout_histories}
+        if not changed:
+            return
+        with file_lock(self.write_lock_filepath):
+            all_history = [changed.pop(h.checkout_history_id, h) for h in self.get_all_checkout_history()]
+            self._write_history(all_history + list(changed.values()))
+
     def update_checkout_history(self, checkout_history: CheckoutHistory) -> str:
-        all_history = self.get_all_checkout_history()
-        
-        # Find and replace the matching record
-        found = False
-        for i, h in enumerate(all_history):
-            if h.checkout_history_id == checkout_history.checkout_history_id:
-                all_history[i] = checkout_history
-                found = True
-                break
-        
-        if not found:
-            return f"Checkout history {checkout_history.checkout_history_id} not found"
-        
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            history_dicts = [h.to_dict() for h in all_history]
-            json.dump(history_dicts, f, indent=2)
+        with file_lock(self.write_lock_filepath):
+            all_history = self.get_all_checkout_history()
+
+            # Find and replace the matching record
+            found = False
+            for i, h in enumerate(all_history):
+                if h.checkout_history_id == checkout_history.checkout_history_id:
+                    all_history[i] = checkout_history
+                    found = True
+                    break
+
+            if not found:
+                return f"Checkout history {checkout_history.checkout_history_id} not found"
+
+            self._write_history(all_history)
         
         return f"Successfully updated checkout history {checkout_history.checkout_history_id}"
+
+    def _write_history(self, history) -> None:
+        history_dicts = [h.to_dict() for h in history]
+        # replaced atomically: a crash mid-write leaves the previous file intact
+        atomic_write(self.filepath, lambda f: json.dump(history_dicts, f, indent=2))
+        if self.cache is not None:
+            self.cache.invalidate(self.filepath)
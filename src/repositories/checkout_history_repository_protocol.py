@@ -1,4 +1,4 @@
-from typing import Protocol
+from typing import Iterable, Protocol
 from src.domain.checkout_history import CheckoutHistory
 
 class CheckoutHistoryRepositoryProtocol(Protocol):
@@ -14,5 +14,11 @@ class CheckoutHistoryRepositoryProtocol(Protocol):
     def get_active_checkouts_by_book_id(self, book_id: str) -> list[CheckoutHistory]:
         ...
 
+    def get_active_checkouts_by_book_ids(self, book_ids: Iterable[str]) -> dict[str, list[CheckoutHistory]]:
+        ...
+
+    def save_checkout_histories(self, checkout_histories: Iterable[CheckoutHistory]) -> None:
+        ...
+
     def update_checkout_history(self, checkout_history: CheckoutHistory) -> str:
         ...
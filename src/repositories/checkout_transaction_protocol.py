@@ -0,0 +1,35 @@
+from typing import Iterable, Protocol
+from src.domain.checkout_history import CheckoutHistory
+
+class CheckoutConflictError(Exception):
+    """Another writer checked the book out or in between our read and our commit."""
+
+class CheckoutTransactionProtocol(Protocol):
+    def refresh(self) -> None:
+        """Pick up changes made by other processes before reading."""
+        ...
+
+    def commit_checkouts(self, availability: list[tuple[str, bool]], records: list[CheckoutHistory]) -> None:
+        """Store the (book_id, available) flags and the history records together: all of it or none.
+
+        Only `available` is written, on the books as they are stored at commit
+        time, so edits made to other fields since they were read are kept.
+
+        Open records need the book to have no other open checkout, closed ones
+        need the record to still be open; otherwise raise CheckoutConflictError.
+        """
+        ...
+
+def check_checkout_conflicts(history_repo, records: Iterable[CheckoutHistory]) -> None:
+    """Raise CheckoutConflictError if records no longer fit history_repo's open checkouts.
+
+    For transactions that check under their own lock (JournaledBookRepository,
+    FileCheckoutTransaction); sqlite does the same checks in SQL.
+    """
+    for record in records:
+        active_ids = {r.checkout_history_id for r in history_repo.get_active_checkouts_by_book_id(record.book_id)}
+        if record.is_checked_out():
+            if active_ids - {record.checkout_history_id}:
+                raise CheckoutConflictError(f"Book {record.book_id} is already checked out")
+        elif record.checkout_history_id not in active_ids:
+            raise CheckoutConflictError(f"Book {record.book_id} is not currently checked out")
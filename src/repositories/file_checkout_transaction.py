@@ -0,0 +1,72 @@
+import json
+import os
+from typing import Optional
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.atomic_file import atomic_write_json
+from src.repositories.checkout_transaction_protocol import CheckoutTransactionProtocol, check_checkout_conflicts
+from src.repositories.file_lock import file_lock
+
+class FileCheckoutTransaction(CheckoutTransactionProtocol):
+    """Checkouts for the backends that keep books and history in separate files.
+
+    The two files can't be replaced in one step, so a commit first writes
+    the new availability flags and the records to a pending file
+    (`<books>.checkout`), then saves the history, then the flags, then
+    deletes the pending file. Only `available` is written back, on the
+    books as they are stored at that moment, so concurrent edits to other
+    fields survive. If a
+    crash stops it part way, the pending file is still there and the next
+    refresh() or commit replays it. Both saves are by id, so replaying
+    twice is harmless. Commits hold `<books>.checkout.lock`, so the conflict
+    checks and the writes of one commit never interleave with another's,
+    in this process or any other.
+    """
+
+    def __init__(self, book_repo, history_repo, pending_filepath: Optional[str] = None):
+        self.book_repo = book_repo
+        self.history_repo = history_repo
+        self.pending_filepath = pending_filepath or f"{book_repo.filepath}.checkout"
+        self.lock_filepath = f"{self.pending_filepath}.lock"
+        # finish whatever a crashed process left behind before anyone reads
+        self.refresh()
+
+    def refresh(self) -> None:
+        if os.path.exists(self.pending_filepath):
+            with file_lock(self.lock_filepath):
+                self._recover()
+        self._refresh_repos()
+
+    def _refresh_repos(self) -> None:
+        # in-memory repositories pick up other processes' writes, file-backed ones always read fresh
+        for repo in (self.book_repo, self.history_repo):
+            refresh = getattr(repo, 'refresh', None)
+            if refresh is not None:
+                refresh()
+
+    def commit_checkouts(self, availability: list[tuple[str, bool]], records: list[CheckoutHistory]) -> None:
+        with file_lock(self.lock_filepath):
+            self._recover()
+            self._refresh_repos()
+            check_checkout_conflicts(self.history_repo, records)
+            availability = dict(availability)
+            atomic_write_json(self.pending_filepath, {
+                'availability': availability,
+                'records': [r.to_dict() for r in records],
+            })
+            self._apply(availability, records)
+            os.remove(self.pending_filepath)
+
+    def _recover(self) -> None:
+        if not os.path.exists(self.pending_filepath):
+            return
+        with open(self.pending_filepath, 'r', encoding='utf-8') as f:
+            pending = json.load(f)
+        self._apply(
+            pending['availability'],
+            [self.history_repo.history_type.from_dict(item) for item in pending['records']],
+        )
+        os.remove(self.pending_filepath)
+
+    def _apply(self, availability: dict[str, bool], records: list[CheckoutHistory]) -> None:
+        self.history_repo.save_checkout_histories(records)
+        self.book_repo.update_book_fields({book_id: {'available': available} for book_id, available in availability.items()})
@@ -0,0 +1,41 @@
+import os
+import struct
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, the locks do nothing and only one writer may use the files
+    fcntl = None
+
+_COUNTERS = struct.Struct('<qq')
+
+@contextmanager
+def file_lock(path: str, exclusive: bool = True) -> Iterator[int]:
+    """Hold an flock on `path` (created if missing) and yield its descriptor.
+
+    flock locks belong to the open file, so separate threads of one process
+    exclude each other as well as other processes do.
+    """
+    # O_BINARY (Windows only) keeps the counters from going through newline translation
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield fd
+    finally:
+        # closing the descriptor releases the lock
+        os.close(fd)
+
+def read_counters(fd: int) -> tuple[int, int]:
+    """The two integers kept in a lock file, (0, 0) for a new one."""
+    # lseek + read rather than os.pread, which Windows doesn't have; the fd is ours alone
+    os.lseek(fd, 0, os.SEEK_SET)
+    data = os.read(fd, _COUNTERS.size)
+    return _COUNTERS.unpack(data) if len(data) == _COUNTERS.size else (0, 0)
+
+def write_counters(fd: int, first: int, second: int) -> None:
+    os.lseek(fd, 0, os.SEEK_SET)
+    view = memoryview(_COUNTERS.pack(first, second))
+    while view:
+        view = view[os.write(fd, view):]
@@ -0,0 +1,111 @@
+import bisect
+import math
+from typing import Iterable, Optional
+from src.domain.book import Book
+from src.domain.numbers import to_float
+
+# running sums are kept in integer millionths of a dollar, so adding and removing never drifts
+_PRICE_SCALE = 1_000_000
+
+class GenrePriceAggregates:
+    """Price aggregates per genre, kept up to date one book at a time.
+
+    For each genre we hold the count, an exact running sum (fixed-point
+    ints) and the prices in sorted order for exact medians. average_price is
+    O(1) and median_price_by_genre is O(1) per genre. from_books sorts each
+    genre once; add/remove then find the slot by binary search and shift the
+    list tail, O(n) in the genre's size but a memmove, so cheap even for
+    large genres. Books without a price are ignored, books without a genre
+    only count towards the overall average (like pandas dropping NaN group
+    keys).
+    """
+
+    def __init__(self):
+        self._counts: dict = {}
+        self._sums: dict = {}
+        self._sorted_prices: dict = {}
+        self._total_count = 0
+        self._total_sum = 0
+
+    @classmethod
+    def from_books(cls, books: Iterable[Book]) -> 'GenrePriceAggregates':
+        aggregates = cls()
+        prices_by_genre: dict = {}
+        for book in books:
+            price = aggregates._price(book)
+            if price is None:
+                continue
+            aggregates._total_count += 1
+            aggregates._total_sum += _fixed(price)
+            if book.genre is not None:
+                prices_by_genre.setdefault(book.genre, []).append(price)
+        for genre, prices in prices_by_genre.items():
+            aggregates._counts[genre] = len(prices)
+            aggregates._sums[genre] = sum(map(_fixed, prices))
+            aggregates._sorted_prices[genre] = sorted(prices)
+        return aggregates
+
+    def _price(self, book: Book) -> Optional[float]:
+        # same coercion as BookBatch, so numeric strings count here too
+        price = to_float(book.price_usd)
+        return None if math.isnan(price) else price
+
+    def add(self, book: Book) -> None:
+        price = self._price(book)
+        if price is None:
+            return
+        self._total_count += 1
+        self._total_sum += _fixed(price)
+        if book.genre is None:
+            return
+        genre = book.genre
+        self._counts[genre] = self._counts.get(genre, 0) + 1
+        self._sums[genre] = self._sums.get(genre, 0) + _fixed(price)
+        bisect.insort(self._sorted_prices.setdefault(genre, []), price)
+
+    def remove(self, book: Book) -> None:
+        price = self._price(book)
+        if price is None:
+            return
+        self._total_count -= 1
+        self._total_sum -= _fixed(price)
+        if book.genre is None:
+            return
+        genre = book.genre
+        prices = self._sorted_prices[genre]
+        del prices[bisect.bisect_left(prices, price)]
+        self._counts[genre] -= 1
+        self._sums[genre] -= _fixed(price)
+        if self._counts[genre] == 0:
+            del self._counts[genre]
+            del self._sums[genre]
+            del self._sorted_prices[genre]
+
+    def replace(self, old: Optional[Book], new: Book) -> None:
+        if old is not None:
+            self.remove(old)
+        self.add(new)
+
+    def average_price(self) -> float:
+        if self._total_count == 0:
+            return float('nan')
+        return self._total_sum / (self._total_count * _PRICE_SCALE)
+
+    def average_price_by_genre(self) -> dict:
+        return {genre: self._sums[genre] / (count * _PRICE_SCALE) for genre, count in self._counts.items()}
+
+    def count_by_genre(self) -> dict:
+        return dict(self._counts)
+
+    def median_price(self, genre) -> float:
+        prices = self._sorted_prices[genre]
+        middle = len(prices) // 2
+        if len(prices) % 2:
+            return prices[middle]
+        return (prices[middle - 1] + prices[middle]) / 2
+
+    def median_price_by_genre(self) -> dict:
+        return {genre: self.median_price(genre) for genre in self._sorted_prices}
+
+def _fixed(price: float) -> int:
+    return round(price * _PRICE_SCALE)
@@ -0,0 +1,187 @@
+import copy
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+from src.domain.book import Book
+from src.repositories.book_repository import BookRepository, dedupe_books
+from src.repositories.file_lock import file_lock
+from src.repositories.genre_price_aggregates import GenrePriceAggregates
+from src.repositories.parsed_file_cache import file_identity
+
+class IndexedBookRepository(BookRepository):
+    """Book repository that parses the catalog once and keeps it in memory.
+
+    Books are indexed by book_id and by title so lookups don't touch the
+    file. Every write goes straight through to disk, so the JSON file always
+    matches the indexes: a change is indexed only once it is on disk.
+    Callers get copies, mutating a returned Book only changes the catalog
+    once it is passed back to update_book/add_book.
+
+    Writes hold the `<filepath>.lock` flock and first reload the indexes if
+    another process replaced the file since this one last read or wrote
+    it, so concurrent writers build on each other's changes. refresh() does
+    the same check for readers.
+    """
+
+    def __init__(self, filepath: str="books.json", book_type: type=Book):
+        super().__init__(filepath, book_type=book_type)
+        self._books_by_id: dict[str, Book] = {}
+        # title -> ordered set of book_ids (dict keys keep insertion order)
+        self._ids_by_title: dict[str, dict[str, None]] = {}
+        # bumped on every index change, the in-memory catalog is the source of truth
+        self._version = 0
+        self.reload()
+
+    def reload(self) -> None:
+        """Rebuild the indexes from the file, e.g. after an external edit."""
+        # taken before reading: a write landing mid-read makes the next check reload again
+        self._file_identity = file_identity(self.filepath)
+        self._books_by_id = {}
+        self._ids_by_title = {}
+        self.price_aggregates = GenrePriceAggregates()
+        for item in self._iter_records():
+            self._index(self.book_type.from_dict(item), aggregate=False)
+        # rebuilt in bulk on every load (one sort per genre), then maintained by _index/_unindex
+        self.price_aggregates = GenrePriceAggregates.from_books(self._books_by_id.values())
+
+    def data_version(self) -> tuple:
+        return (id(self), self._version)
+
+    def refresh(self) -> None:
+        """Reload if another process has replaced the file since the last read or write."""
+        if file_identity(self.filepath) != self._file_identity:
+            self.reload()
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Hold the write lock over a change, starting from the file's current contents."""
+        with file_lock(self.write_lock_filepath):
+            self.refresh()
+            yield
+
+    def _write_books(self, books) -> None:
+        super()._write_books(books)
+        # our own write, the indexes already hold it
+        self._file_identity = file_identity(self.filepath)
+
+    def _index(self, book: Book, aggregate: bool = True) -> None:
+        self._version += 1
+        previous = self._books_by_id.get(book.book_id)
+        if previous is not None:
+            self._unindex_title(previous)
+        if aggregate:
+            self.price_aggregates.replace(previous, book)
+        self._books_by_id[book.book_id] = book
+        self._ids_by_title.setdefault(book.title, {})[book.book_id] = None
+
+    def _unindex(self, book_id: str) -> Book:
+        self._version += 1
+        book = self._books_by_id.pop(book_id)
+        self._unindex_title(book)
+        self.price_aggregates.remove(book)
+        return book
+
+    def _unindex_title(self, book: Book) -> None:
+        ids = self._ids_by_title.get(book.title)
+        if ids is None:
+            return
+        ids.pop(book.book_id, None)
+        if not ids:
+            del self._ids_by_title[book.title]
+
+    def _persist(self) -> None:
+        self._write_books(self._books_by_id.values())
+
+    # The _persist_* hooks write one change to disk; subclasses override them
+    # to store the change alone. Here they rewrite the whole catalog with it applied.
+
+    def _persist_put(self, book: Book) -> None:
+        self._persist_put_many([book])
+
+    def _persist_put_many(self, books: list[Book]) -> None:
+        catalog = dict(self._books_by_id)
+        catalog.update((b.book_id, b) for b in books)
+        self._write_books(catalog.values())
+
+    def _persist_remove(self, book_id: str) -> None:
+        self._write_books(b for b in self._books_by_id.values() if b.book_id != book_id)
+
+    def get_all_books(self) -> list[Book]:
+        return [copy.copy(b) for b in self._books_by_id.values()]
+
+    def add_book(self, book: Book) -> str:
+        with self._writing():
+            stored = copy.copy(book)
+            self._persist_put(stored)
+            self._index(stored)
+        return book.book_id
+
+    def add_books(self, books: Iterable[Book]) -> list[str]:
+        with self._writing():
+            new_books = [copy.copy(b) for b in dedupe_books(books, self._books_by_id.keys())]
+            if new_books:
+                self._persist_put_many(new_books)
+                for book in new_books:
+                    self._index(book)
+        return [b.book_id for b in new_books]
+
+    def remove_book(self, book_id: str) -> str:
+        with self._writing():
+            if book_id not in self._books_by_id:
+                return f"Book {book_id} Not Found"
+            self._persist_remove(book_id)
+            self._unindex(book_id)
+        return f"Book {book_id} Successfully Removed"
+
+    def update_book(self, book: Book) -> str:
+        with self._writing():
+            if book.book_id not in self._books_by_id:
+                return f"Book {book.book_id} not found"
+            stored = copy.copy(book)
+            self._persist_put(stored)
+            self._index(stored)
+        return f"Successfully updated book {book.book_id}"
+
+    def update_books(self, books: Iterable[Book]) -> list[str]:
+        with self._writing():
+            changed = [copy.copy(b) for b in books if b.book_id in self._books_by_id]
+            if changed:
+                self._persist_put_many(changed)
+                for book in changed:
+                    self._index(book)
+        return [b.book_id for b in changed]
+
+    def update_book_fields(self, changes: dict[str, dict]) -> list[str]:
+        with self._writing():
+            changed = []
+            for book_id, fields in changes.items():
+                if book_id not in self._books_by_id:
+                    continue
+                book = copy.copy(self._books_by_id[book_id])
+                for key, value in fields.items():
+                    setattr(book, key, value)
+                changed.append(book)
+            if changed:
+                self._persist_put_many(changed)
+                for book in changed:
+                    self._index(book)
+        return [b.book_id for b in changed]
+
+    def iter_books(self, fields: Optional[list[str]] = None) -> Iterator[Book]:
+        # everything is already decoded, so projection has nothing to save here
+        for book in self._books_by_id.values():
+            yield copy.copy(book)
+
+    def find_first_book_by_name(self, query: str) -> Optional[Book]:
+        ids = self._ids_by_title.get(query)
+        return copy.copy(self._books_by_id[next(iter(ids))]) if ids else None
+
+    def _find_book_by_id(self, book_id: str) -> list[Book]:
+        book = self._books_by_id.get(book_id)
+        return [] if book is None else [copy.copy(book)]
+
+    def find_books_by_ids(self, book_ids: Iterable[str]) -> dict[str, Book]:
+        return {book_id: copy.copy(self._books_by_id[book_id]) for book_id in book_ids if book_id in self._books_by_id}
+
+    def find_book_by_name(self, query) -> list[Book]:
+        ids = self._ids_by_title.get(query, {})
+        return [copy.copy(self._books_by_id[book_id]) for book_id in ids]
@@ -0,0 +1,120 @@
+import copy
+from contextlib import contextmanager
+from typing import Iterator
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.checkout_history_repository import CheckoutHistoryRepository
+from src.repositories.file_lock import file_lock
+from src.repositories.parsed_file_cache import file_identity
+
+class IndexedCheckoutHistoryRepository(CheckoutHistoryRepository):
+    """Checkout history kept in memory with indexes by record id and book_id.
+
+    Open checkouts live in their own per-book index, so "is this book out?"
+    costs the same no matter how long the history gets. Writes go through
+    to the JSON file under the `<filepath>.lock` flock, after reloading if
+    another process replaced the file in the meantime.
+    """
+
+    def __init__(self, filepath: str = "checkout_history.json", history_type: type = CheckoutHistory):
+        super().__init__(filepath, history_type=history_type)
+        self.reload()
+
+    def reload(self) -> None:
+        """Rebuild the indexes from the file."""
+        self._file_identity = file_identity(self.filepath)
+        self._records_by_id: dict[str, CheckoutHistory] = {}
+        # book_id -> ordered set of checkout_history_ids (dict keys keep insertion order)
+        self._ids_by_book: dict[str, dict[str, None]] = {}
+        self._active_ids_by_book: dict[str, dict[str, None]] = {}
+        for record in super().get_all_checkout_history():
+            self._index(record)
+
+    def _index(self, record: CheckoutHistory) -> None:
+        record_id = record.checkout_history_id
+        previous = self._records_by_id.get(record_id)
+        if previous is not None and previous.book_id != record.book_id:
+            self._discard(self._ids_by_book, previous.book_id, record_id)
+        if previous is not None:
+            self._discard(self._active_ids_by_book, previous.book_id, record_id)
+
+        self._records_by_id[record_id] = record
+        self._ids_by_book.setdefault(record.book_id, {})[record_id] = None
+        if record.is_checked_out():
+            self._active_ids_by_book.setdefault(record.book_id, {})[record_id] = None
+
+    def _discard(self, index: dict[str, dict[str, None]], book_id: str, record_id: str) -> None:
+        ids = index.get(book_id)
+        if ids is None:
+            return
+        ids.pop(record_id, None)
+        if not ids:
+            del index[book_id]
+
+    def _persist(self) -> None:
+        self._write_history(self._records_by_id.values())
+        self._file_identity = file_identity(self.filepath)
+
+    def refresh(self) -> None:
+        """Reload if another process has replaced the file since the last read or write."""
+        if file_identity(self.filepath) != self._file_identity:
+            self.reload()
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        with file_lock(self.write_lock_filepath):
+            self.refresh()
+            yield
+
+    def apply_records(self, records) -> None:
+        """Index records without writing the file.
+
+        For callers that have already made the records durable elsewhere,
+        e.g. JournaledBookRepository's log; flush() writes them out later.
+        """
+        for record in records:
+            self._index(copy.copy(record))
+
+    def flush(self) -> None:
+        self._persist()
+
+    def _copies(self, ids) -> list[CheckoutHistory]:
+        return [copy.copy(self._records_by_id[record_id]) for record_id in ids]
+
+    def get_all_checkout_history(self) -> list[CheckoutHistory]:
+        return self._copies(self._records_by_id)
+
+    def add_checkout_history(self, checkout_history: CheckoutHistory) -> str:
+        with self._writing():
+            self._index(copy.copy(checkout_history))
+            self._persist()
+        return checkout_history.checkout_history_id
+
+    def get_checkout_history_by_book_id(self, book_id: str) -> list[CheckoutHistory]:
+        return self._copies(self._ids_by_book.get(book_id, {}))
+
+    def get_active_checkouts_by_book_id(self, book_id: str) -> list[CheckoutHistory]:
+        return self._copies(self._active_ids_by_book.get(book_id, {}))
+
+    def get_active_checkouts_by_book_ids(self, book_ids) -> dict[str, list[CheckoutHistory]]:
+        return {
+            book_id: self._copies(self._active_ids_by_book[book_id])
+            for book_id in book_ids if book_id in self._active_ids_by_book
+        }
+
+    def save_checkout_histories(self, checkout_histories) -> None:
+        records = list(checkout_histories)
+        if records:
+            with self._writing():
+                self.apply_records(records)
+                self._persist()
+
+    def is_checked_out(self, book_id: str) -> bool:
+        return book_id in self._active_ids_by_book
+
+    def update_checkout_history(self, checkout_history: CheckoutHistory) -> str:
+        with self._writing():
+            if checkout_history.checkout_history_id not in self._records_by_id:
+                return f"Checkout history {checkout_history.checkout_history_id} not found"
+            self._index(copy.copy(checkout_history))
+            self._persist()
+        return f"Successfully updated checkout history {checkout_history.checkout_history_id}"
@@ -0,0 +1,241 @@
+import copy
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from src.domain.book import Book
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.checkout_transaction_protocol import check_checkout_conflicts
+from src.repositories.file_lock import file_lock, read_counters, write_counters
+from src.repositories.indexed_book_repository import IndexedBookRepository
+from src.repositories.indexed_checkout_history_repository import IndexedCheckoutHistoryRepository
+
+class JournaledBookRepository(IndexedBookRepository):
+    """Book repository that appends mutations to a log instead of rewriting the catalog.
+
+    books.json is treated as a snapshot. Each add/update/remove appends one
+    JSON line to `<filepath>.log`; loading replays the log over the snapshot.
+    Once the log holds `compact_threshold` records it is folded back into a
+    fresh snapshot and truncated. A torn final record (crash mid-append) is
+    cut off on load, everything before it is kept.
+
+    Given a history_repo, the log also carries checkouts: commit_checkouts
+    writes the availability change and the history records as one record,
+    so they are durable together, and compact() snapshots the history too.
+
+    Several processes (or threads) may share the files. Writers take an
+    exclusive lock on `<log>.lock`, first replay whatever the others appended,
+    check their preconditions against that state, then append. The fsync
+    happens after the lock is released: one writer syncs the log up to its
+    current end and every writer whose record is already covered skips its
+    own, so concurrent writers share fsyncs (group commit).
+    """
+
+    def __init__(self, filepath: str="books.json", log_filepath: Optional[str]=None, compact_threshold: int=1000, fsync: bool=True, book_type: type=Book,
+                 history_repo: Optional[IndexedCheckoutHistoryRepository]=None):
+        self.log_filepath = log_filepath or f"{filepath}.log"
+        # holds the log generation, bumped by every compaction
+        self.lock_filepath = f"{self.log_filepath}.lock"
+        # holds (generation, offset) the log is known to be fsynced up to
+        self.sync_filepath = f"{self.log_filepath}.sync"
+        # set before super().__init__, replaying the log may need it
+        self.history_repo = history_repo
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self.log_records = 0
+        self.generation: Optional[int] = None
+        self._log_offset = 0
+        self._mutex = threading.RLock()
+        super().__init__(filepath, book_type=book_type)
+
+    def reload(self) -> None:
+        with self._mutex, file_lock(self.lock_filepath, exclusive=False) as lock_fd:
+            self._load(read_counters(lock_fd)[0], exclusive=False)
+
+    def refresh(self) -> None:
+        """Apply what other processes have appended since the last read or write."""
+        with self._mutex, file_lock(self.lock_filepath, exclusive=False) as lock_fd:
+            self._catch_up(lock_fd, exclusive=False)
+
+    def _load(self, generation: int, exclusive: bool) -> None:
+        # re-read under the lock even on first load: the history may have been
+        # read before another process compacted its log into a new snapshot
+        if self.history_repo is not None:
+            self.history_repo.reload()
+        super().reload()
+        self.generation = generation
+        self._log_offset = 0
+        self.log_records = 0
+        self._replay_log(exclusive)
+
+    def _catch_up(self, lock_fd: int, exclusive: bool) -> None:
+        generation = read_counters(lock_fd)[0]
+        log_size = os.path.getsize(self.log_filepath) if os.path.exists(self.log_filepath) else 0
+        if generation != self.generation or log_size < self._log_offset:
+            # compacted elsewhere: the snapshots are newer than what we hold
+            self._load(generation, exclusive)
+        elif log_size > self._log_offset:
+            self._replay_log(exclusive)
+
+    def _replay_log(self, exclusive: bool) -> None:
+        """Apply log records from the current offset to the end.
+
+        A torn final record is skipped; it is only cut off when the caller
+        holds the exclusive lock, so a reader never truncates the log.
+        """
+        if not os.path.exists(self.log_filepath):
+            return
+
+        with open(self.log_filepath, 'rb') as f:
+            f.seek(self._log_offset)
+            lines = f.readlines()
+
+        for i, line in enumerate(lines):
+            is_last = i == len(lines) - 1
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError('record is missing its terminator')
+                record = json.loads(line)
+            except ValueError as exc:
+                if not is_last:
+                    raise ValueError(f"Corrupt record after byte {self._log_offset} in {self.log_filepath}") from exc
+                # torn write from a crashed writer: drop it and keep the good prefix
+                if exclusive:
+                    with open(self.log_filepath, 'r+b') as f:
+                        f.truncate(self._log_offset)
+                break
+            self._apply(record)
+            self.log_records += 1
+            self._log_offset += len(line)
+
+    def _apply(self, record: dict) -> None:
+        if record['op'] == 'put':
+            self._index(self.book_type.from_dict(record['book']))
+        elif record['op'] == 'put_many':
+            for item in record['books']:
+                self._index(self.book_type.from_dict(item))
+        elif record['op'] == 'checkout':
+            if self.history_repo is None:
+                raise ValueError(f"{self.log_filepath} holds checkouts but no history repository was given")
+            for item in record['books']:
+                self._index(self.book_type.from_dict(item))
+            self.history_repo.apply_records(CheckoutHistory.from_dict(item) for item in record['records'])
+        elif record['op'] == 'remove':
+            # removes can be replayed over a snapshot that already dropped the book
+            if record['book_id'] in self._books_by_id:
+                self._unindex(record['book_id'])
+        else:
+            raise ValueError(f"Unknown log operation: {record['op']}")
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[int]:
+        """Lock out other writers and bring the indexes up to date; sync on the way out."""
+        with self._mutex:
+            with file_lock(self.lock_filepath) as lock_fd:
+                self._catch_up(lock_fd, exclusive=True)
+                start = (self.generation, self._log_offset)
+                yield lock_fd
+                written = (self.generation, self._log_offset) != start
+                if self.log_records >= self.compact_threshold:
+                    self._compact(lock_fd)
+                end = (self.generation, self._log_offset)
+        # outside the lock, so the next writer can append while this one syncs
+        if written and self.fsync:
+            self._sync(*end)
+
+    def _sync(self, generation: int, offset: int) -> None:
+        with file_lock(self.sync_filepath) as sync_fd:
+            synced_generation, synced_offset = read_counters(sync_fd)
+            if synced_generation != generation or synced_offset >= offset:
+                # compacted since (the snapshot is synced) or another writer's fsync covered us
+                return
+            log_fd = os.open(self.log_filepath, os.O_RDONLY)
+            try:
+                size = os.fstat(log_fd).st_size
+                os.fsync(log_fd)
+            finally:
+                os.close(log_fd)
+            write_counters(sync_fd, generation, size)
+
+    def _append(self, record: dict) -> None:
+        data = (json.dumps(record) + '\n').encode('utf-8')
+        fd = os.open(self.log_filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # os.write may write less than asked, keep going until the record is whole
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        self._log_offset += len(data)
+        self.log_records += 1
+
+    def _persist_put(self, book: Book) -> None:
+        self._append({'op': 'put', 'book': book.to_dict()})
+
+    def _persist_put_many(self, books: list[Book]) -> None:
+        # one record for the whole batch, so a torn write drops all of it or none
+        self._append({'op': 'put_many', 'books': [b.to_dict() for b in books]})
+
+    def _persist_remove(self, book_id: str) -> None:
+        self._append({'op': 'remove', 'book_id': book_id})
+
+    def _writing(self):
+        # the log lock replaces the snapshot lock: it also replays other writers' records first
+        return self._exclusive()
+
+    def commit_checkouts(self, availability: list[tuple[str, bool]], records: list[CheckoutHistory]) -> None:
+        """Append the new availability and the history records as one log record, then apply both in memory.
+
+        Only `available` changes. It is set on the books as they stand once
+        the log lock is held and other writers' records are replayed, so an
+        edit made elsewhere in the meantime is not undone.
+
+        Raises CheckoutConflictError, writing nothing, if another writer got
+        there first: an open record for a book that is already out, or a
+        check-in of a record that is no longer open.
+        """
+        if self.history_repo is None:
+            raise ValueError("commit_checkouts needs a history_repo")
+        with self._exclusive():
+            check_checkout_conflicts(self.history_repo, records)
+            current = []
+            for book_id, available in availability:
+                if book_id in self._books_by_id:
+                    stored = copy.copy(self._books_by_id[book_id])
+                    stored.available = available
+                    current.append(stored)
+            self._append({
+                'op': 'checkout',
+                'books': [b.to_dict() for b in current],
+                'records': [r.to_dict() for r in records],
+            })
+            for book in current:
+                self._index(book)
+            self.history_repo.apply_records(records)
+
+    def compact(self) -> None:
+        """Fold the log into a new snapshot and truncate the log.
+
+        The snapshots are replaced atomically before the log is emptied, so a
+        crash in between only means the (idempotent) log is replayed again.
+        """
+        with self._exclusive() as lock_fd:
+            self._compact(lock_fd)
+
+    def _compact(self, lock_fd: int) -> None:
+        if self.history_repo is not None:
+            self.history_repo.flush()
+        self._persist()
+        with file_lock(self.sync_filepath) as sync_fd:
+            with open(self.log_filepath, 'w', encoding='utf-8') as f:
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            # a new generation tells other processes to reload the snapshots
+            self.generation += 1
+            write_counters(lock_fd, self.generation, 0)
+            write_counters(sync_fd, self.generation, 0)
+        self._log_offset = 0
+        self.log_records = 0
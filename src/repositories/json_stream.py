@@ -0,0 +1,64 @@
+import json
+from typing import Iterator
+
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+def is_ndjson_path(filepath: str) -> bool:
+    return filepath.endswith(NDJSON_EXTENSIONS)
+
+def iter_json_records(f, chunk_size: int = 64 * 1024) -> Iterator[dict]:
+    """Yield the objects stored in a catalog file one at a time.
+
+    Handles both layouts we write: a single JSON array (what json.dump
+    produces) and NDJSON, one object per line. The array is decoded
+    incrementally from fixed-size chunks, so memory stays bounded by the
+    largest record rather than the whole file.
+    """
+    buffer = f.read(chunk_size)
+    pos = _skip_whitespace(buffer, 0)
+    if pos == len(buffer):
+        return
+    if buffer[pos] != '[':
+        yield from _iter_ndjson(f)
+        return
+
+    decoder = json.JSONDecoder()
+    pos += 1
+    while True:
+        # skip separators, pulling in more data if the chunk ran out
+        while True:
+            pos = _skip_whitespace(buffer, pos, chars=' \t\r\n,')
+            if pos < len(buffer):
+                break
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError('Unexpected end of file inside JSON array')
+            buffer, pos = chunk, 0
+
+        if buffer[pos] == ']':
+            return
+
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+
+        yield record
+        pos = end
+        if pos >= chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+def _iter_ndjson(f) -> Iterator[dict]:
+    f.seek(0)
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+def _skip_whitespace(buffer: str, pos: int, chars: str = ' \t\r\n') -> int:
+    while pos < len(buffer) and buffer[pos] in chars:
+        pos += 1
+    return pos
@@ -0,0 +1,64 @@
+import os
+import threading
+from typing import Callable
+
+def file_identity(filepath: str) -> tuple:
+    """(st_mtime_ns, st_size, st_ino): changes on every write, atomic renames included."""
+    stat = os.stat(filepath)
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+class ParsedFileCache:
+    """Caches the parsed contents of a file until the file changes.
+
+    Entries are keyed by path and validated against the file's
+    (st_mtime_ns, st_size, st_ino), so an atomic rename or any other
+    writer - even another process - turns the next lookup into a miss.
+    Repositories also call invalidate() after their own writes.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[tuple, tuple]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _identity(self, filepath: str) -> tuple:
+        return file_identity(filepath)
+
+    def get(self, filepath: str, loader: Callable[[], list]) -> tuple:
+        """Return the cached parse of filepath, calling loader() on a miss.
+
+        The result is a tuple so the shared list can't be changed in place.
+        """
+        path = os.path.abspath(filepath)
+        # stat before loading: if the file changes mid-parse the entry is
+        # stored under the old identity and the next call reloads it
+        identity = self._identity(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == identity:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = tuple(loader())
+        with self._lock:
+            self._entries[path] = (identity, value)
+        return value
+
+    def invalidate(self, filepath: str) -> None:
+        with self._lock:
+            self._entries.pop(os.path.abspath(filepath), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+# one cache for the whole process, shared by every repository that opts in
+parsed_file_cache = ParsedFileCache()
@@ -0,0 +1,196 @@
+import copy
+import gzip
+import json
+import os
+import re
+import stat
+from typing import Iterable, Optional
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.atomic_file import atomic_write, atomic_write_json, create_json_if_missing
+from src.repositories.checkout_history_repository import CheckoutHistoryRepository
+from src.repositories.checkout_history_repository_protocol import CheckoutHistoryRepositoryProtocol
+from src.repositories.file_lock import file_lock
+from src.repositories.parsed_file_cache import ParsedFileCache
+
+HOT_SEGMENT = 'open.json'
+UNDATED = 'undated'
+_SEGMENT_NAME = re.compile(r'^(\d{4}-\d{2}|undated)\.json(\.gz)?$')
+_MONTH = re.compile(r'^\d{4}-\d{2}')
+
+class PartitionedCheckoutHistoryRepository(CheckoutHistoryRepositoryProtocol):
+    """Checkout history split into monthly segment files under `directory`.
+
+    Open checkouts live in a small hot segment (open.json), so "is this book
+    out?" never reads old history. Once checked in, a record moves to the
+    segment for the month it was checked out (YYYY-MM.json). Time-range
+    queries only open the segments overlapping the range. archive() gzips
+    old segments (YYYY-MM.json.gz) and makes them read-only.
+
+    A record is written to its month segment before it leaves the hot one,
+    so a crash in between leaves a duplicate (the closed copy wins on reads)
+    rather than losing it. Writes and archive() hold an flock on
+    `<directory>.lock`, kept beside the directory so it never shows up as a
+    segment, and processes sharing the directory don't lose updates.
+    """
+
+    def __init__(self, directory: str = "checkout_history", cache: Optional[ParsedFileCache] = None,
+                 history_type: type = CheckoutHistory):
+        self.directory = directory
+        # CheckoutHistory, or CompactCheckoutHistory for long histories
+        self.history_type = history_type
+        # archived segments never change, so they are worth keeping parsed
+        self.cache = cache
+        self.hot_path = os.path.join(directory, HOT_SEGMENT)
+        self.lock_filepath = f"{os.path.normpath(directory)}.lock"
+        os.makedirs(directory, exist_ok=True)
+        create_json_if_missing(self.hot_path, [])
+
+    # --- segments ---
+
+    def segments(self) -> dict[str, str]:
+        """month -> segment path, in month order; an archived segment wins over a stale plain copy."""
+        found = {}
+        for name in sorted(os.listdir(self.directory)):
+            match = _SEGMENT_NAME.match(name)
+            if match and (match.group(2) or match.group(1) not in found):
+                found[match.group(1)] = os.path.join(self.directory, name)
+        return dict(sorted(found.items()))
+
+    def _month(self, record: CheckoutHistory) -> str:
+        time = record.checked_out_time or ''
+        return time[:7] if _MONTH.match(time) else UNDATED
+
+    def _read(self, path: str) -> list[CheckoutHistory]:
+        if self.cache is not None and path.endswith('.gz'):
+            return [copy.copy(h) for h in self.cache.get(path, lambda: self._load(path))]
+        return self._load(path)
+
+    def _load(self, path: str) -> list[CheckoutHistory]:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            return [self.history_type.from_dict(item) for item in json.load(f)]
+
+    def _write(self, path: str, records: Iterable[CheckoutHistory]) -> None:
+        atomic_write_json(path, [h.to_dict() for h in records])
+
+    def _hot(self) -> list[CheckoutHistory]:
+        return self._load(self.hot_path)
+
+    # --- protocol ---
+
+    def get_all_checkout_history(self) -> list[CheckoutHistory]:
+        closed = []
+        for path in self.segments().values():
+            closed.extend(self._read(path))
+        closed_ids = {h.checkout_history_id for h in closed}
+        return closed + [h for h in self._hot() if h.checkout_history_id not in closed_ids]
+
+    def add_checkout_history(self, checkout_history: CheckoutHistory) -> str:
+        self.save_checkout_histories([checkout_history])
+        return checkout_history.checkout_history_id
+
+    def get_checkout_history_by_book_id(self, book_id: str) -> list[CheckoutHistory]:
+        # no per-book index across segments: this reads them all
+        return [h for h in self.get_all_checkout_history() if h.book_id == book_id]
+
+    def get_active_checkouts_by_book_id(self, book_id: str) -> list[CheckoutHistory]:
+        return [h for h in self._hot() if h.book_id == book_id]
+
+    def get_active_checkouts_by_book_ids(self, book_ids: Iterable[str]) -> dict[str, list[CheckoutHistory]]:
+        wanted = set(book_ids)
+        active = {}
+        for h in self._hot():
+            if h.book_id in wanted:
+                active.setdefault(h.book_id, []).append(h)
+        return active
+
+    def update_checkout_history(self, checkout_history: CheckoutHistory) -> str:
+        record_id = checkout_history.checkout_history_id
+        path = self.segments().get(self._month(checkout_history))
+        known = any(h.checkout_history_id == record_id for h in self._hot())
+        if not known and path is not None:
+            known = any(h.checkout_history_id == record_id for h in self._read(path))
+        if not known:
+            return f"Checkout history {record_id} not found"
+        self.save_checkout_histories([checkout_history])
+        return f"Successfully updated checkout history {record_id}"
+
+    def save_checkout_histories(self, checkout_histories: Iterable[CheckoutHistory]) -> None:
+        """Add or replace records: one write per month segment touched, then one for the hot segment."""
+        records = list(checkout_histories)
+        with file_lock(self.lock_filepath):
+            self._save(records)
+
+    def _save(self, checkout_histories: list[CheckoutHistory]) -> None:
+        hot = {h.checkout_history_id: h for h in self._hot()}
+        closed_by_month: dict[str, dict[str, CheckoutHistory]] = {}
+        for record in checkout_histories:
+            if record.is_checked_out():
+                hot[record.checkout_history_id] = record
+            else:
+                closed_by_month.setdefault(self._month(record), {})[record.checkout_history_id] = record
+
+        segments = self.segments()
+        archived = sorted(m for m in closed_by_month if segments.get(m, '').endswith('.gz'))
+        if archived:
+            raise ValueError(f"Checkout history for {', '.join(archived)} is archived and read-only")
+
+        for month, changed in closed_by_month.items():
+            path = segments.get(month)
+            existing = self._read(path) if path is not None else []
+            existing_ids = {h.checkout_history_id for h in existing}
+            merged = [changed.get(h.checkout_history_id, h) for h in existing]
+            merged += [h for record_id, h in changed.items() if record_id not in existing_ids]
+            self._write(os.path.join(self.directory, f"{month}.json"), merged)
+        for changed in closed_by_month.values():
+            for record_id in changed:
+                hot.pop(record_id, None)
+        self._write(self.hot_path, hot.values())
+
+    # --- time ranges and archival ---
+
+    def get_checkout_history_between(self, start: str, end: str) -> list[CheckoutHistory]:
+        """Records checked out in [start, end), ISO timestamps; only overlapping segments are read."""
+        first, last = start[:7], end[:7]
+        records = []
+        for month, path in self.segments().items():
+            if month != UNDATED and first <= month <= last:
+                records.extend(self._read(path))
+        closed_ids = {h.checkout_history_id for h in records}
+        records += [h for h in self._hot() if h.checkout_history_id not in closed_ids]
+        return [h for h in records if h.checked_out_time and start <= h.checked_out_time < end]
+
+    def archive(self, before: str) -> list[str]:
+        """Gzip every plain segment for a month before `before` (YYYY-MM); returns the months archived.
+
+        Months at or after the oldest open checkout are kept writable, that
+        loan still has to land in its segment when it is checked in.
+        """
+        with file_lock(self.lock_filepath):
+            return self._archive(before)
+
+    def _archive(self, before: str) -> list[str]:
+        oldest_open = min((self._month(h) for h in self._hot()), default=None)
+        if oldest_open is not None and oldest_open != UNDATED:
+            before = min(before, oldest_open)
+        archived = []
+        for month, path in self.segments().items():
+            if month == UNDATED or month >= before or path.endswith('.gz'):
+                continue
+            records = [h.to_dict() for h in self._load(path)]
+            archive_path = f"{path}.gz"
+            data = gzip.compress(json.dumps(records, separators=(',', ':')).encode('utf-8'))
+            atomic_write(archive_path, lambda f: f.write(data), binary=True)
+            os.chmod(archive_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            # the archive is in place first, so a crash here only leaves a stale copy behind
+            os.remove(path)
+            archived.append(month)
+        return archived
+
+def partition_checkout_history(filepath: str, directory: str = "checkout_history") -> bool:
+    """Split a single checkout_history.json into segments, once; returns whether it ran."""
+    if os.path.isdir(directory) or not os.path.exists(filepath):
+        return False
+    records = CheckoutHistoryRepository(filepath).get_all_checkout_history()
+    PartitionedCheckoutHistoryRepository(directory).save_checkout_histories(records)
+    return True
@@ -0,0 +1,176 @@
+import sqlite3
+from typing import Iterable, Iterator, Optional
+from src.domain.book import Book
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.book_predicates import Predicate, predicates_to_sql
+from src.repositories.book_repository import prompt_book_edit
+from src.repositories.book_repository_protocol import BookRepositoryProtocol
+from src.repositories.checkout_transaction_protocol import CheckoutConflictError
+from src.repositories.sqlite_database import BOOK_COLUMNS, CHECKOUT_HISTORY_COLUMNS, book_to_row, row_to_book_dict
+
+_SELECT = f"SELECT {', '.join(BOOK_COLUMNS)} FROM books"
+_SELECT_ALL = f"{_SELECT} ORDER BY rowid"
+_SELECT_BY_ID = f"{_SELECT} WHERE book_id = ?"
+_SELECT_BY_TITLE = f"{_SELECT} WHERE title = ? ORDER BY rowid"
+_SELECT_FIRST_BY_TITLE = f"{_SELECT_BY_TITLE} LIMIT 1"
+_INSERT = f"INSERT INTO books ({', '.join(BOOK_COLUMNS)}) VALUES ({', '.join('?' for _ in BOOK_COLUMNS)})"
+_INSERT_IF_NEW = f"INSERT OR IGNORE INTO books ({', '.join(BOOK_COLUMNS)}) VALUES ({', '.join('?' for _ in BOOK_COLUMNS)})"
+_UPDATE = f"UPDATE books SET {', '.join(f'{c} = ?' for c in BOOK_COLUMNS[1:])} WHERE book_id = ?"
+_DELETE = "DELETE FROM books WHERE book_id = ?"
+# stays under sqlite's default limit on bound parameters
+_IN_CHUNK = 500
+_SET_AVAILABLE = "UPDATE books SET available = ? WHERE book_id = ?"
+# inserts nothing while the book has an open checkout, so two writers can't both check it out
+_INSERT_CHECKOUT_IF_IN = (
+    f"INSERT INTO checkout_history ({', '.join(CHECKOUT_HISTORY_COLUMNS)}) "
+    f"SELECT {', '.join('?' for _ in CHECKOUT_HISTORY_COLUMNS)} "
+    "WHERE NOT EXISTS (SELECT 1 FROM checkout_history WHERE book_id = ? AND checked_in_time IS NULL)"
+)
+_CHECK_IN_IF_OUT = "UPDATE checkout_history SET checked_in_time = ? WHERE checkout_history_id = ? AND checked_in_time IS NULL"
+
+class SqliteBookRepository(BookRepositoryProtocol):
+    """BookRepositoryProtocol backed by the `books` table of a sqlite database."""
+
+    # iter_books_where runs as a WHERE clause, so the indexes decide which rows are read
+    filters_natively = True
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def data_version(self) -> tuple:
+        # data_version moves on commits from other connections, total_changes on our own
+        other_writers = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        return (id(self.connection), other_writers, self.connection.total_changes)
+
+    def get_all_books(self) -> list[Book]:
+        rows = self.connection.execute(_SELECT_ALL)
+        return [Book.from_dict(row_to_book_dict(row)) for row in rows]
+
+    def iter_books(self, fields: Optional[list[str]] = None) -> Iterator[Book]:
+        if fields is None:
+            for row in self.connection.execute(_SELECT_ALL):
+                yield Book.from_dict(row_to_book_dict(row))
+            return
+
+        unknown = set(fields) - set(BOOK_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown book fields: {sorted(unknown)}")
+        # only the projected columns are read from the table
+        query = f"SELECT {', '.join(fields)} FROM books ORDER BY rowid"
+        for row in self.connection.execute(query):
+            yield Book.from_dict(row_to_book_dict(row, fields))
+
+    def iter_books_where(self, predicates: Iterable[Predicate], fields: Optional[list[str]] = None) -> Iterator[Book]:
+        columns = BOOK_COLUMNS if fields is None else fields
+        unknown = set(columns) - set(BOOK_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown book fields: {sorted(unknown)}")
+        where, params = predicates_to_sql(predicates)
+        query = f"SELECT {', '.join(columns)} FROM books WHERE {where} ORDER BY rowid"
+        for row in self.connection.execute(query, params):
+            yield Book.from_dict(row_to_book_dict(row, columns))
+
+    def find_first_book_by_name(self, query: str) -> Optional[Book]:
+        row = self.connection.execute(_SELECT_FIRST_BY_TITLE, (query,)).fetchone()
+        return None if row is None else Book.from_dict(row_to_book_dict(row))
+
+    def add_book(self, book: Book) -> str:
+        with self.connection:
+            self.connection.execute(_INSERT, book_to_row(book))
+        return book.book_id
+
+    def add_books(self, books: Iterable[Book]) -> list[str]:
+        added = []
+        with self.connection:
+            for book in books:
+                cursor = self.connection.execute(_INSERT_IF_NEW, book_to_row(book))
+                if cursor.rowcount:
+                    added.append(book.book_id)
+        return added
+
+    def remove_book(self, book_id: str) -> str:
+        with self.connection:
+            cursor = self.connection.execute(_DELETE, (book_id,))
+        if cursor.rowcount == 0:
+            return f"Book {book_id} Not Found"
+        return f"Book {book_id} Successfully Removed"
+
+    def update_book(self, book: Book) -> str:
+        row = book_to_row(book)
+        with self.connection:
+            cursor = self.connection.execute(_UPDATE, row[1:] + row[:1])
+        if cursor.rowcount == 0:
+            return f"Book {book.book_id} not found"
+        return f"Successfully updated book {book.book_id}"
+
+    def update_books(self, books: Iterable[Book]) -> list[str]:
+        updated = []
+        with self.connection:
+            for book in books:
+                row = book_to_row(book)
+                cursor = self.connection.execute(_UPDATE, row[1:] + row[:1])
+                if cursor.rowcount:
+                    updated.append(book.book_id)
+        return updated
+
+    def update_book_fields(self, changes: dict[str, dict]) -> list[str]:
+        """One UPDATE per book, setting only the given columns."""
+        updated = []
+        with self.connection:
+            for book_id, fields in changes.items():
+                unknown = set(fields) - set(BOOK_COLUMNS[1:])
+                if unknown:
+                    raise ValueError(f"Unknown book fields: {', '.join(sorted(unknown))}")
+                if not fields:
+                    continue
+                assignments = ', '.join(f'{c} = ?' for c in fields)
+                cursor = self.connection.execute(f"UPDATE books SET {assignments} WHERE book_id = ?", (*fields.values(), book_id))
+                if cursor.rowcount:
+                    updated.append(book_id)
+        return updated
+
+    def find_books_by_ids(self, book_ids: Iterable[str]) -> dict[str, Book]:
+        """One primary-key IN query per chunk of ids."""
+        ids = list(dict.fromkeys(book_ids))
+        found = {}
+        for start in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[start:start + _IN_CHUNK]
+            rows = self.connection.execute(f"{_SELECT} WHERE book_id IN ({', '.join('?' for _ in chunk)})", chunk)
+            for row in rows:
+                book = Book.from_dict(row_to_book_dict(row))
+                found[book.book_id] = book
+        return found
+
+    def refresh(self) -> None:
+        # every query reads the database, there is nothing to catch up on
+        pass
+
+    def commit_checkouts(self, availability: list[tuple[str, bool]], records: list[CheckoutHistory]) -> None:
+        """Availability and checkout_history rows in one sqlite transaction.
+
+        The history statements are conditional, so a checkout or check-in that
+        lost a race changes no row and the whole transaction is rolled back.
+        """
+        with self.connection:
+            for record in records:
+                if record.is_checked_out():
+                    row = tuple(record.to_dict()[c] for c in CHECKOUT_HISTORY_COLUMNS)
+                    cursor = self.connection.execute(_INSERT_CHECKOUT_IF_IN, (*row, record.book_id))
+                    if cursor.rowcount != 1:
+                        raise CheckoutConflictError(f"Book {record.book_id} is already checked out")
+                else:
+                    cursor = self.connection.execute(_CHECK_IN_IF_OUT, (record.checked_in_time, record.checkout_history_id))
+                    if cursor.rowcount != 1:
+                        raise CheckoutConflictError(f"Book {record.book_id} is not currently checked out")
+            self.connection.executemany(_SET_AVAILABLE, [(available, book_id) for book_id, available in availability])
+
+    def edit_book(self, book: Book, key: str) -> str:
+        return prompt_book_edit(self, book, key)
+
+    def find_book_by_id(self, book_id: str) -> Optional[Book]:
+        row = self.connection.execute(_SELECT_BY_ID, (book_id,)).fetchone()
+        return None if row is None else Book.from_dict(row_to_book_dict(row))
+
+    def find_book_by_name(self, query) -> list[Book]:
+        rows = self.connection.execute(_SELECT_BY_TITLE, (query,))
+        return [Book.from_dict(row_to_book_dict(row)) for row in rows]
@@ -0,0 +1,69 @@
+import sqlite3
+from typing import Iterable
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.checkout_history_repository_protocol import CheckoutHistoryRepositoryProtocol
+from src.repositories.sqlite_database import CHECKOUT_HISTORY_COLUMNS
+
+_SELECT = f"SELECT {', '.join(CHECKOUT_HISTORY_COLUMNS)} FROM checkout_history"
+_SELECT_ALL = f"{_SELECT} ORDER BY rowid"
+_SELECT_BY_BOOK = f"{_SELECT} WHERE book_id = ? ORDER BY rowid"
+_SELECT_ACTIVE_BY_BOOK = f"{_SELECT} WHERE book_id = ? AND checked_in_time IS NULL ORDER BY rowid"
+_INSERT = f"INSERT INTO checkout_history ({', '.join(CHECKOUT_HISTORY_COLUMNS)}) VALUES (?, ?, ?, ?)"
+_UPSERT = f"INSERT OR REPLACE INTO checkout_history ({', '.join(CHECKOUT_HISTORY_COLUMNS)}) VALUES (?, ?, ?, ?)"
+# stays under sqlite's default limit on bound parameters
+_IN_CHUNK = 500
+_UPDATE = "UPDATE checkout_history SET book_id = ?, checked_out_time = ?, checked_in_time = ? WHERE checkout_history_id = ?"
+
+class SqliteCheckoutHistoryRepository(CheckoutHistoryRepositoryProtocol):
+    """CheckoutHistoryRepositoryProtocol backed by the `checkout_history` table.
+
+    Active checkouts are answered from the (book_id, checked_in_time) index.
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def _to_records(self, rows) -> list[CheckoutHistory]:
+        return [CheckoutHistory.from_dict(dict(zip(CHECKOUT_HISTORY_COLUMNS, row))) for row in rows]
+
+    def get_all_checkout_history(self) -> list[CheckoutHistory]:
+        return self._to_records(self.connection.execute(_SELECT_ALL))
+
+    def add_checkout_history(self, checkout_history: CheckoutHistory) -> str:
+        data = checkout_history.to_dict()
+        with self.connection:
+            self.connection.execute(_INSERT, tuple(data[c] for c in CHECKOUT_HISTORY_COLUMNS))
+        return checkout_history.checkout_history_id
+
+    def get_checkout_history_by_book_id(self, book_id: str) -> list[CheckoutHistory]:
+        return self._to_records(self.connection.execute(_SELECT_BY_BOOK, (book_id,)))
+
+    def get_active_checkouts_by_book_id(self, book_id: str) -> list[CheckoutHistory]:
+        return self._to_records(self.connection.execute(_SELECT_ACTIVE_BY_BOOK, (book_id,)))
+
+    def get_active_checkouts_by_book_ids(self, book_ids: Iterable[str]) -> dict[str, list[CheckoutHistory]]:
+        ids = list(dict.fromkeys(book_ids))
+        active = {}
+        for start in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[start:start + _IN_CHUNK]
+            query = f"{_SELECT} WHERE checked_in_time IS NULL AND book_id IN ({', '.join('?' for _ in chunk)}) ORDER BY rowid"
+            for record in self._to_records(self.connection.execute(query, chunk)):
+                active.setdefault(record.book_id, []).append(record)
+        return active
+
+    def save_checkout_histories(self, checkout_histories: Iterable[CheckoutHistory]) -> None:
+        rows = [tuple(h.to_dict()[c] for c in CHECKOUT_HISTORY_COLUMNS) for h in checkout_histories]
+        with self.connection:
+            self.connection.executemany(_UPSERT, rows)
+
+    def update_checkout_history(self, checkout_history: CheckoutHistory) -> str:
+        with self.connection:
+            cursor = self.connection.execute(_UPDATE, (
+                checkout_history.book_id,
+                checkout_history.checked_out_time,
+                checkout_history.checked_in_time,
+                checkout_history.checkout_history_id,
+            ))
+        if cursor.rowcount == 0:
+            return f"Checkout history {checkout_history.checkout_history_id} not found"
+        return f"Successfully updated checkout history {checkout_history.checkout_history_id}"
@@ -0,0 +1,112 @@
+import json
+import os
+import sqlite3
+from typing import Sequence
+
+BOOK_COLUMNS = (
+    "book_id", "title", "author", "genre", "publication_year", "page_count",
+    "average_rating", "ratings_count", "price_usd", "publisher", "language",
+    "format", "in_print", "sales_millions", "last_checkout", "available",
+    "publisher_email",
+)
+
+CHECKOUT_HISTORY_COLUMNS = ("checkout_history_id", "book_id", "checked_out_time", "checked_in_time")
+
+# genre has no declared type so ints (tests, generators) and strings both round-trip unchanged
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    book_id TEXT PRIMARY KEY,
+    title TEXT,
+    author TEXT,
+    genre,
+    publication_year INTEGER,
+    page_count INTEGER,
+    average_rating REAL,
+    ratings_count INTEGER,
+    price_usd REAL,
+    publisher TEXT,
+    language TEXT,
+    format TEXT,
+    in_print INTEGER,
+    sales_millions REAL,
+    last_checkout TEXT,
+    available INTEGER,
+    publisher_email TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_books_title ON books (title);
+CREATE INDEX IF NOT EXISTS idx_books_genre ON books (genre);
+CREATE INDEX IF NOT EXISTS idx_books_author ON books (author);
+CREATE INDEX IF NOT EXISTS idx_books_publication_year ON books (publication_year);
+
+CREATE TABLE IF NOT EXISTS checkout_history (
+    checkout_history_id TEXT PRIMARY KEY,
+    book_id TEXT NOT NULL,
+    checked_out_time TEXT NOT NULL,
+    checked_in_time TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_checkout_history_active ON checkout_history (book_id, checked_in_time);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+def connect(db_path: str = "library.db") -> sqlite3.Connection:
+    """Open the library database in WAL mode and make sure the schema exists.
+
+    Queries in the sqlite repositories are fixed, parameterised SQL strings,
+    so sqlite3's per-connection statement cache compiles each one once.
+    """
+    connection = sqlite3.connect(db_path, cached_statements=256)
+    if db_path != ":memory:":
+        connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+def book_to_row(book) -> tuple:
+    data = book.to_dict()
+    return tuple(data[column] for column in BOOK_COLUMNS)
+
+def row_to_book_dict(row, columns: Sequence[str] = BOOK_COLUMNS) -> dict:
+    """A books row as Book.from_dict input; with `columns`, a projected row (the rest left None)."""
+    data = {"title": None, "author": None, "book_id": None}
+    data.update(zip(columns, row))
+    for column in ("in_print", "available"):
+        if data.get(column) is not None:
+            data[column] = bool(data[column])
+    return data
+
+def migrate_json_to_sqlite(connection: sqlite3.Connection, books_path: str = "books.json",
+                           checkout_history_path: str = "checkout_history.json") -> bool:
+    """Copy the JSON catalog and checkout history into the database, once.
+
+    Returns False without touching anything if the migration already ran.
+    """
+    done = connection.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+    if done is not None:
+        return False
+
+    books = []
+    if os.path.exists(books_path):
+        with open(books_path, 'r', encoding='utf-8') as f:
+            books = json.load(f)
+    history = []
+    if os.path.exists(checkout_history_path):
+        with open(checkout_history_path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+
+    placeholders = ", ".join("?" for _ in BOOK_COLUMNS)
+    history_placeholders = ", ".join("?" for _ in CHECKOUT_HISTORY_COLUMNS)
+    with connection:
+        connection.executemany(
+            f"INSERT OR REPLACE INTO books ({', '.join(BOOK_COLUMNS)}) VALUES ({placeholders})",
+            (tuple(item.get(column) for column in BOOK_COLUMNS) for item in books),
+        )
+        connection.executemany(
+            f"INSERT OR REPLACE INTO checkout_history ({', '.join(CHECKOUT_HISTORY_COLUMNS)}) VALUES ({history_placeholders})",
+            (tuple(item.get(column) for column in CHECKOUT_HISTORY_COLUMNS) for item in history),
+        )
+        connection.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', '1')")
+    return True
@@ -0,0 +1,215 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Optional
+import numpy as np
+import pandas as pd
+from src.repositories.book_repository import BookRepository
+from src.repositories.indexed_book_repository import IndexedBookRepository
+from src.repositories.json_stream import iter_json_records
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_batch import BookBatch
+from src.services.book_generator_service_V2 import generate_books_json
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# every analytics method with the arguments the REPL uses, so the NumPy and pandas variants sit side by side
+METHODS: dict[str, Callable] = {
+    'average_price': lambda svc, books: svc.average_price(books),
+    'top_rated': lambda svc, books: svc.top_rated(books),
+    'top_rated_with_pandas': lambda svc, books: svc.top_rated_with_pandas(books),
+    'value_scores': lambda svc, books: svc.value_scores(books),
+    'value_scores_with_pandas': lambda svc, books: svc.value_scores_with_pandas(books),
+    'median_price_by_genre': lambda svc, books: svc.median_price_by_genre(books),
+    # the catalog's latest publication year always has books; a fixed year may have none at small sizes
+    'most_popular_genre': lambda svc, books: svc.most_popular_genre(books, svc.genre_year_table(books).years[-1]),
+}
+
+# catalog loads, cold only: every run parses the file again. The indexed load also builds the
+# id/title indexes and the per-genre price aggregates, so the gap between the two is their cost.
+LOADS: dict[str, Callable[[str], object]] = {
+    'load:BookRepository': lambda path: BookRepository(path).get_all_books(),
+    'load:IndexedBookRepository': lambda path: IndexedBookRepository(path),
+}
+
+def catalog_path(data_dir: str, size: int, seed: int) -> str:
+    """Generate the catalog once per (size, seed) and reuse it across runs.
+
+    The seed fixes every field, book_ids and last_checkout dates included,
+    so the same (size, seed) gives the same file on any machine.
+    """
+    path = os.path.join(data_dir, f"books_{size}_seed{seed}.json")
+    if not os.path.exists(path):
+        generate_books_json(path, count=size, seed=seed)
+    return path
+
+def load_batch(path: str) -> BookBatch:
+    with open(path, 'r', encoding='utf-8') as f:
+        # a fixed version, so "warm" runs reuse the cached frame like the REPL does
+        return BookBatch.from_records(iter_json_records(f), version=path)
+
+def _summary(samples: list[float]) -> dict:
+    ms = np.array(samples) * 1000
+    return {
+        'median_ms': round(float(np.median(ms)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'min_ms': round(float(ms.min()), 4),
+    }
+
+def _time(call: Callable[[], object], warmup: int, repeats: int, fresh: Callable[[], None]) -> list[float]:
+    for _ in range(warmup):
+        fresh()
+        call()
+    samples = []
+    for _ in range(repeats):
+        fresh()
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def _peak_bytes(call: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def benchmark_method(method: str, batch: BookBatch, warmup: int = 1, repeats: int = 5) -> dict:
+    """Time one method cold (fresh service: frame built every call) and warm (frame cached)."""
+    run = METHODS[method]
+    service = BookAnalyticsService()
+    cold = _time(lambda: run(service, batch), warmup, repeats, service.invalidate)
+    run(service, batch)
+    warm = _time(lambda: run(service, batch), warmup, repeats, lambda: None)
+    service.invalidate()
+    return {
+        'cold': _summary(cold),
+        'warm': _summary(warm),
+        'peak_mb': round(_peak_bytes(lambda: run(BookAnalyticsService(), batch)) / 1e6, 3),
+    }
+
+def benchmark_load(load: str, path: str, warmup: int = 1, repeats: int = 5) -> dict:
+    """Time loading the catalog at `path` from scratch; there is no warm variant."""
+    run = LOADS[load]
+    return {
+        'cold': _summary(_time(lambda: run(path), warmup, repeats, lambda: None)),
+        'peak_mb': round(_peak_bytes(lambda: run(path)) / 1e6, 3),
+    }
+
+def run_benchmarks(sizes: Optional[list[int]] = None, seed: int = 0, warmup: int = 1, repeats: int = 5,
+                   methods: Optional[list[str]] = None, data_dir: Optional[str] = None,
+                   loads: Optional[list[str]] = None) -> dict:
+    """Benchmark every method and catalog load at every size; the result is plain JSON-able data."""
+    sizes = sizes or DEFAULT_SIZES
+    methods = methods or list(METHODS)
+    loads = list(LOADS) if loads is None else loads
+    unknown_methods = sorted(set(methods) - set(METHODS))
+    if unknown_methods:
+        raise ValueError(f"Unknown methods: {unknown_methods}")
+    unknown_loads = sorted(set(loads) - set(LOADS))
+    if unknown_loads:
+        raise ValueError(f"Unknown loads: {unknown_loads}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = catalog_path(data_dir or tmp_dir, size, seed)
+            batch = load_batch(path)
+            results[str(size)] = {method: benchmark_method(method, batch, warmup, repeats) for method in methods}
+            del batch
+            results[str(size)].update((load, benchmark_load(load, path, warmup, repeats)) for load in loads)
+    return {
+        'meta': {
+            'seed': seed,
+            'warmup': warmup,
+            'repeats': repeats,
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'created': datetime.now(timezone.utc).isoformat(),
+        },
+        'results': results,
+    }
+
+def compare_to_baseline(report: dict, baseline: dict, threshold: float = 0.10, stat: str = 'median_ms') -> list[dict]:
+    """Rows present in both runs whose cold or warm `stat` moved by more than threshold (a fraction)."""
+    changes = []
+    for size, methods in report['results'].items():
+        for method, current in methods.items():
+            before = baseline.get('results', {}).get(size, {}).get(method)
+            if before is None:
+                continue
+            for mode in ('cold', 'warm'):
+                if mode not in current or mode not in before:
+                    continue
+                old, new = before[mode][stat], current[mode][stat]
+                change = (new - old) / old if old else 0.0
+                if abs(change) > threshold:
+                    changes.append({
+                        'size': size, 'method': method, 'mode': mode,
+                        'baseline': old, 'current': new,
+                        'change_pct': round(100 * change, 1),
+                        'regression': change > 0,
+                    })
+    return changes
+
+def print_report(report: dict) -> None:
+    print(f"{'rows':>10}  {'method':<28}{'cold p50':>11}{'cold p95':>11}{'warm p50':>11}{'peak MB':>10}")
+    for size, methods in report['results'].items():
+        for method, row in methods.items():
+            warm = f"{row['warm']['median_ms']:>11.3f}" if 'warm' in row else f"{'-':>11}"
+            print(
+                f"{size:>10}  {method:<28}{row['cold']['median_ms']:>11.3f}{row['cold']['p95_ms']:>11.3f}"
+                f"{warm}{row['peak_mb']:>10.2f}"
+            )
+
+def print_changes(changes: list[dict]) -> None:
+    if not changes:
+        print("No changes beyond the threshold.")
+    for c in changes:
+        label = 'slower' if c['regression'] else 'faster'
+        print(f"{c['size']:>10}  {c['method']:<28}{c['mode']:<5} {c['baseline']:.3f} -> {c['current']:.3f} ms ({c['change_pct']:+.1f}%, {label})")
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark BookAnalyticsService and catalog loads across catalog sizes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='catalog sizes, e.g. 1000 100000 10000000')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--methods', nargs='+', choices=list(METHODS))
+    parser.add_argument('--loads', nargs='*', choices=list(LOADS), help='catalog loads to time, default all; pass none to skip')
+    parser.add_argument('--data-dir', help='keep generated catalogs here to reuse them between runs')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--baseline', help='JSON report of an earlier run to diff against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative change that counts, default 0.10')
+    args = parser.parse_args(argv)
+
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+    report = run_benchmarks(args.sizes, args.seed, args.warmup, args.repeats, args.methods, args.data_dir, args.loads)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            changes = compare_to_baseline(report, json.load(f), args.threshold)
+        print_changes(changes)
+        # non-zero exit on a slowdown so CI can fail the build
+        return 1 if any(c['regression'] for c in changes) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+import numpy as np
+from src.domain.book import Book
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_batch import BookBatch
+from src.services.book_generator_service_V2 import generate_books_json
+from src.services.sketches import CountMinSketch, HyperLogLog, KllSketch
+
+# the columns the sketches read
+SKETCH_COLUMNS = ['genre', 'price_usd', 'author', 'publisher']
+# a stream is sketched this many books at a time, which bounds the memory used
+CHUNK_ROWS = 65_536
+
+@dataclass
+class CatalogSketches:
+    """Everything the approximate queries need, built in one pass."""
+    prices_by_genre: dict[str, KllSketch] = field(default_factory=dict)
+    authors: Optional[HyperLogLog] = None
+    publishers: Optional[HyperLogLog] = None
+    genres: Optional[CountMinSketch] = None
+    # the distinct genres, so the count-min can be asked about each (genres are few)
+    genre_names: dict[str, None] = field(default_factory=dict)
+
+class ApproximateAnalyticsService:
+    """Bounded-memory, approximate versions of the catalog analytics.
+
+    The error targets size the sketches: quantile_error is the rank error of
+    the medians, distinct_error the relative error of the distinct counts,
+    count_error (and count_delta) the overcount bound of the genre counts
+    as a fraction of the catalog size. Books are read once and can come from
+    a lazy stream such as BookService.iter_books(), CHUNK_ROWS at a time.
+
+    Sketching works on dictionary-encoded columns: each distinct author,
+    publisher and genre is hashed once, and the per-genre counts come from a
+    bincount. A versioned BookBatch is sketched once and reused by every
+    method until its version changes.
+    """
+
+    def __init__(self, quantile_error: float = 0.01, distinct_error: float = 0.02,
+                 count_error: float = 0.001, count_delta: float = 0.01, seed: Optional[int] = 0):
+        self.quantile_error = quantile_error
+        self.distinct_error = distinct_error
+        self.count_error = count_error
+        self.count_delta = count_delta
+        self.seed = seed
+        self._version = None
+        self._sketches: Optional[CatalogSketches] = None
+
+    def sketch(self, books: Iterable[Book]) -> CatalogSketches:
+        if isinstance(books, BookBatch) and books.version is not None:
+            if books.version != self._version:
+                self._version, self._sketches = books.version, self._build([books])
+            return self._sketches
+        if isinstance(books, BookBatch):
+            return self._build([books])
+        return self._build(_chunks(books))
+
+    def _build(self, batches: Iterable[BookBatch]) -> CatalogSketches:
+        sketches = CatalogSketches(
+            authors=HyperLogLog.for_error(self.distinct_error),
+            publishers=HyperLogLog.for_error(self.distinct_error),
+            genres=CountMinSketch(self.count_error, self.count_delta),
+        )
+        for batch in batches:
+            self._add_batch(sketches, batch)
+        return sketches
+
+    def _add_batch(self, sketches: CatalogSketches, batch: BookBatch) -> None:
+        # the categories are the distinct values, so each is hashed once
+        sketches.authors.update_many(batch.categories('author'))
+        sketches.publishers.update_many(batch.categories('publisher'))
+
+        genres = batch.categories('genre')
+        codes = batch.codes('genre')
+        counts = np.bincount(codes[codes >= 0], minlength=len(genres))
+        present = np.flatnonzero(counts)
+        sketches.genres.add_counts([genres[code] for code in present], counts[present])
+        sketches.genre_names.update(dict.fromkeys(genres[code] for code in present))
+
+        # prices grouped by genre, each genre's prices kept in catalog order
+        prices = batch.column('price_usd')
+        priced = np.flatnonzero((codes >= 0) & ~np.isnan(prices))
+        order = priced[np.argsort(codes[priced], kind='stable')]
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        for run in np.split(order, bounds) if len(order) else []:
+            genre = genres[codes[run[0]]]
+            if genre not in sketches.prices_by_genre:
+                sketches.prices_by_genre[genre] = KllSketch.for_error(self.quantile_error, self.seed)
+            sketches.prices_by_genre[genre].update_many(prices[run].tolist())
+
+    def median_price_by_genre(self, books: Iterable[Book]) -> dict[str, float]:
+        return {genre: kll.quantile(0.5) for genre, kll in self.sketch(books).prices_by_genre.items()}
+
+    def distinct_authors(self, books: Iterable[Book]) -> int:
+        return round(self.sketch(books).authors.estimate())
+
+    def distinct_publishers(self, books: Iterable[Book]) -> int:
+        return round(self.sketch(books).publishers.estimate())
+
+    def genre_counts(self, books: Iterable[Book]) -> dict[str, int]:
+        sketches = self.sketch(books)
+        return {genre: sketches.genres.estimate(genre) for genre in sketches.genre_names}
+
+def _chunks(books: Iterable[Book]) -> Iterator[BookBatch]:
+    books = iter(books)
+    while True:
+        chunk = list(islice(books, CHUNK_ROWS))
+        if not chunk:
+            return
+        yield BookBatch.from_books(chunk, columns=SKETCH_COLUMNS)
+
+def compare_with_exact(books: list[Book], service: Optional[ApproximateAnalyticsService] = None) -> dict:
+    """Run the approximate queries next to the exact ones and report the errors.
+
+    Median errors are rank errors: how far the approximate median's rank
+    within its genre is from 0.5. Timings are in seconds and cover all four
+    answers on each side.
+    """
+    service = service or ApproximateAnalyticsService()
+
+    started = time.perf_counter()
+    sketches = service.sketch(books)
+    approx_medians = {genre: kll.quantile(0.5) for genre, kll in sketches.prices_by_genre.items()}
+    approx_authors, approx_publishers = sketches.authors.estimate(), sketches.publishers.estimate()
+    approx_genres = {genre: sketches.genres.estimate(genre) for genre in sketches.genre_names}
+    approx_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    exact_medians = BookAnalyticsService().median_price_by_genre(books)
+    exact_authors = len({b.author for b in books if b.author is not None})
+    exact_publishers = len({b.publisher for b in books if b.publisher is not None})
+    exact_genres: dict[str, int] = {}
+    for b in books:
+        if b.genre is not None:
+            exact_genres[b.genre] = exact_genres.get(b.genre, 0) + 1
+    exact_seconds = time.perf_counter() - started
+
+    prices_by_genre: dict[str, list] = {}
+    for b in books:
+        if b.genre is not None and isinstance(b.price_usd, (int, float)):
+            prices_by_genre.setdefault(b.genre, []).append(b.price_usd)
+    rank_errors = {}
+    for genre, median in approx_medians.items():
+        prices = np.sort(prices_by_genre[genre])
+        rank = np.searchsorted(prices, median, 'left') / len(prices)
+        rank_errors[genre] = abs(rank - 0.5)
+
+    def distinct(exact, approx):
+        return {'exact': exact, 'approx': round(approx), 'relative_error': abs(approx - exact) / exact if exact else 0.0}
+
+    return {
+        'rows': len(books),
+        'median_price_by_genre': {
+            'exact': exact_medians,
+            'approx': approx_medians,
+            'max_rank_error': max(rank_errors.values(), default=0.0),
+        },
+        'distinct_authors': distinct(exact_authors, approx_authors),
+        'distinct_publishers': distinct(exact_publishers, approx_publishers),
+        'genre_counts': {
+            'max_overcount': max((approx_genres[g] - n for g, n in exact_genres.items()), default=0),
+            'bound': service.count_error * len(books),
+        },
+        'seconds': {'approx': approx_seconds, 'exact': exact_seconds},
+    }
+
+def print_comparison(report: dict) -> None:
+    medians = report['median_price_by_genre']
+    print(f"rows: {report['rows']}")
+    print(f"{'genre':<16}{'exact median':>14}{'approx median':>15}")
+    for genre, exact in medians['exact'].items():
+        print(f"{genre:<16}{exact:>14.2f}{medians['approx'][genre]:>15.2f}")
+    print(f"max median rank error: {medians['max_rank_error']:.4f}")
+    for name in ('distinct_authors', 'distinct_publishers'):
+        row = report[name]
+        print(f"{name}: exact {row['exact']}, approx {row['approx']} ({100 * row['relative_error']:.2f}% off)")
+    counts = report['genre_counts']
+    print(f"genre counts: max overcount {counts['max_overcount']} (bound {counts['bound']:.0f})")
+    seconds = report['seconds']
+    print(f"seconds: approx {seconds['approx']:.3f}, exact {seconds['exact']:.3f}")
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'books.json')
+        generate_books_json(path, count=100_000, seed=0)
+        with open(path, 'r', encoding='utf-8') as f:
+            catalog = [Book.from_dict(item) for item in json.load(f)]
+    print_comparison(compare_with_exact(catalog))
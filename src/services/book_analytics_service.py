@@ -1,6 +1,10 @@
+import math
+from typing import Iterable, Optional, Sequence
 import numpy as np
-import pandas as pd
 from src.domain.book import Book
+from src.services.book_batch import BookBatch
+from src.services.genre_year_table import GenreYearTable
+from src.services.top_k import top_k_indices, top_k_stream
 
 # Ground rules for numpy (applies to pandas too):
 # 1. keep numpy in the service layer ONLY
@@ -8,78 +12,149 @@ from src.domain.book import Book
 # 2. notice how methods take in books, and return normal datatypes NOT ndarrays
 #   - this service and numpy are ISOLATED, this will keep our functions PURE and tests CLEAN
 
+# 3. every method also takes a BookBatch (e.g. the memory-mapped sidecar from BookColumnStore)
+#   - then the arrays are used as they are and Books are only built for the rows we return
+# 4. the typed frame is cached per dataset version and shared by every method
+#   - a BookBatch brings its own version; a plain list has none and is never cached,
+#     each call reads only the columns it needs from it
+
+# the columns the analytics read, plus the derived value_score
+FRAME_COLUMNS = ('genre', 'publication_year', 'average_rating', 'ratings_count', 'price_usd')
+VALUE_SCORE_COLUMNS = ('average_rating', 'ratings_count', 'price_usd')
+
 class BookAnalyticsService:
 
+    def __init__(self):
+        self._version = None
+        self._batch = None
+        self._frame_cache = None
+        self._genre_year_table = None
+
+    def invalidate(self) -> None:
+        """Drop the cached frame, the next call rebuilds it."""
+        self._version = None
+        self._batch = None
+        self._frame_cache = None
+        self._genre_year_table = None
+
+    def dataset_version(self, books) -> Optional[tuple]:
+        """Cache key for a BookBatch; None for plain lists, which are not cached."""
+        if isinstance(books, BookBatch):
+            # batches without a version are only trusted as the same object
+            return ('batch', books.version) if books.version is not None else ('object', id(books))
+        return None
+
+    def _prepare(self, books, columns: Sequence[str] = FRAME_COLUMNS):
+        """Return (books, batch, frame) for this dataset.
+
+        A BookBatch gets the full frame, rebuilt only on a new version. A
+        plain list (iterators are materialised into one) carries no version
+        and fingerprinting it would cost as much as reading it, so every call
+        builds just `columns`; the Books handed back are the caller's own.
+        """
+        if not isinstance(books, (BookBatch, list, tuple)):
+            books = list(books)
+        version = self.dataset_version(books)
+        if version is None:
+            batch = BookBatch.from_books(books, columns=columns)
+            return books, batch, _frame(batch, columns)
+        if version != self._version:
+            self._version, self._batch, self._frame_cache = version, books, _frame(books, FRAME_COLUMNS)
+            self._genre_year_table = None
+        return books, self._batch, self._frame_cache
+
+    def _rows(self, books, positions) -> list:
+        # lists give back the caller's own Book objects, batches build them on demand
+        if isinstance(books, BookBatch):
+            return [books.book(int(i)) for i in positions]
+        return [books[int(i)] for i in positions]
+
+    def _book_ids(self, books) -> list:
+        # a list already holds its ids, only a batch has to decode the column
+        if isinstance(books, BookBatch):
+            return books.column('book_id').tolist()
+        return [b.book_id for b in books]
+
     def average_price(self, books: list[Book]) -> float:
-        prices = np.array([b.price_usd for b in books], dtype=float)
-        return float(prices.mean())
+        # missing prices are skipped rather than turning the mean into NaN
+        _, _, frame = self._prepare(books, ['price_usd'])
+        return float(frame['price_usd'].mean())
 
     def top_rated(self, books: list[Book], min_ratings: int = 1000, limit: int = 10):
-        ratings = np.array([b.average_rating for b in books])
-        counts = np.array([b.ratings_count for b in books])
-        
+        books, batch, _ = self._prepare(books, ['average_rating', 'ratings_count'])
+        ratings = batch.column('average_rating')
+        counts = batch.column('ratings_count')
+
         # what we have now:
         # books -> books objects
         # ratings -> numbers for ALL books
         # counts -> numbers for ALL books
         # filtered books contains all books that have at least 1000 ratings
         mask = counts >= min_ratings
-        filteredBooks = np.array(books)[mask]
         # now scores is only the ratings for the filtered books. i.e. over 1000 ratings
         scores = ratings[mask]
-        sorted_idx = np.argsort(scores)[::-1]
-        return filteredBooks[sorted_idx].tolist()[:limit]
+        # partial selection of the top `limit`, ties keep catalog order
+        top_idx = top_k_indices(scores, limit)
+        # only the rows that make the cut are looked up (or built, for batches)
+        return self._rows(books, np.flatnonzero(mask)[top_idx])
 
     # value score = rating * log(ratings_count) / price
     def value_scores(self, books: list[Book]) -> dict[str, float]:
-        ratings = np.array([b.average_rating for b in books])
-        counts = np.array([b.ratings_count for b in books])
-        prices = np.array([b.price_usd for b in books])
-
-        scores = (ratings * np.log1p(counts)) / prices
+        books, _, frame = self._prepare(books, VALUE_SCORE_COLUMNS)
+        scores = frame['value_score'].to_numpy()
 
-        return {
+        return dict(zip(self._book_ids(books), scores.tolist()))
 
-            book.book_id: float(score)
-            for book, score in zip(books, scores)
-        }
-    
     def top_rated_with_pandas(self, books: list, min_ratings: int = 1000, limit: int = 10) -> list:
-        df = pd.DataFrame([{
-            'book': b,
-            'avg': b.average_rating,
-            'count': b.ratings_count
-        } for b in books])
-        filtered = df[df['count'] >= min_ratings].sort_values('avg', ascending=False)
-        return filtered['book'].tolist()[:limit]
+        books, _, df = self._prepare(books, ['average_rating', 'ratings_count'])
+        filtered = df[df['ratings_count'] >= min_ratings].nlargest(limit, 'average_rating', keep='first')
+        return self._rows(books, filtered.index)
 
     def value_scores_with_pandas(self, books: list, limit: int = 10) -> dict[str, float]:
-        df = pd.DataFrame([{
-            'book_id': b.book_id,
-            'avg': b.average_rating,
-            'count': b.ratings_count,
-            'price': b.price_usd
-        } for b in books])
-        df['score'] = df['avg'] * np.log1p(df['count']) / df['price']
-
-
-        return (
-            df
-            .sort_values('score', ascending=False)
-            .head(limit)
-            .set_index('book_id')['score']
-            .astype(float).to_dict()
-        ) 
+        books, _, df = self._prepare(books, VALUE_SCORE_COLUMNS)
+        top = df['value_score'].nlargest(limit, keep='first')
+
+        return dict(zip((b.book_id for b in self._rows(books, top.index)), top.astype(float).tolist()))
 
     def median_price_by_genre(self, books: list[Book]) -> dict[str, float]:
-        by_genre = pd.DataFrame(books).groupby('genre')['price_usd'].median().to_dict()
+        _, _, df = self._prepare(books, ['genre', 'price_usd'])
+        by_genre = df.groupby('genre', observed=True)['price_usd'].median().to_dict()
         return by_genre
 
+    def genre_year_table(self, books: list[Book]) -> GenreYearTable:
+        """Year x genre counts for this dataset, built once per version like the frame."""
+        _, batch, _ = self._prepare(books, ['genre', 'publication_year'])
+        if batch is not self._batch:
+            # a plain list, nothing is cached for it
+            return GenreYearTable.from_batch(batch)
+        if self._genre_year_table is None:
+            self._genre_year_table = GenreYearTable.from_batch(batch)
+        return self._genre_year_table
+
     def most_popular_genre(self, books: list[Book], year: int) -> str:
-        df = pd.DataFrame(books) # convert to dataframe
-        df = df[df['publication_year'] == year] # filter
-        df = df.groupby('genre').size().sort_values() # group by genre and count
-        
-        return df.index[0]
+        # a row lookup in the cached table; ties go to the genre seen first in the catalog
+        return self.genre_year_table(books).most_popular(year)
+
+    def top_rated_streaming(self, books: Iterable[Book], min_ratings: int = 1000, limit: int = 10) -> list[Book]:
+        """top_rated over a lazy stream (e.g. BookService.iter_books()) in O(limit) memory."""
+        eligible = (b for b in books if b.ratings_count is not None and b.ratings_count >= min_ratings)
+        return top_k_stream(eligible, lambda b: b.average_rating, limit)
+
+    def value_scores_streaming(self, books: Iterable[Book], limit: int = 10) -> dict[str, float]:
+        """value_scores_with_pandas over a lazy stream in O(limit) memory.
+
+        Books missing a rating, count or non-zero price are skipped.
+        """
+        def score(b):
+            if b.average_rating is None or b.ratings_count is None or not b.price_usd:
+                return None
+            return b.average_rating * math.log1p(b.ratings_count) / b.price_usd
+
+        scored = ((b.book_id, score(b)) for b in books)
+        return {book_id: float(value) for book_id, value in top_k_stream(scored, lambda pair: pair[1], limit)}
 
-        
+def _frame(batch: BookBatch, columns: Sequence[str]):
+    frame = batch.to_frame(columns)
+    if all(name in columns for name in VALUE_SCORE_COLUMNS):
+        frame['value_score'] = frame['average_rating'] * np.log1p(frame['ratings_count']) / frame['price_usd']
+    return frame
@@ -0,0 +1,202 @@
+import math
+from operator import attrgetter
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from src.domain.book import Book
+from src.domain.numbers import to_float
+
+# numeric columns are float64 with NaN standing in for None (or anything that isn't a number)
+NUMERIC_COLUMNS = ['publication_year', 'page_count', 'average_rating', 'ratings_count', 'price_usd', 'sales_millions']
+INTEGER_COLUMNS = ['publication_year', 'page_count', 'ratings_count']
+# booleans are int8: 1 / 0, and -1 for None
+BOOLEAN_COLUMNS = ['in_print', 'available']
+# everything else is dictionary encoded: int32 codes (-1 for None) plus the distinct values
+CATEGORICAL_COLUMNS = ['book_id', 'title', 'author', 'genre', 'publisher', 'language', 'format', 'last_checkout', 'publisher_email']
+ALL_COLUMNS = NUMERIC_COLUMNS + BOOLEAN_COLUMNS + CATEGORICAL_COLUMNS
+
+class BookBatch:
+    """Struct-of-arrays view of a catalog: one typed NumPy array per Book field.
+
+    Built in a single pass over books or raw records (or opened from the
+    memory-mapped sidecar, see BookColumnStore). Analytics read whole
+    columns, to_frame() hands the arrays to pandas, and a Book is only
+    built when a caller asks for a row.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray], categories: dict[str, Union[list, Callable[[], Sequence]]], version=None):
+        self._arrays = arrays
+        # a category list may be given as a loader, called the first time the column is decoded
+        self._category_sources = dict(categories)
+        self._categories: dict[str, np.ndarray] = {}
+        self._length = len(next(iter(arrays.values()))) if arrays else 0
+        # whatever the source uses to tell catalog states apart, None if unknown
+        self.version = version
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict], version=None, columns: Optional[Sequence[str]] = None) -> 'BookBatch':
+        """Build a batch from dicts shaped like Book.to_dict(), in one pass."""
+        return cls._build(records, dict.get, version, columns or ALL_COLUMNS)
+
+    @classmethod
+    def from_books(cls, books: Iterable[Book], version=None, columns: Optional[Sequence[str]] = None) -> 'BookBatch':
+        """Build a batch from Book objects without to_dict().
+
+        With `columns` only those fields are read and only those arrays
+        exist on the batch. A list is read a column at a time, which lets
+        numeric columns go through one np.array call; any other iterable
+        is consumed in a single pass.
+        """
+        if isinstance(books, (list, tuple)):
+            return cls._build_columns(books, version, columns or ALL_COLUMNS)
+        return cls._build(books, getattr, version, columns or ALL_COLUMNS)
+
+    @classmethod
+    def _build(cls, rows: Iterable, get, version, columns: Sequence[str]) -> 'BookBatch':
+        numeric = {name: [] for name in NUMERIC_COLUMNS if name in columns}
+        boolean = {name: [] for name in BOOLEAN_COLUMNS if name in columns}
+        codes = {name: [] for name in CATEGORICAL_COLUMNS if name in columns}
+        lookups = {name: {} for name in codes}
+
+        for row in rows:
+            for name, values in numeric.items():
+                values.append(to_float(get(row, name)))
+            for name, values in boolean.items():
+                value = get(row, name)
+                values.append(int(value) if isinstance(value, bool) else -1)
+            for name, values in codes.items():
+                value = get(row, name)
+                if value is None:
+                    values.append(-1)
+                else:
+                    lookup = lookups[name]
+                    values.append(lookup.setdefault(value, len(lookup)))
+
+        arrays = {}
+        for name, values in numeric.items():
+            arrays[name] = np.array(values, dtype=np.float64)
+        for name, values in boolean.items():
+            arrays[name] = np.array(values, dtype=np.int8)
+        for name, values in codes.items():
+            arrays[name] = np.array(values, dtype=np.int32)
+        categories = {name: list(lookup) for name, lookup in lookups.items()}
+        return cls(arrays, categories, version)
+
+    @classmethod
+    def _build_columns(cls, books: Sequence[Book], version, columns: Sequence[str]) -> 'BookBatch':
+        arrays, categories = {}, {}
+        for name in columns:
+            values = list(map(attrgetter(name), books))
+            if name in NUMERIC_COLUMNS:
+                arrays[name] = _float_array(values)
+            elif name in BOOLEAN_COLUMNS:
+                arrays[name] = np.array([int(v) if isinstance(v, bool) else -1 for v in values], dtype=np.int8)
+            else:
+                arrays[name], categories[name] = _factorize(values)
+        return cls(arrays, categories, version)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, i: int) -> Book:
+        return self.book(i)
+
+    def __iter__(self) -> Iterator[Book]:
+        for i in range(self._length):
+            yield self.book(i)
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        """The raw typed arrays (numeric, int8 booleans, int32 codes), not copied."""
+        return self._arrays
+
+    def column(self, name: str) -> np.ndarray:
+        """Numeric columns come back as-is (zero-copy), others are decoded."""
+        if name in NUMERIC_COLUMNS:
+            return self._arrays[name]
+        raw = self._arrays[name]
+        decoded = np.full(len(raw), None, dtype=object)
+        present = raw >= 0
+        if name in BOOLEAN_COLUMNS:
+            decoded[present] = raw[present] == 1
+        else:
+            decoded[present] = self._category_values(name)[raw[present]]
+        return decoded
+
+    def codes(self, name: str) -> np.ndarray:
+        return self._arrays[name]
+
+    def categories(self, name: str) -> list:
+        return self._category_values(name).tolist()
+
+    def _category_values(self, name: str) -> np.ndarray:
+        values = self._categories.get(name)
+        if values is None:
+            source = self._category_sources[name]
+            values = self._categories[name] = np.array(source() if callable(source) else source, dtype=object)
+        return values
+
+    def book(self, i: int) -> Book:
+        """Build the Book for row i, only when a caller actually needs one.
+
+        Fields the batch was built without come back as None.
+        """
+        data = dict.fromkeys(ALL_COLUMNS)
+        for name in NUMERIC_COLUMNS:
+            if name not in self._arrays:
+                continue
+            value = float(self._arrays[name][i])
+            if math.isnan(value):
+                data[name] = None
+            elif name in INTEGER_COLUMNS:
+                data[name] = int(value)
+            else:
+                data[name] = value
+        for name in BOOLEAN_COLUMNS:
+            if name not in self._arrays:
+                continue
+            value = int(self._arrays[name][i])
+            data[name] = None if value == -1 else bool(value)
+        for name in CATEGORICAL_COLUMNS:
+            if name not in self._arrays:
+                continue
+            code = int(self._arrays[name][i])
+            data[name] = None if code == -1 else self._category_values(name)[code]
+        return Book.from_dict(data)
+
+    def to_frame(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """DataFrame over the batch; numeric columns share memory with the arrays.
+
+        Booleans become nullable "boolean" columns and text columns become
+        pandas Categoricals built from the existing codes, so nothing is
+        decoded back to Python objects.
+        """
+        data = {}
+        for name in columns or [n for n in ALL_COLUMNS if n in self._arrays]:
+            raw = self._arrays[name]
+            if name in NUMERIC_COLUMNS:
+                data[name] = raw
+            elif name in BOOLEAN_COLUMNS:
+                data[name] = pd.arrays.BooleanArray(raw == 1, raw == -1)
+            else:
+                data[name] = pd.Categorical.from_codes(raw, categories=pd.Index(self._category_values(name), dtype=object))
+        return pd.DataFrame(data, copy=False)
+
+def _factorize(values: list) -> tuple[np.ndarray, list]:
+    # first-seen codes with -1 for None, like the per-row lookup in _build but hashed in C
+    boxed = np.empty(len(values), dtype=object)
+    boxed[:] = values
+    codes, uniques = pd.factorize(boxed)
+    return codes.astype(np.int32), uniques.tolist()
+
+def _float_array(values: list) -> np.ndarray:
+    # np.array already turns None into NaN; bools and junk strings take the per-value path
+    if bool not in set(map(type, values)):
+        try:
+            array = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+        else:
+            # to_float drops infinities, so the fast path does too
+            array[np.isinf(array)] = np.nan
+            return array
+    return np.array([to_float(v) for v in values], dtype=np.float64)
@@ -0,0 +1,120 @@
+import json
+import os
+from typing import Optional
+import numpy as np
+from src.repositories.atomic_file import atomic_write_json
+from src.repositories.json_stream import iter_json_records
+from src.services.book_batch import ALL_COLUMNS, CATEGORICAL_COLUMNS, BookBatch
+
+MANIFEST = 'manifest.json'
+
+class BookColumnStore:
+    """Keeps a columnar sidecar (`<catalog>.columns/`) next to a JSON catalog.
+
+    The manifest records the catalog's (mtime_ns, size, inode) it was built
+    from. load() compares that with the current file and rebuilds the
+    sidecar whenever the catalog changed, whoever wrote it. Category lists
+    live in their own memory-mapped .npy files and are only decoded when a
+    column is, so the manifest stays a few hundred bytes whatever the
+    catalog size. The opened batch is reused until the source key changes.
+    """
+
+    def __init__(self, filepath: str="books.json", sidecar_dir: Optional[str]=None):
+        self.filepath = filepath
+        self.sidecar_dir = sidecar_dir or f"{filepath}.columns"
+        self._loaded: Optional[BookBatch] = None
+
+    def _source_key(self) -> list:
+        stat = os.stat(self.filepath)
+        return [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+
+    def _read_manifest(self) -> Optional[dict]:
+        path = os.path.join(self.sidecar_dir, MANIFEST)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self) -> BookBatch:
+        """Open the sidecar as a BookBatch whose arrays are read-only memmaps."""
+        source = self._source_key()
+        if self._loaded is not None and self._loaded.version == tuple(source):
+            return self._loaded
+        manifest = self._read_manifest()
+        if manifest is None or manifest['source'] != source:
+            manifest = self.refresh()
+        arrays = {
+            name: np.load(os.path.join(self.sidecar_dir, f"{name}.npy"), mmap_mode='r')
+            for name in ALL_COLUMNS
+        }
+        categories = {name: self._category_loader(name, manifest) for name in CATEGORICAL_COLUMNS}
+        self._loaded = BookBatch(arrays, categories, version=tuple(manifest['source']))
+        return self._loaded
+
+    def _category_loader(self, name: str, manifest: dict):
+        kind = manifest['category_kinds'][name]
+        if kind == 'inline':
+            return manifest['inline_categories'][name]
+        # mapped now, decoded later: a rebuild in between can't swap the files under the codes
+        values = np.load(os.path.join(self.sidecar_dir, f"{name}.categories.npy"), mmap_mode='r')
+        if kind == 'int':
+            return values.tolist
+        offsets = np.load(os.path.join(self.sidecar_dir, f"{name}.offsets.npy"), mmap_mode='r')
+        return lambda: _decode_strings(values, offsets)
+
+    def _save_array(self, filename: str, values: np.ndarray) -> None:
+        # write a new file and rename it in: truncating a file that an older
+        # BookColumns still has memory-mapped would crash that reader
+        path = os.path.join(self.sidecar_dir, filename)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, values)
+        os.replace(tmp_path, path)
+
+    def refresh(self) -> dict:
+        """Rebuild every column file from the catalog in one streaming pass."""
+        source = self._source_key()
+        with open(self.filepath, 'r', encoding='utf-8') as f:
+            batch = BookBatch.from_records(iter_json_records(f))
+
+        os.makedirs(self.sidecar_dir, exist_ok=True)
+        for name, values in batch.arrays().items():
+            self._save_array(f"{name}.npy", values)
+        category_kinds, inline_categories = {}, {}
+        for name in CATEGORICAL_COLUMNS:
+            values = batch.categories(name)
+            kinds = set(map(type, values))
+            if kinds <= {str}:
+                category_kinds[name] = 'str'
+                blob, offsets = _encode_strings(values)
+                self._save_array(f"{name}.categories.npy", blob)
+                self._save_array(f"{name}.offsets.npy", offsets)
+            elif kinds == {int}:
+                category_kinds[name] = 'int'
+                self._save_array(f"{name}.categories.npy", np.array(values, dtype=np.int64))
+            else:
+                # the rare column mixing value types (e.g. int and str genres) stays in the manifest
+                category_kinds[name] = 'inline'
+                inline_categories[name] = values
+
+        # the manifest goes last: until it is replaced the old source key makes load() rebuild
+        manifest = {
+            'source': source,
+            'length': len(batch),
+            'category_kinds': category_kinds,
+            'inline_categories': inline_categories,
+        }
+        atomic_write_json(os.path.join(self.sidecar_dir, MANIFEST), manifest, indent=None)
+        return manifest
+
+def _encode_strings(values: list) -> tuple[np.ndarray, np.ndarray]:
+    # one UTF-8 blob plus byte offsets: no padding to the longest string, no pickle on load
+    encoded = [v.encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+def _decode_strings(blob: np.ndarray, offsets: np.ndarray) -> list[str]:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[start:end].decode('utf-8') for start, end in zip(bounds, bounds[1:])]
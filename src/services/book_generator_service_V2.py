@@ -77,7 +77,8 @@ def generate_books_json(filename="books.json", count=500, seed=None):
     )
 
     books = []
-    now = datetime.now()
+    # with a seed, ids and dates come from it as well, so the same seed gives the same file
+    now = datetime.now() if seed is None else datetime(2025, 1, 1)
     six_months_ago = now - timedelta(days=182)
 
     for i in range(1, count + 1):
@@ -118,7 +119,7 @@ def generate_books_json(filename="books.json", count=500, seed=None):
         # rating_adj already computed above for sales calculation
         books.append(
             {
-                "book_id": str(uuid.uuid4()),
+                "book_id": str(uuid.uuid4() if seed is None else uuid.UUID(int=random.getrandbits(128), version=4)),
                 "title": f"Book Title {i}",
                 "author": f"Author {rng.integers(1, 80)}",
                 "genre": genre_choice,
@@ -0,0 +1,235 @@
+from dataclasses import dataclass, replace
+from typing import Iterable, Optional, Union
+import numpy as np
+from src.repositories.book_predicates import Predicate, parse_filters
+from src.services.book_batch import BOOLEAN_COLUMNS, INTEGER_COLUMNS, NUMERIC_COLUMNS, BookBatch
+from src.services.top_k import top_k_indices
+
+AGGREGATES = ('count', 'sum', 'mean', 'median', 'min', 'max')
+
+@dataclass(frozen=True)
+class BookQuery:
+    """A small declarative query over the catalog: filter -> group_by -> agg -> order_by -> limit.
+
+    Filters are keyword lookups (`genre='Fantasy'`, `publication_year__between=(2000, 2010)`,
+    `average_rating__ge=4.0`, see book_predicates.OPERATORS). They compile to
+    NumPy boolean masks over a BookBatch, or to a WHERE clause when
+    BookService.query runs against a backend that filters natively.
+
+    Without agg() the query selects Books, with it every group becomes a
+    dict of its keys and aggregates. For example, the most popular genre:
+
+        BookQuery().filter(publication_year=2020).group_by('genre') \\
+            .agg(books='count').order_by('-books').limit(1)
+
+    Every builder method returns a new query, so partial queries can be reused.
+    """
+    predicates: tuple = ()
+    keys: tuple = ()
+    aggregates: tuple = ()
+    ordering: tuple = ()
+    row_limit: Optional[int] = None
+
+    def filter(self, **filters) -> 'BookQuery':
+        return replace(self, predicates=self.predicates + tuple(parse_filters(**filters)))
+
+    def group_by(self, *fields: str) -> 'BookQuery':
+        return replace(self, keys=self.keys + fields)
+
+    def agg(self, **aggregates: Union[str, tuple[str, str]]) -> 'BookQuery':
+        """name='count' counts rows, name=(column, func) reduces a column with one of AGGREGATES."""
+        specs = []
+        for name, spec in aggregates.items():
+            column, func = (None, spec) if isinstance(spec, str) else spec
+            if func not in AGGREGATES:
+                raise ValueError(f"Unknown aggregate: {func}")
+            if func != 'count' and column not in NUMERIC_COLUMNS:
+                raise ValueError(f"{func} needs a numeric column, got {column}")
+            specs.append((name, column, func))
+        return replace(self, aggregates=self.aggregates + tuple(specs))
+
+    def order_by(self, *fields: str) -> 'BookQuery':
+        """Sort keys, '-field' for descending. Missing values always sort last, ties keep catalog order."""
+        return replace(self, ordering=self.ordering + fields)
+
+    def limit(self, n: int) -> 'BookQuery':
+        return replace(self, row_limit=n)
+
+    def fields(self) -> Optional[list[str]]:
+        """Every column the query reads, None when it returns whole Books."""
+        if not self.aggregates:
+            return None
+        columns = [*(p.field for p in self.predicates), *self.keys, *(column for _, column, _ in self.aggregates if column)]
+        return list(dict.fromkeys(columns))
+
+    def run(self, books) -> list:
+        """Run over a BookBatch or a list (or any iterable) of Books."""
+        if not isinstance(books, (BookBatch, list, tuple)):
+            books = list(books)
+        batch = books if isinstance(books, BookBatch) else BookBatch.from_books(books)
+        mask = compile_mask(self.predicates, batch)
+        if self.aggregates:
+            return self._aggregate(batch, mask)
+        positions = self._ordered(batch, np.flatnonzero(mask))
+        if isinstance(books, BookBatch):
+            return [books.book(int(i)) for i in positions]
+        return [books[int(i)] for i in positions]
+
+    def _ordered(self, batch: BookBatch, positions: np.ndarray) -> np.ndarray:
+        limit = self.row_limit
+        if len(self.ordering) == 1 and limit is not None and self.ordering[0].lstrip('-') in NUMERIC_COLUMNS:
+            # one numeric key with a limit: partial selection instead of a full sort
+            field = self.ordering[0].lstrip('-')
+            values = batch.column(field)[positions]
+            signed = values if self.ordering[0].startswith('-') else -values
+            chosen = positions[top_k_indices(signed, limit)]
+            if len(chosen) < limit:
+                chosen = np.concatenate([chosen, positions[np.isnan(values)][:limit - len(chosen)]])
+            return chosen
+
+        if self.ordering:
+            # lexsort takes the most significant key last: per field a missing flag, then the value
+            sort_keys = [positions]
+            for key in reversed(self.ordering):
+                values, missing = _sort_values(batch, key.lstrip('-'))
+                values, missing = values[positions], missing[positions]
+                sort_keys.append(-values if key.startswith('-') else values)
+                sort_keys.append(missing)
+            positions = positions[np.lexsort(sort_keys)]
+        return positions if limit is None else positions[:limit]
+
+    def _aggregate(self, batch: BookBatch, mask: np.ndarray) -> list[dict]:
+        rows = np.flatnonzero(mask)
+        key_arrays = [_key_values(batch, field)[rows] for field in self.keys]
+        if key_arrays:
+            stacked = np.column_stack(key_arrays)
+            # groups with a missing key are dropped, like pandas groupby
+            present = ~np.isnan(stacked).any(axis=1)
+            rows, stacked = rows[present], stacked[present]
+            group_keys, groups = np.unique(stacked, axis=0, return_inverse=True)
+            groups = groups.reshape(-1)
+        else:
+            group_keys, groups = np.empty((1, 0)), np.zeros(len(rows), dtype=np.intp)
+        n_groups = len(group_keys)
+
+        decoders = {field: _key_decoder(batch, field) for field in self.keys}
+        results = [
+            {field: decoders[field](value) for field, value in zip(self.keys, key)}
+            for key in group_keys
+        ]
+        for name, column, func in self.aggregates:
+            values = _reduce(batch, rows, groups, n_groups, column, func)
+            for result, value in zip(results, values):
+                result[name] = value
+
+        for key in reversed(self.ordering):
+            name = key.lstrip('-')
+            # missing last in both directions: sort the present ones, then append the rest
+            present = [r for r in results if r[name] is not None and r[name] == r[name]]
+            missing = [r for r in results if not (r[name] is not None and r[name] == r[name])]
+            results = sorted(present, key=lambda r, name=name: r[name], reverse=key.startswith('-')) + missing
+        return results if self.row_limit is None else results[:self.row_limit]
+
+def compile_mask(predicates: Iterable[Predicate], batch: BookBatch) -> np.ndarray:
+    """AND every predicate into one boolean mask over the batch."""
+    mask = np.ones(len(batch), dtype=bool)
+    for predicate in predicates:
+        mask &= _predicate_mask(predicate, batch)
+    return mask
+
+def _predicate_mask(p: Predicate, batch: BookBatch) -> np.ndarray:
+    if p.field not in NUMERIC_COLUMNS:
+        # booleans and text are dictionary encoded: test each distinct value once, then look the codes up
+        codes = batch.codes(p.field)
+        distinct = [True, False] if p.field in BOOLEAN_COLUMNS else batch.categories(p.field)
+        if p.field in BOOLEAN_COLUMNS:
+            # int8 1/0 become positions 0/1 of `distinct`, -1 (None) is handled below
+            codes = np.where(codes == 1, 0, np.where(codes == 0, 1, -1))
+        table = np.array([p.test(value) for value in distinct] + [p.test(None)], dtype=bool)
+        # code -1 (None) picks the last entry
+        return table[codes]
+
+    column = batch.column(p.field)
+    present = ~np.isnan(column)
+    if p.op == 'isnull':
+        return ~present if p.value else present
+    with np.errstate(invalid='ignore'):
+        if p.op == 'between':
+            low, high = p.value
+            return (column >= low) & (column <= high)
+        if p.op == 'in':
+            return np.isin(column, np.array(p.value, dtype=float))
+        return {
+            'eq': np.equal, 'ne': np.not_equal, 'lt': np.less,
+            'le': np.less_equal, 'gt': np.greater, 'ge': np.greater_equal,
+        }[p.op](column, p.value) & present
+
+def _key_values(batch: BookBatch, field: str) -> np.ndarray:
+    # float keys so numeric and coded columns stack together, NaN marks missing
+    if field in NUMERIC_COLUMNS:
+        return batch.column(field)
+    codes = batch.codes(field).astype(np.float64)
+    codes[codes < 0] = np.nan
+    return codes
+
+def _key_decoder(batch: BookBatch, field: str):
+    if field in INTEGER_COLUMNS:
+        return int
+    if field in NUMERIC_COLUMNS:
+        return float
+    if field in BOOLEAN_COLUMNS:
+        return lambda code: code == 1
+    categories = batch.categories(field)
+    return lambda code: categories[int(code)]
+
+def _sort_values(batch: BookBatch, field: str) -> tuple[np.ndarray, np.ndarray]:
+    if field in NUMERIC_COLUMNS:
+        values = batch.column(field)
+        missing = np.isnan(values)
+        return np.where(missing, 0.0, values), missing
+    codes = batch.codes(field)
+    if field in BOOLEAN_COLUMNS:
+        return codes.astype(np.float64), codes < 0
+    # rank of each category in sorted order, so text sorts by value rather than first appearance
+    categories = batch.categories(field)
+    ranks = np.empty(len(categories) + 1, dtype=np.float64)
+    ranks[np.array(sorted(range(len(categories)), key=categories.__getitem__), dtype=np.intp)] = np.arange(len(categories))
+    ranks[-1] = 0.0
+    return ranks[codes], codes < 0
+
+def _reduce(batch: BookBatch, rows, groups, n_groups: int, column: Optional[str], func: str) -> list:
+    if column is None:
+        return np.bincount(groups, minlength=n_groups).tolist()
+    if column in NUMERIC_COLUMNS:
+        values = batch.column(column)[rows]
+        present = ~np.isnan(values)
+    else:
+        present = batch.codes(column)[rows] >= 0
+    groups = groups[present]
+    counts = np.bincount(groups, minlength=n_groups)
+    if func == 'count':
+        return counts.tolist()
+
+    values = values[present]
+    if func in ('sum', 'mean'):
+        sums = np.bincount(groups, weights=values, minlength=n_groups)
+        if func == 'sum':
+            return sums.tolist()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (sums / counts).tolist()
+
+    # order statistics: sort by (group, value), each group is then one contiguous run
+    order = np.lexsort((values, groups))
+    ordered = values[order]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    result = np.full(n_groups, np.nan)
+    has = counts > 0
+    if func == 'min':
+        result[has] = ordered[starts[has]]
+    elif func == 'max':
+        result[has] = ordered[starts[has] + counts[has] - 1]
+    else:
+        upper = ordered[starts[has] + counts[has] // 2]
+        lower = ordered[starts[has] + (counts[has] - 1) // 2]
+        result[has] = (lower + upper) / 2
+    return result.tolist()
@@ -1,23 +1,132 @@
+from typing import Iterable, Iterator, Optional
 from src.repositories.book_repository_protocol import BookRepositoryProtocol
 from src.domain.book import Book
+from src.repositories.json_stream import iter_json_records
+from src.services.book_batch import BookBatch
+from src.services.book_query import BookQuery
+from src.services.genre_year_table import GenreYearTable
 
 class BookService:
     def __init__(self, repo: BookRepositoryProtocol):
         self.repo = repo
+        self._batch = None
+        self._genre_year_table = None
+        self._genre_year_version = None
 
     def get_all_books(self) -> list[Book]:
         return self.repo.get_all_books()
 
+    def iter_books(self, fields: Optional[list[str]] = None) -> Iterator[Book]:
+        return self.repo.iter_books(fields)
+
+    def data_version(self):
+        return self.repo.data_version()
+
+    def get_book_batch(self) -> BookBatch:
+        """Columnar copy of the catalog, built in one streaming pass.
+
+        The batch is tagged with the repository's data_version and reused
+        until that changes.
+        """
+        version = self.repo.data_version()
+        if self._batch is None or self._batch.version != version:
+            self._batch = BookBatch.from_books(self.repo.iter_books(), version=version)
+        return self._batch
+
+    def get_genre_year_table(self) -> GenreYearTable:
+        """Year x genre counts, rebuilt only when someone else changed the catalog.
+
+        Writes made through this service update the table in place (see
+        _track_write), so it is built once per outside change rather than
+        once per add or remove.
+        """
+        version = self.repo.data_version()
+        if self._genre_year_table is None or self._genre_year_version != version:
+            self._genre_year_table = GenreYearTable.from_batch(self.get_book_batch(), track_ids=True)
+            self._genre_year_version = version
+        return self._genre_year_table
+
+    def _track_write(self, version_before, update) -> None:
+        # only a table that was current before the write can be patched, otherwise it rebuilds on next use
+        if self._genre_year_table is None or self._genre_year_version != version_before:
+            return
+        version_after = self.repo.data_version()
+        if version_after != version_before:
+            update(self._genre_year_table)
+            self._genre_year_version = version_after
+
+    def query(self, query: BookQuery) -> list:
+        """Run a BookQuery, pushing its filters down to backends that can use their indexes."""
+        if getattr(self.repo, 'filters_natively', False):
+            # only matching rows (and only the columns the query needs) leave the database
+            return query.run(list(self.repo.iter_books_where(query.predicates, fields=query.fields())))
+        return query.run(self.get_book_batch())
+
+    def get_price_aggregates(self):
+        """The repository's incrementally maintained GenrePriceAggregates, if it keeps one."""
+        return getattr(self.repo, 'price_aggregates', None)
+
     def add_book(self, book:Book) -> str:
-        return self.repo.add_book(book)
+        version = self.repo.data_version()
+        book_id = self.repo.add_book(book)
+        self._track_write(version, lambda table: table.add(book))
+        return book_id
     
+    def add_books(self, books:Iterable[Book]) -> list[str]:
+        books = list(books)
+        version = self.repo.data_version()
+        added = self.repo.add_books(books)
+
+        def update(table):
+            added_ids = set(added)
+            for book in books:
+                if book.book_id in added_ids:
+                    added_ids.discard(book.book_id)
+                    table.add(book)
+        self._track_write(version, update)
+        return added
+
+    def import_books(self, filepath:str) -> dict:
+        """Import a JSON array or NDJSON file of books in one repository write.
+
+        Records Book.from_dict rejects are reported back rather than aborting
+        the import, books whose book_id already exists are skipped.
+        """
+        books = []
+        invalid = []
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for i, item in enumerate(iter_json_records(f)):
+                try:
+                    books.append(Book.from_dict(item))
+                except TypeError as e:
+                    invalid.append(f"record {i + 1}: {e}")
+
+        added = self.add_books(books)
+        return {
+            'added': len(added),
+            'duplicates': len(books) - len(added),
+            'invalid': invalid,
+        }
+
     def remove_book(self, book_id : str) -> str:
-        return self.repo.remove_book(book_id)
+        version = self.repo.data_version()
+        result = self.repo.remove_book(book_id)
+        self._track_write(version, lambda table: table.remove(book_id))
+        return result
 
     def edit_book(self, book:Book, key:str) -> str:
-        return self.repo.edit_book(book,key)
+        version = self.repo.data_version()
+        result = self.repo.edit_book(book,key)
+        # edit_book sets the new value on `book` itself
+        self._track_write(version, lambda table: table.update(book))
+        return result
 
     def find_book_by_name(self, query:str) -> list[Book]:
         if not isinstance(query, str):
             raise TypeError('Expected str, got something else.')
         return self.repo.find_book_by_name(query)
+
+    def find_first_book_by_name(self, query:str) -> Optional[Book]:
+        if not isinstance(query, str):
+            raise TypeError('Expected str, got something else.')
+        return self.repo.find_first_book_by_name(query)
@@ -3,6 +3,7 @@ import matplotlib.pyplot as plt
 from typing import Optional
 from src.domain.book import Book
 from src.domain.checkout_history import CheckoutHistory
+from src.services.book_batch import BookBatch
 
 class BookVisualizationService:    
     def __init__(self):
@@ -11,19 +12,12 @@ class BookVisualizationService:
         self.figsize = (self.chart_width, self.chart_height)
     
     def _clean_data(self, books: list[Book]) -> pd.DataFrame:
-        book_dicts = [book.to_dict() for book in books]
-        df = pd.DataFrame(book_dicts)
+        # BookBatch already coerces numeric columns, anything that isn't a number becomes NaN
+        df = BookBatch.from_books(books).to_frame()
         
         # Replace missing genres with 'Unknown'
-        if 'genre' in df.columns:
-            df['genre'] = df['genre'].fillna('Unknown')
-            df['genre'] = df['genre'].replace(['nan', 'None'], 'Unknown')
-        
-        # Ensure numeric columns are proper numbers
-        numeric_columns = ['average_rating', 'ratings_count', 'price_usd', 'publication_year']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        df['genre'] = df['genre'].astype(object).fillna('Unknown')
+        df['genre'] = df['genre'].replace(['nan', 'None'], 'Unknown')
         
         return df
     
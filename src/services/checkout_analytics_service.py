@@ -0,0 +1,226 @@
+from datetime import datetime
+from typing import Iterable, Optional, Union
+import numpy as np
+import pandas as pd
+from src.domain.checkout_history import CheckoutHistory
+from src.services.book_batch import BookBatch
+from src.services.top_k import top_k_indices
+
+# ISO strings or datetimes in, lists and dicts out: callers never handle NumPy types
+TimeLike = Union[str, datetime]
+
+# loan length buckets in days, the last one is open ended
+DURATION_BINS = [0, 1, 7, 14, 21, 28, 60, 90]
+
+_DAY = np.timedelta64(1, 'D')
+
+class CheckoutAnalyticsService:
+    """Loan statistics over the checkout history, computed on NumPy arrays.
+
+    The history is parsed once into datetime64 columns (checked out, checked
+    in, NaT while open) sorted by checkout time, with book_ids dictionary
+    encoded like BookBatch does. Time windows are then searchsorted slices
+    and per-book or per-genre totals are bincounts. Open loans run until
+    `as_of` (default: now). Records whose checkout time can't be parsed are
+    left out and counted in `skipped`.
+
+    With the catalog (a BookBatch or Books), history book_ids are joined to
+    catalog rows through one dict lookup per distinct book, which is what
+    per-genre utilisation and the metadata in busiest_books use.
+    """
+
+    def __init__(self, history: Iterable[CheckoutHistory], books=None, as_of: Optional[TimeLike] = None):
+        records = list(history)
+        self.as_of = _to_datetime64(as_of if as_of is not None else datetime.now())
+
+        checked_out = _parse_times([r.checked_out_time for r in records])
+        checked_in = _parse_times([r.checked_in_time for r in records])
+        lookup: dict[str, int] = {}
+        codes = np.fromiter((lookup.setdefault(r.book_id, len(lookup)) for r in records), dtype=np.int32, count=len(records))
+
+        valid = ~np.isnat(checked_out)
+        self.skipped = int((~valid).sum())
+        # sorted by checkout time, so a time window is a contiguous slice
+        order = np.argsort(checked_out[valid], kind='stable')
+        self.book_ids = list(lookup)
+        self.book_codes = codes[valid][order]
+        self.checked_out = checked_out[valid][order]
+        self.checked_in = checked_in[valid][order]
+        self.is_open = np.isnat(self.checked_in)
+        # a loan still out is counted up to as_of
+        self.loan_end = np.where(self.is_open, self.as_of, self.checked_in)
+
+        self.batch = books if books is None or isinstance(books, BookBatch) else BookBatch.from_books(books)
+        self.catalog_rows = self._join_catalog()
+
+    def _join_catalog(self) -> np.ndarray:
+        """Catalog row for each distinct history book_id, -1 when the catalog doesn't have it."""
+        if self.batch is None:
+            return np.full(len(self.book_ids), -1, dtype=np.intp)
+        catalog_ids = self.batch.categories('book_id')
+        codes = self.batch.codes('book_id')
+        present = np.flatnonzero(codes >= 0)
+        row_of_code = np.full(len(catalog_ids), -1, dtype=np.intp)
+        row_of_code[codes[present]] = present
+        # the hash index: one dict lookup per distinct borrowed book, not per record
+        index = {book_id: code for code, book_id in enumerate(catalog_ids)}
+        history_codes = np.array([index.get(book_id, -1) for book_id in self.book_ids], dtype=np.intp)
+        return np.where(history_codes >= 0, row_of_code[history_codes], -1)
+
+    def __len__(self) -> int:
+        return len(self.checked_out)
+
+    # --- loan durations ---
+
+    def loan_durations(self, include_open: bool = False) -> list[float]:
+        """Length of each loan in days; open loans (measured up to as_of) only if asked for."""
+        return self._loan_days(include_open).tolist()
+
+    def _loan_days(self, include_open: bool = False) -> np.ndarray:
+        days = (self.loan_end - self.checked_out) / _DAY
+        return days if include_open else days[~self.is_open]
+
+    def loan_duration_summary(self) -> dict:
+        """Count, mean and percentiles of finished loans in days, plus how many are still out."""
+        days = self._loan_days()
+        summary = {'loans': len(days), 'open': int(self.is_open.sum())}
+        if len(days) == 0:
+            return summary
+        p50, p90, p99 = np.percentile(days, [50, 90, 99])
+        summary.update({
+            'mean_days': round(float(days.mean()), 2),
+            'median_days': round(float(p50), 2),
+            'p90_days': round(float(p90), 2),
+            'p99_days': round(float(p99), 2),
+            'max_days': round(float(days.max()), 2),
+        })
+        return summary
+
+    def loan_duration_histogram(self, bins: list = DURATION_BINS, include_open: bool = False) -> dict[str, int]:
+        """Loans per duration bucket, e.g. {'0-1d': 3, '1-7d': 10, ..., '90d+': 1}."""
+        days = self._loan_days(include_open)
+        edges = np.asarray(bins, dtype=float)
+        buckets = np.searchsorted(edges, days, side='right') - 1
+        counts = np.bincount(buckets[buckets >= 0], minlength=len(edges))
+        labels = [f"{lo:g}-{hi:g}d" for lo, hi in zip(bins, bins[1:])] + [f"{bins[-1]:g}d+"]
+        return dict(zip(labels, counts.tolist()))
+
+    # --- activity over time ---
+
+    def checkouts_per_day(self, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                          days: Optional[int] = None) -> dict[str, int]:
+        """{'YYYY-MM-DD': checkouts} for every day from start to end inclusive, days without checkouts included.
+
+        Without start and end the range spans the history. `days` instead of
+        start means the last that many days up to end (default: as_of).
+        """
+        checkout_days = self.checked_out.astype('datetime64[D]')
+        if days is not None and start is None:
+            last = _to_datetime64(end if end is not None else self.as_of).astype('datetime64[D]')
+            first = last - np.timedelta64(days - 1, 'D')
+        elif len(checkout_days) == 0 and (start is None or end is None):
+            return {}
+        else:
+            first = _to_datetime64(start).astype('datetime64[D]') if start is not None else checkout_days[0]
+            last = _to_datetime64(end).astype('datetime64[D]') if end is not None else checkout_days[-1]
+        span = max(int((last - first) / _DAY) + 1, 0)
+        offsets = ((checkout_days - first) / _DAY).astype(np.int64)
+        inside = (offsets >= 0) & (offsets < span)
+        counts = np.bincount(offsets[inside], minlength=span)
+        return dict(zip(np.arange(first, first + span, dtype='datetime64[D]').astype(str).tolist(), counts.tolist()))
+
+    def _window(self, start: Optional[TimeLike], end: Optional[TimeLike], days: int = 30) -> tuple[np.datetime64, np.datetime64]:
+        end = _to_datetime64(end) if end is not None else self.as_of
+        start = _to_datetime64(start) if start is not None else end - np.timedelta64(days, 'D')
+        if end <= start:
+            raise ValueError(f"Empty time window: {start} to {end}")
+        return start, end
+
+    def _days_on_loan(self, start: np.datetime64, end: np.datetime64) -> np.ndarray:
+        # overlap of each loan with [start, end), zero for loans entirely outside it
+        overlap = (np.minimum(self.loan_end, end) - np.maximum(self.checked_out, start)) / _DAY
+        return np.clip(overlap, 0, None)
+
+    # --- utilisation ---
+
+    def utilisation_by_book(self, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None) -> dict[str, float]:
+        """Fraction of [start, end) each book spent on loan (default: the 30 days before as_of)."""
+        start, end = self._window(start, end)
+        window_days = (end - start) / _DAY
+        on_loan = np.bincount(self.book_codes, weights=self._days_on_loan(start, end), minlength=len(self.book_ids))
+        fractions = np.minimum(on_loan / window_days, 1.0)
+        return {book_id: round(float(f), 4) for book_id, f in zip(self.book_ids, fractions)}
+
+    def utilisation_by_genre(self, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None) -> dict:
+        """Loan days per genre over the window divided by (books in that genre x window days).
+
+        Books that were never borrowed count towards their genre's size, so
+        this is the share of the genre's shelf time spent on loan.
+        """
+        if self.batch is None:
+            raise ValueError("utilisation_by_genre needs the catalog, pass books to the service")
+        start, end = self._window(start, end)
+        window_days = (end - start) / _DAY
+        genres = self.batch.categories('genre')
+        genre_codes = self.batch.codes('genre')
+        shelf = np.bincount(genre_codes[genre_codes >= 0], minlength=len(genres))
+
+        rows = self.catalog_rows[self.book_codes]
+        loan_genres = np.where(rows >= 0, genre_codes[rows], -1)
+        known = loan_genres >= 0
+        on_loan = np.bincount(loan_genres[known], weights=self._days_on_loan(start, end)[known], minlength=len(genres))
+        return {
+            genre: round(float(days / (books * window_days)), 4)
+            for genre, days, books in zip(genres, on_loan, shelf) if books
+        }
+
+    # --- busiest books ---
+
+    def busiest_books(self, window_days: int = 30, end: Optional[TimeLike] = None, limit: int = 10) -> list[dict]:
+        """Books with the most checkouts in the window_days before `end`, with their catalog details."""
+        start, end = self._window(None, end, window_days)
+        lo, hi = np.searchsorted(self.checked_out, [start, end], side='left')
+        counts = np.bincount(self.book_codes[lo:hi], minlength=len(self.book_ids))
+        top = [code for code in top_k_indices(counts, limit) if counts[code]]
+        return [dict(self._describe(code), checkouts=int(counts[code])) for code in top]
+
+    def rolling_busiest_books(self, window_days: int = 30, step_days: int = 7, limit: int = 3,
+                              start: Optional[TimeLike] = None, end: Optional[TimeLike] = None) -> list[tuple[str, list[dict]]]:
+        """busiest_books for a window sliding forward step_days at a time, as (window end, books) pairs.
+
+        Each step is two binary searches and a bincount over that window's
+        checkouts, so the history is never rescanned.
+        """
+        if len(self) == 0:
+            return []
+        end = _to_datetime64(end) if end is not None else self.as_of
+        start = _to_datetime64(start) if start is not None else self.checked_out[0].astype('datetime64[D]')
+        window_end = start + np.timedelta64(window_days, 'D')
+        results = []
+        while window_end <= end:
+            results.append((str(window_end.astype('datetime64[D]')), self.busiest_books(window_days, window_end, limit)))
+            window_end = window_end + np.timedelta64(step_days, 'D')
+        return results
+
+    def _describe(self, code: int) -> dict:
+        row = int(self.catalog_rows[code])
+        if row < 0:
+            return {'book_id': self.book_ids[code], 'title': None, 'author': None, 'genre': None}
+        return {
+            'book_id': self.book_ids[code],
+            'title': _category(self.batch, 'title', row),
+            'author': _category(self.batch, 'author', row),
+            'genre': _category(self.batch, 'genre', row),
+        }
+
+def _category(batch: BookBatch, name: str, row: int):
+    code = int(batch.codes(name)[row])
+    return None if code < 0 else batch.categories(name)[code]
+
+def _parse_times(values: list) -> np.ndarray:
+    """ISO timestamps to datetime64[us]; None and anything unparseable become NaT."""
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), errors='coerce', format='ISO8601')
+    return parsed.to_numpy(dtype='datetime64[us]')
+
+def _to_datetime64(value: TimeLike) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).to_datetime64(), 'us')
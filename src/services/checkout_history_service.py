@@ -1,20 +1,40 @@
 from datetime import datetime
+from typing import Iterable, Optional
+from src.repositories.checkout_transaction_protocol import CheckoutConflictError, CheckoutTransactionProtocol
 from src.repositories.checkout_history_repository_protocol import CheckoutHistoryRepositoryProtocol
 from src.repositories.book_repository_protocol import BookRepositoryProtocol
 from src.domain.checkout_history import CheckoutHistory
 from src.domain.book import Book
 
 class CheckoutHistoryService:
-    def __init__(self, checkout_repo: CheckoutHistoryRepositoryProtocol, book_repo: BookRepositoryProtocol):
+    """Checkouts and checkins.
+
+    Books are looked up by id rather than by scanning the catalog. With a
+    `transaction` (the journaled or sqlite book repository, or a
+    FileCheckoutTransaction for the JSON backends) the history record and
+    the book's availability are committed together; without one they are
+    written one after the other. The transaction also guards against other
+    processes: state is refreshed before the checks, and a commit that lost
+    a race raises CheckoutConflictError. Either way only the `available`
+    flag is written back, never the book as it was read here.
+    """
+
+    def __init__(self, checkout_repo: CheckoutHistoryRepositoryProtocol, book_repo: BookRepositoryProtocol,
+                 transaction: Optional[CheckoutTransactionProtocol] = None):
         self.checkout_repo = checkout_repo
         self.book_repo = book_repo
+        self.transaction = transaction
 
-    def checkout_book(self, book_id: str) -> str:
-        books = self.book_repo.get_all_books()
-        book = next((b for b in books if b.book_id == book_id), None)
-        
+    def _find_book(self, book_id: str) -> Book:
+        book = self.book_repo.find_book_by_id(book_id)
         if book is None:
             raise ValueError(f"Book with ID {book_id} not found")
+        return book
+
+    def checkout_book(self, book_id: str) -> str:
+        if self.transaction is not None:
+            self.transaction.refresh()
+        book = self._find_book(book_id)
         
         active_checkouts = self.checkout_repo.get_active_checkouts_by_book_id(book_id)
         if active_checkouts:
@@ -26,19 +46,20 @@ class CheckoutHistoryService:
             checked_out_time=checkout_time
         )
         
-        checkout_id = self.checkout_repo.add_checkout_history(checkout_history)
-        
         book.check_out()
-        self.book_repo.update_book(book)
+        if self.transaction is not None:
+            self.transaction.commit_checkouts([(book_id, False)], [checkout_history])
+            checkout_id = checkout_history.checkout_history_id
+        else:
+            checkout_id = self.checkout_repo.add_checkout_history(checkout_history)
+            self.book_repo.update_book_fields({book_id: {'available': False}})
         
         return f"Book '{book.title}' checked out successfully. Checkout ID: {checkout_id}"
 
     def checkin_book(self, book_id: str) -> str:
-        books = self.book_repo.get_all_books()
-        book = next((b for b in books if b.book_id == book_id), None)
-        
-        if book is None:
-            raise ValueError(f"Book with ID {book_id} not found")
+        if self.transaction is not None:
+            self.transaction.refresh()
+        book = self._find_book(book_id)
         
         active_checkouts = self.checkout_repo.get_active_checkouts_by_book_id(book_id)
         if not active_checkouts:
@@ -48,19 +69,101 @@ class CheckoutHistoryService:
         checkin_time = datetime.now().isoformat()
         checkout_history.check_in(checkin_time)
         
-        self.checkout_repo.update_checkout_history(checkout_history)
-        
         book.check_in()
-        self.book_repo.update_book(book)
+        if self.transaction is not None:
+            self.transaction.commit_checkouts([(book_id, True)], [checkout_history])
+        else:
+            self.checkout_repo.update_checkout_history(checkout_history)
+            self.book_repo.update_book_fields({book_id: {'available': True}})
         
         return f"Book '{book.title}' checked in successfully."
 
+    def checkout_books(self, book_ids: Iterable[str]) -> dict:
+        """Check out many books, validated against one read and saved with one write.
+
+        Returns {'succeeded': {book_id: message}, 'failed': {book_id: reason}};
+        an id listed twice is only handled once.
+        """
+        return self._run_batch(list(dict.fromkeys(book_ids)), self._plan_checkouts)
+
+    def checkin_books(self, book_ids: Iterable[str]) -> dict:
+        """Check in many books, same shape and guarantees as checkout_books."""
+        return self._run_batch(list(dict.fromkeys(book_ids)), self._plan_checkins)
+
+    def _run_batch(self, book_ids: list[str], plan, attempts: int = 3) -> dict:
+        for _ in range(attempts):
+            if self.transaction is not None:
+                self.transaction.refresh()
+            succeeded, failed, availability, records = plan(book_ids)
+            if not records:
+                return {'succeeded': succeeded, 'failed': failed}
+            try:
+                self._commit(availability, records)
+                return {'succeeded': succeeded, 'failed': failed}
+            except CheckoutConflictError:
+                # another process got some of these first: re-plan against fresh state
+                continue
+        for book_id in succeeded:
+            failed[book_id] = "Conflicting checkouts from another process, try again"
+        return {'succeeded': {}, 'failed': failed}
+
+    def _commit(self, availability: list[tuple[str, bool]], records: list[CheckoutHistory]) -> None:
+        if self.transaction is not None:
+            self.transaction.commit_checkouts(availability, records)
+        else:
+            self.checkout_repo.save_checkout_histories(records)
+            self.book_repo.update_book_fields({book_id: {'available': available} for book_id, available in availability})
+
+    def _plan_checkouts(self, book_ids: list[str]):
+        found = self.book_repo.find_books_by_ids(book_ids)
+        active = self.checkout_repo.get_active_checkouts_by_book_ids(book_ids)
+        checkout_time = datetime.now().isoformat()
+        succeeded, failed, availability, records = {}, {}, [], []
+        for book_id in book_ids:
+            book = found.get(book_id)
+            if book is None:
+                failed[book_id] = f"Book with ID {book_id} not found"
+            elif active.get(book_id):
+                failed[book_id] = f"Book '{book.title}' is already checked out"
+            else:
+                try:
+                    book.check_out()
+                except Exception as e:
+                    failed[book_id] = f"Book '{book.title}': {e}"
+                    continue
+                record = CheckoutHistory(book_id=book_id, checked_out_time=checkout_time)
+                availability.append((book_id, False))
+                records.append(record)
+                succeeded[book_id] = f"Book '{book.title}' checked out successfully. Checkout ID: {record.checkout_history_id}"
+        return succeeded, failed, availability, records
+
+    def _plan_checkins(self, book_ids: list[str]):
+        found = self.book_repo.find_books_by_ids(book_ids)
+        active = self.checkout_repo.get_active_checkouts_by_book_ids(book_ids)
+        checkin_time = datetime.now().isoformat()
+        succeeded, failed, availability, records = {}, {}, [], []
+        for book_id in book_ids:
+            book = found.get(book_id)
+            if book is None:
+                failed[book_id] = f"Book with ID {book_id} not found"
+            elif not active.get(book_id):
+                failed[book_id] = f"Book '{book.title}' is not currently checked out"
+            else:
+                record = active[book_id][-1]
+                try:
+                    book.check_in()
+                except Exception as e:
+                    failed[book_id] = f"Book '{book.title}': {e}"
+                    continue
+                record.check_in(checkin_time)
+                availability.append((book_id, True))
+                records.append(record)
+                succeeded[book_id] = f"Book '{book.title}' checked in successfully."
+        return succeeded, failed, availability, records
+
     def get_checkout_history_for_book(self, book_id: str) -> list[CheckoutHistory]:
-        books = self.book_repo.get_all_books()
-        book = next((b for b in books if b.book_id == book_id), None)
-        
-        if book is None:
-            raise ValueError(f"Book with ID {book_id} not found")
+        # only checks the book exists
+        self._find_book(book_id)
         
         return self.checkout_repo.get_checkout_history_by_book_id(book_id)
 
@@ -0,0 +1,138 @@
+from typing import Iterable, Optional
+import numpy as np
+from src.domain.book import Book
+from src.services.book_batch import BookBatch
+
+class GenreYearTable:
+    """Publication year x genre count matrix.
+
+    Rows are every year from the earliest to the latest one seen, so a year
+    is a row lookup and a year range or decade is a slice sum. Columns are
+    genres in first-seen order, which is also how ties are broken. Books
+    without a year or a genre are not counted.
+
+    With track_ids the table remembers each book's cell, so remove() and
+    update() only need the book_id and the book's new values.
+    """
+
+    def __init__(self, first_year: int = 0, counts: Optional[np.ndarray] = None, genres: Optional[list] = None,
+                 cells: Optional[dict] = None):
+        self.first_year = first_year
+        self.genres = list(genres or [])
+        self._columns = {genre: i for i, genre in enumerate(self.genres)}
+        self._counts = counts if counts is not None else np.zeros((0, len(self.genres)), dtype=np.int64)
+        # book_id -> (year, genre), only when built with track_ids
+        self._cells = cells
+
+    @classmethod
+    def from_batch(cls, batch: BookBatch, track_ids: bool = False) -> 'GenreYearTable':
+        years = batch.column('publication_year')
+        codes = batch.codes('genre')
+        counted = ~np.isnan(years) & (codes >= 0)
+        genres = batch.categories('genre')
+        if not counted.any():
+            return cls(genres=genres, cells={} if track_ids else None)
+
+        rows = years[counted].astype(np.int64)
+        first_year = int(rows.min())
+        rows -= first_year
+        span = int(rows.max()) + 1
+        # one bincount over the flattened (row, genre) cell index
+        flat = np.bincount(rows * len(genres) + codes[counted], minlength=span * len(genres))
+        cells = None
+        if track_ids:
+            ids = batch.column('book_id')[counted]
+            cells = {
+                book_id: (first_year + int(row), genres[code])
+                for book_id, row, code in zip(ids, rows.tolist(), codes[counted].tolist())
+            }
+        return cls(first_year, flat.reshape(span, len(genres)).astype(np.int64), genres, cells)
+
+    @classmethod
+    def from_books(cls, books: Iterable[Book], track_ids: bool = False) -> 'GenreYearTable':
+        return cls.from_batch(BookBatch.from_books(books), track_ids)
+
+    @property
+    def years(self) -> range:
+        return range(self.first_year, self.first_year + len(self._counts))
+
+    # --- incremental updates ---
+
+    def _cell(self, year: int, genre) -> tuple[int, int]:
+        """Row and column for (year, genre), growing the matrix if either is new."""
+        column = self._columns.get(genre)
+        if column is None:
+            column = self._columns[genre] = len(self.genres)
+            self.genres.append(genre)
+            self._counts = np.pad(self._counts, ((0, 0), (0, 1)))
+        if len(self._counts) == 0:
+            self.first_year = year
+            self._counts = np.zeros((1, len(self.genres)), dtype=np.int64)
+        elif year < self.first_year:
+            self._counts = np.pad(self._counts, ((self.first_year - year, 0), (0, 0)))
+            self.first_year = year
+        elif year >= self.first_year + len(self._counts):
+            self._counts = np.pad(self._counts, ((0, year - self.first_year - len(self._counts) + 1), (0, 0)))
+        return year - self.first_year, column
+
+    def add(self, book: Book) -> None:
+        if book.publication_year is None or book.genre is None:
+            return
+        year = int(book.publication_year)
+        if self._cells is not None:
+            if book.book_id in self._cells:
+                self.remove(book.book_id)
+            self._cells[book.book_id] = (year, book.genre)
+        row, column = self._cell(year, book.genre)
+        self._counts[row, column] += 1
+
+    def remove(self, book_id: str) -> None:
+        if self._cells is None:
+            raise ValueError("remove() needs a table built with track_ids=True")
+        cell = self._cells.pop(book_id, None)
+        if cell is None:
+            return
+        year, genre = cell
+        self._counts[year - self.first_year, self._columns[genre]] -= 1
+
+    def update(self, book: Book) -> None:
+        """Move a book to the cell for its current year and genre."""
+        self.remove(book.book_id)
+        self.add(book)
+
+    # --- lookups ---
+
+    def _rows(self, start: int, end: int) -> np.ndarray:
+        # clamp to the years we have, an empty slice sums to zeros
+        lo = max(start - self.first_year, 0)
+        hi = max(min(end - self.first_year + 1, len(self._counts)), 0)
+        return self._counts[lo:hi].sum(axis=0) if lo < hi else np.zeros(len(self.genres), dtype=np.int64)
+
+    def count(self, year: int, genre) -> int:
+        column = self._columns.get(genre)
+        if column is None or not self.first_year <= year < self.first_year + len(self._counts):
+            return 0
+        return int(self._counts[year - self.first_year, column])
+
+    def genre_counts(self, start: int, end: Optional[int] = None) -> dict:
+        """Books per genre published in `start`, or from `start` to `end` inclusive."""
+        totals = self._rows(start, start if end is None else end)
+        return {self.genres[i]: int(n) for i, n in enumerate(totals) if n}
+
+    def genre_counts_for_decade(self, decade: int) -> dict:
+        """Books per genre for the decade containing `decade`, e.g. 1990 -> 1990..1999."""
+        first = decade - decade % 10
+        return self.genre_counts(first, first + 9)
+
+    def top_genres(self, start: int, n: int = 3, end: Optional[int] = None) -> list[tuple]:
+        """The n most common (genre, count) pairs for a year or range, highest first."""
+        totals = self._rows(start, start if end is None else end)
+        # stable sort on -count keeps first-seen order for ties
+        order = np.argsort(-totals, kind='stable')[:n]
+        return [(self.genres[i], int(totals[i])) for i in order if totals[i]]
+
+    def most_popular(self, start: int, end: Optional[int] = None):
+        top = self.top_genres(start, 1, end)
+        if not top:
+            raise IndexError(f"No books published in {start if end is None else f'{start}-{end}'}")
+        return top[0][0]
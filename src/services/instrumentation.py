@@ -0,0 +1,147 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+from typing import Optional
+import numpy as np
+
+# latency bucket upper bounds in ms: 0.01ms doubling up to ~168s, plus overflow
+BUCKET_BOUNDS_MS = [0.01 * 2 ** k for k in range(25)]
+
+class MethodStats:
+    """Call count, total/min/max and a log-bucketed latency histogram for one method."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float('inf')
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def record(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[int(np.searchsorted(BUCKET_BOUNDS_MS, ms))] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (never above the max seen)."""
+        target = q / 100 * self.count
+        seen = 0
+        for bound, n in zip(BUCKET_BOUNDS_MS + [self.max_ms], self.buckets):
+            seen += n
+            if n and seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 4),
+            'mean_ms': round(self.total_ms / self.count, 4) if self.count else 0.0,
+            'min_ms': round(self.min_ms, 4) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 4),
+            'p50_ms': round(self.percentile(50), 4),
+            'p95_ms': round(self.percentile(95), 4),
+            'p99_ms': round(self.percentile(99), 4),
+            'histogram': {f"<={bound:g}ms": n for bound, n in zip(BUCKET_BOUNDS_MS, self.buckets) if n},
+        }
+
+class Instrumentation:
+    """Opt-in call counting and latency histograms for service methods.
+
+    Nothing is measured until instrument() wraps a service, so an app that
+    never calls it pays nothing. Wrapped methods check `enabled` first and
+    call straight through when it is off. With profile=True the outermost
+    instrumented call also runs under a shared cProfile.Profile.
+    """
+
+    def __init__(self, enabled: bool = True, profile: bool = False):
+        self.enabled = enabled
+        self.profile = profile
+        self._stats: dict[str, MethodStats] = {}
+        self._lock = threading.Lock()
+        self._profiler = cProfile.Profile() if profile else None
+        self._depth = threading.local()
+
+    def instrument(self, service, name: Optional[str] = None):
+        """Wrap every public method of `service` in place and return it."""
+        prefix = name or type(service).__name__
+        for attr in dir(type(service)):
+            if attr.startswith('_') or not callable(getattr(type(service), attr, None)):
+                continue
+            method = getattr(service, attr)
+            setattr(service, attr, self._wrap(f"{prefix}.{attr}", method))
+        return service
+
+    def _wrap(self, label: str, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return method(*args, **kwargs)
+            depth = getattr(self._depth, 'value', 0)
+            self._depth.value = depth + 1
+            profiling = self._profiler is not None and depth == 0
+            if profiling:
+                self._profiler.enable()
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if profiling:
+                    self._profiler.disable()
+                self._depth.value = depth
+                self.record(label, elapsed_ms)
+        return timed
+
+    def record(self, label: str, elapsed_ms: float) -> None:
+        with self._lock:
+            stats = self._stats.get(label)
+            if stats is None:
+                stats = self._stats[label] = MethodStats()
+            stats.record(elapsed_ms)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            if self._profiler is not None:
+                self._profiler = cProfile.Profile()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {label: stats.to_dict() for label, stats in sorted(self._stats.items())}
+
+    def format_table(self) -> str:
+        rows = self.snapshot()
+        if not rows:
+            return 'No instrumented calls yet.'
+        width = max(len(label) for label in rows) + 2
+        lines = [f"{'method':<{width}}{'calls':>7}{'mean ms':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for label, row in rows.items():
+            lines.append(
+                f"{label:<{width}}{row['count']:>7}{row['mean_ms']:>11.3f}{row['p50_ms']:>10.3f}"
+                f"{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['max_ms']:>10.3f}"
+            )
+        return '\n'.join(lines)
+
+    def profile_report(self, limit: int = 25) -> str:
+        if self._profiler is None:
+            return ''
+        if not self._profiler.getstats():
+            # pstats.Stats raises TypeError on a profile that recorded nothing
+            return 'No profile data yet.'
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def dump(self, filepath: str) -> None:
+        """Write the stats as JSON; with profiling on, the raw profile goes to <filepath>.prof."""
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        if self._profiler is not None:
+            self._profiler.dump_stats(f"{filepath}.prof")
@@ -0,0 +1,136 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+from src.domain.book import Book
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_batch import BookBatch
+
+class ResultCache:
+    """Size-bounded LRU cache with an optional time-to-live per entry.
+
+    Expired entries count as misses (and as expirations); going over
+    max_entries evicts the least recently used entry.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl_seconds is None or self._clock() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        # computed outside the lock, two callers racing on one key both compute it
+        value = compute()
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+            }
+
+def _copy_result(value):
+    # callers may mutate what they get back, the cached result has to survive that
+    if isinstance(value, list):
+        return [copy.copy(item) for item in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+class MemoizedAnalyticsService:
+    """Drop-in for BookAnalyticsService that remembers results between writes.
+
+    Results are keyed by (method, arguments, dataset version). The version
+    comes from BookAnalyticsService.dataset_version, so a BookBatch from
+    BookService.get_book_batch() or the column store changes version as soon
+    as the repository reports a write; the first call that sees a new version
+    drops every older entry. Plain lists have no version and are not cached.
+    Anything not memoised is passed straight through.
+    """
+
+    def __init__(self, analytics: Optional[BookAnalyticsService] = None, max_entries: int = 128, ttl_seconds: Optional[float] = None):
+        self.analytics = analytics or BookAnalyticsService()
+        self.cache = ResultCache(max_entries, ttl_seconds)
+        self._version = None
+
+    def __getattr__(self, name):
+        # only called for names this class doesn't define, e.g. the streaming methods
+        if name == 'analytics':
+            raise AttributeError(name)
+        return getattr(self.analytics, name)
+
+    def _call(self, method: str, books, **kwargs):
+        if not isinstance(books, (BookBatch, list, tuple)):
+            books = list(books)
+        version = self.analytics.dataset_version(books)
+        if version is None:
+            # a plain list has no version to key on, so it is never cached
+            return getattr(self.analytics, method)(books, **kwargs)
+        if version != self._version:
+            # a write happened: nothing cached for the old data can be hit again
+            self.cache.invalidate()
+            self._version = version
+        key = (method, tuple(sorted(kwargs.items())), version)
+        result = self.cache.get_or_compute(key, lambda: getattr(self.analytics, method)(books, **kwargs))
+        return _copy_result(result)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+    def average_price(self, books: list[Book]) -> float:
+        return self._call('average_price', books)
+
+    def top_rated(self, books: list[Book], min_ratings: int = 1000, limit: int = 10) -> list[Book]:
+        return self._call('top_rated', books, min_ratings=min_ratings, limit=limit)
+
+    def top_rated_with_pandas(self, books: list[Book], min_ratings: int = 1000, limit: int = 10) -> list[Book]:
+        return self._call('top_rated_with_pandas', books, min_ratings=min_ratings, limit=limit)
+
+    def value_scores(self, books: list[Book]) -> dict[str, float]:
+        return self._call('value_scores', books)
+
+    def value_scores_with_pandas(self, books: list[Book], limit: int = 10) -> dict[str, float]:
+        return self._call('value_scores_with_pandas', books, limit=limit)
+
+    def median_price_by_genre(self, books: list[Book]) -> dict[str, float]:
+        return self._call('median_price_by_genre', books)
+
+    def most_popular_genre(self, books: list[Book], year: int) -> str:
+        return self._call('most_popular_genre', books, year=year)
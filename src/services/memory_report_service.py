@@ -0,0 +1,82 @@
+import gc
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from src.domain.book import Book
+from src.domain.checkout_history import CheckoutHistory
+from src.domain.compact_book import CompactBook
+from src.domain.compact_checkout_history import CompactCheckoutHistory
+from src.repositories.json_stream import iter_json_records
+from src.services.book_generator_service_V2 import generate_books_json
+
+def _retained_bytes(filepath: str, record_type: type) -> int:
+    """Bytes still allocated after loading every record of filepath as record_type."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            records = [record_type.from_dict(item) for item in iter_json_records(f)]
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del records
+    return retained
+
+def _write_checkout_history(filepath: str, books_path: str, count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    with open(books_path, 'r', encoding='utf-8') as f:
+        book_ids = [item['book_id'] for item in iter_json_records(f)]
+    start = datetime(2024, 1, 1)
+    history = []
+    for _ in range(count):
+        checked_out = start + timedelta(minutes=rng.randrange(0, 60 * 24 * 365))
+        checked_in = checked_out + timedelta(hours=rng.randrange(1, 24 * 30))
+        history.append(CheckoutHistory(
+            book_id=rng.choice(book_ids),
+            checked_out_time=checked_out.isoformat(),
+            checked_in_time=checked_in.isoformat(),
+        ).to_dict())
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(history, f)
+
+def memory_report(book_count: int = 100_000, history_count: int = 200_000, seed: int = 0) -> dict:
+    """Compare the in-memory size of the plain and compact domain types.
+
+    Generates a catalog (and a checkout history over it) in a temp directory,
+    loads each file once per type and reports the bytes left allocated.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        books_path = os.path.join(tmp_dir, 'books.json')
+        history_path = os.path.join(tmp_dir, 'checkout_history.json')
+        generate_books_json(books_path, count=book_count, seed=seed)
+        _write_checkout_history(history_path, books_path, history_count, seed)
+
+        report = {}
+        for name, path, plain, compact in [
+            ('books', books_path, Book, CompactBook),
+            ('checkout_history', history_path, CheckoutHistory, CompactCheckoutHistory),
+        ]:
+            before = _retained_bytes(path, plain)
+            after = _retained_bytes(path, compact)
+            report[name] = {
+                'rows': book_count if name == 'books' else history_count,
+                'bytes_before': before,
+                'bytes_after': after,
+                'saved_pct': round(100 * (before - after) / before, 1) if before else 0.0,
+            }
+    return report
+
+def print_memory_report(report: dict) -> None:
+    print(f"{'dataset':<18}{'rows':>10}{'before (MB)':>14}{'after (MB)':>13}{'saved':>8}")
+    for name, row in report.items():
+        print(
+            f"{name:<18}{row['rows']:>10}{row['bytes_before'] / 1e6:>14.1f}"
+            f"{row['bytes_after'] / 1e6:>13.1f}{row['saved_pct']:>7.1f}%"
+        )
+
+if __name__ == '__main__':
+    print_memory_report(memory_report())
@@ -0,0 +1,197 @@
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional, Sequence
+import numpy as np
+from src.domain.book import Book
+from src.services.book_batch import BookBatch
+from src.services.top_k import top_k_indices
+
+# Map-reduce version of BookAnalyticsService for big catalogs:
+# 1. the batch is cut into contiguous shards, each shard only ships the columns a query reads
+# 2. workers return small mergeable partials (sums/counts, bincounts, sorted runs, local top-k)
+# 3. the parent merges them, giving the same answers as the serial methods
+#   - counts, medians and top-k are identical, the mean can differ in the last bits (summation order)
+
+def _shard_bounds(length: int, shards: int) -> list[tuple[int, int]]:
+    shards = max(1, min(shards, length))
+    edges = np.linspace(0, length, shards + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:])]
+
+# --- map steps, module level so they pickle into the worker processes ---
+
+def _price_partial(shard: dict) -> tuple[float, int]:
+    prices = shard['price_usd']
+    prices = prices[~np.isnan(prices)]
+    return float(prices.sum()), len(prices)
+
+def _genre_count_partial(shard: dict) -> np.ndarray:
+    codes = shard['genre']
+    if shard['year'] is not None:
+        codes = codes[shard['publication_year'] == shard['year']]
+    codes = codes[codes >= 0]
+    return np.bincount(codes, minlength=shard['genre_count'])
+
+def _sorted_prices_partial(shard: dict) -> dict[int, np.ndarray]:
+    prices, codes = shard['price_usd'], shard['genre']
+    present = ~np.isnan(prices) & (codes >= 0)
+    prices, codes = prices[present], codes[present]
+    # sorted by genre, then price: each genre is one sorted run
+    order = np.lexsort((prices, codes))
+    prices, codes = prices[order], codes[order]
+    genres, starts = np.unique(codes, return_index=True)
+    return {int(g): run for g, run in zip(genres, np.split(prices, starts[1:]))}
+
+def _top_k_partial(shard: dict) -> tuple[np.ndarray, np.ndarray]:
+    scores = shard['scores']
+    local = top_k_indices(scores, shard['limit'])
+    return local + shard['offset'], scores[local]
+
+def _top_rated_partial(shard: dict) -> tuple[np.ndarray, np.ndarray]:
+    scores = np.where(shard['ratings_count'] >= shard['min_ratings'], shard['average_rating'], np.nan)
+    return _top_k_partial({'scores': scores, 'limit': shard['limit'], 'offset': shard['offset']})
+
+def _value_score_partial(shard: dict) -> tuple[np.ndarray, np.ndarray]:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = shard['average_rating'] * np.log1p(shard['ratings_count']) / shard['price_usd']
+    return _top_k_partial({'scores': scores, 'limit': shard['limit'], 'offset': shard['offset']})
+
+# --- reduce helpers ---
+
+def _kth_smallest(runs: list[np.ndarray], k: int) -> float:
+    """The k-th smallest value (0-based) across sorted runs, without merging them."""
+    for run in runs:
+        lo, hi = 0, len(run)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = run[mid]
+            below = sum(int(np.searchsorted(r, value, 'left')) for r in runs)
+            up_to = sum(int(np.searchsorted(r, value, 'right')) for r in runs)
+            if up_to <= k:
+                lo = mid + 1
+            elif below > k:
+                hi = mid
+            else:
+                return float(value)
+    raise ValueError(f"k={k} is out of range")
+
+def _merge_top_k(partials: list, limit: int) -> np.ndarray:
+    # partials come back in shard order, so candidate order is catalog order
+    # and top_k_indices' position tie-break matches the serial one
+    positions = np.concatenate([p[0] for p in partials])
+    scores = np.concatenate([p[1] for p in partials])
+    return positions[top_k_indices(scores, limit)]
+
+class ParallelAnalyticsService:
+    """Runs the analytics as map-reduce over shards of a BookBatch.
+
+    workers=1 runs every shard in this process, which is also what tests
+    use. Otherwise a ProcessPoolExecutor is started on first use and kept
+    until close(), so repeated queries don't pay the start-up cost.
+    """
+
+    def __init__(self, workers: Optional[int] = None, shards_per_worker: int = 4):
+        self.workers = workers or os.cpu_count() or 1
+        self.shards_per_worker = shards_per_worker
+        self._executor: Optional[Executor] = None
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _map(self, fn, shards: list[dict]) -> list:
+        if self.workers == 1 or len(shards) == 1:
+            return [fn(shard) for shard in shards]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return list(self._executor.map(fn, shards))
+
+    def _prepare(self, books, columns: Sequence[str]) -> tuple:
+        """Return (books, batch), iterators are materialised so rows can be handed back.
+
+        A list is read into a batch holding just `columns`, building the
+        unused ones would cost the parent more than the map-reduce saves.
+        """
+        if isinstance(books, BookBatch):
+            return books, books
+        if not isinstance(books, (list, tuple)):
+            books = list(books)
+        return books, BookBatch.from_books(books, columns=columns)
+
+    def _shards(self, batch: BookBatch, columns: list[str], **extra) -> list[dict]:
+        arrays = batch.arrays()
+        shards = []
+        for start, stop in _shard_bounds(len(batch), self.workers * self.shards_per_worker):
+            shard = {name: arrays[name][start:stop] for name in columns}
+            shard.update(extra, offset=start)
+            shards.append(shard)
+        return shards
+
+    def _rows(self, books, positions) -> list[Book]:
+        if isinstance(books, BookBatch):
+            return [books.book(int(i)) for i in positions]
+        return [books[int(i)] for i in positions]
+
+    def average_price(self, books: list[Book]) -> float:
+        _, batch = self._prepare(books, ['price_usd'])
+        partials = self._map(_price_partial, self._shards(batch, ['price_usd']))
+        total = sum(p[0] for p in partials)
+        count = sum(p[1] for p in partials)
+        return total / count if count else float('nan')
+
+    def genre_counts(self, books: list[Book], year: Optional[int] = None) -> dict[str, int]:
+        """Books per genre (first-seen order), optionally only those published in year."""
+        _, batch = self._prepare(books, ['genre', 'publication_year'])
+        genres = batch.categories('genre')
+        shards = self._shards(batch, ['genre', 'publication_year'], year=year, genre_count=len(genres))
+        counts = np.sum(self._map(_genre_count_partial, shards), axis=0)
+        return {genres[code]: int(n) for code, n in enumerate(counts) if n}
+
+    def most_popular_genre(self, books: list[Book], year: int) -> str:
+        counts = self.genre_counts(books, year)
+        if not counts:
+            # same error as the serial method (GenreYearTable.most_popular)
+            raise IndexError(f"No books published in {year}")
+        # max() keeps the first genre on ties, i.e. the first seen in the catalog
+        return max(counts, key=counts.get)
+
+    def median_price_by_genre(self, books: list[Book]) -> dict[str, float]:
+        _, batch = self._prepare(books, ['price_usd', 'genre'])
+        partials = self._map(_sorted_prices_partial, self._shards(batch, ['price_usd', 'genre']))
+        runs_by_genre: dict[int, list] = {}
+        for partial in partials:
+            for code, run in partial.items():
+                runs_by_genre.setdefault(code, []).append(run)
+
+        genres = batch.categories('genre')
+        medians = {}
+        # genre code order is first-seen order, the same order groupby gives the serial method
+        for code in sorted(runs_by_genre):
+            runs = runs_by_genre[code]
+            n = sum(len(r) for r in runs)
+            upper = _kth_smallest(runs, n // 2)
+            medians[genres[code]] = upper if n % 2 else (_kth_smallest(runs, n // 2 - 1) + upper) / 2
+        return medians
+
+    def top_rated(self, books: list[Book], min_ratings: int = 1000, limit: int = 10) -> list[Book]:
+        books, batch = self._prepare(books, ['average_rating', 'ratings_count'])
+        shards = self._shards(batch, ['average_rating', 'ratings_count'], min_ratings=min_ratings, limit=limit)
+        positions = _merge_top_k(self._map(_top_rated_partial, shards), limit)
+        return self._rows(books, positions)
+
+    def value_scores_top(self, books: list[Book], limit: int = 10) -> dict[str, float]:
+        """Same as BookAnalyticsService.value_scores_with_pandas."""
+        _, batch = self._prepare(books, ['average_rating', 'ratings_count', 'price_usd', 'book_id'])
+        shards = self._shards(batch, ['average_rating', 'ratings_count', 'price_usd'], limit=limit)
+        partials = self._map(_value_score_partial, shards)
+        positions = np.concatenate([p[0] for p in partials])
+        scores = np.concatenate([p[1] for p in partials])
+        best = top_k_indices(scores, limit)
+        book_ids, id_codes = batch.categories('book_id'), batch.codes('book_id')
+        return {book_ids[id_codes[i]]: float(score) for i, score in zip(positions[best], scores[best])}
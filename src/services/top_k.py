@@ -0,0 +1,51 @@
+import heapq
+import math
+from typing import Callable, Iterable, Optional, TypeVar
+import numpy as np
+
+T = TypeVar('T')
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest scores, highest first, ties broken by position.
+
+    Uses np.argpartition, so it is O(n) to find the candidates plus
+    O(k log k) to order them, instead of sorting everything. NaN scores
+    are never selected.
+    """
+    scores = np.asarray(scores, dtype=float)
+    valid = np.flatnonzero(~np.isnan(scores))
+    k = min(k, len(valid))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    values = scores[valid]
+    if k < len(values):
+        # the k-th largest value; everything above it is in, ties at it are
+        # filled in position order so the cut doesn't depend on argpartition
+        threshold = values[np.argpartition(-values, k - 1)[k - 1]]
+        above = np.flatnonzero(values > threshold)
+        tied = np.flatnonzero(values == threshold)[:k - len(above)]
+        chosen = np.concatenate([above, tied])
+    else:
+        chosen = np.arange(len(values))
+
+    # lexsort sorts by the last key first: score descending, then position
+    order = np.lexsort((chosen, -values[chosen]))
+    return valid[chosen[order]]
+
+def top_k_stream(items: Iterable[T], key: Callable[[T], Optional[float]], k: int) -> list[T]:
+    """The k items with the largest key from an iterator, highest first.
+
+    Keeps a heap of at most k items: O(n log k) time and O(k) memory, so the
+    input can be a lazy stream that never fits in memory. Items whose key is
+    None or NaN are skipped, ties keep the order they arrived in.
+    """
+    def scored():
+        for position, item in enumerate(items):
+            score = key(item)
+            if score is None or math.isnan(score):
+                continue
+            # -position: on equal scores the earlier item ranks higher
+            yield (score, -position, item)
+
+    return [item for _, _, item in heapq.nlargest(k, scored(), key=lambda entry: entry[:2])]
@@ -0,0 +1,53 @@
+import pickle
+from dataclasses import fields
+import pytest
+from src.domain.book import Book
+from src.domain.checkout_history import CheckoutHistory
+from src.domain.compact_book import CompactBook
+from src.domain.compact_checkout_history import CompactCheckoutHistory
+
+def test_compact_book_round_trips_and_has_no_dict():
+    data = Book(title="Dune", author="Herbert", genre="Sci-Fi", publisher="Ace", available=True).to_dict()
+    book = CompactBook.from_dict(data)
+    assert book.to_dict() == data
+    assert not hasattr(book, "__dict__")
+
+def test_compact_book_interns_categorical_strings():
+    first = CompactBook.from_dict({"title": "A", "author": "X", "publisher": "".join(["Pen", "guin"])})
+    second = CompactBook.from_dict({"title": "B", "author": "Y", "publisher": "".join(["Peng", "uin"])})
+    assert first.publisher is second.publisher
+
+def test_compact_book_interns_string_genres():
+    first = CompactBook.from_dict({"title": "A", "author": "X", "genre": "".join(["Fan", "tasy"])})
+    second = CompactBook.from_dict({"title": "B", "author": "Y", "genre": "".join(["Fant", "asy"])})
+    assert first.genre is second.genre
+    assert CompactBook.from_dict({"title": "C", "author": "Z", "genre": 3}).genre == 3
+
+def test_compact_book_has_the_same_fields_as_book():
+    assert [f.name for f in fields(CompactBook)] == [f.name for f in fields(Book)]
+    book = CompactBook(title="Dune", author="Herbert")
+    assert book.genre is None and book.book_id != CompactBook(title="Dune", author="Herbert").book_id
+    assert pickle.loads(pickle.dumps(book)) == book
+
+def test_compact_book_check_out_and_in():
+    book = CompactBook(title="Dune", author="Herbert", available=True)
+    book.check_out()
+    with pytest.raises(Exception, match="already checked out"):
+        book.check_out()
+    book.check_in()
+    assert book.available is True
+
+def test_compact_checkout_history_matches_checkout_history():
+    data = CheckoutHistory(book_id="b1", checked_out_time="2025-01-01").to_dict()
+    record = CompactCheckoutHistory.from_dict(data)
+    assert record.to_dict() == data
+    assert record.is_checked_out()
+    record.check_in("2025-01-02")
+    with pytest.raises(Exception):
+        record.check_in()
+
+def test_compact_checkout_history_has_the_same_fields_as_checkout_history():
+    assert [f.name for f in fields(CompactCheckoutHistory)] == [f.name for f in fields(CheckoutHistory)]
+    record = CompactCheckoutHistory.from_dict({"book_id": "".join(["b", "1"]), "checked_out_time": "2025-01-01"})
+    assert not hasattr(record, "__dict__")
+    assert record.book_id is CompactCheckoutHistory.from_dict({"book_id": "".join(["b", "1"]), "checked_out_time": "2025-01-02"}).book_id
@@ -3,16 +3,36 @@ from src.domain.book import Book
 class MockBookRepo:
     def __init__(self):
         self.books_list = [Book(title="test", author="author", book_id="test-id-1", available=True)]
+        self.version = 0
     
     def get_all_books(self):
         return self.books_list.copy()
     
+    def iter_books(self, fields=None):
+        return iter(self.books_list.copy())
+
+    def data_version(self):
+        return self.version
+
     def add_book(self, book):
+        self.version += 1
         self.books_list.append(book)
         return book.book_id
     
+    def add_books(self, books):
+        existing = {b.book_id for b in self.books_list}
+        added = []
+        for book in books:
+            if book.book_id not in existing:
+                existing.add(book.book_id)
+                self.version += 1
+                self.books_list.append(book)
+                added.append(book.book_id)
+        return added
+
     def remove_book(self, book_id):
         original_len = len(self.books_list)
+        self.version += 1
         self.books_list = [b for b in self.books_list if b.book_id != book_id]
         if len(self.books_list) == original_len:
             return f"Book {book_id} Not Found"
@@ -24,9 +44,33 @@ class MockBookRepo:
     def update_book(self, book):
         for i, b in enumerate(self.books_list):
             if b.book_id == book.book_id:
+                self.version += 1
                 self.books_list[i] = book
                 return f"Successfully updated book {book.book_id}"
         return f"Book {book.book_id} not found"
     
+    def find_book_by_id(self, book_id):
+        return next((b for b in self.books_list if b.book_id == book_id), None)
+
+    def find_books_by_ids(self, book_ids):
+        wanted = set(book_ids)
+        return {b.book_id: b for b in self.books_list if b.book_id in wanted}
+
+    def update_books(self, books):
+        return [book.book_id for book in books if self.update_book(book).startswith("Successfully")]
+
+    def update_book_fields(self, changes):
+        updated = []
+        for book in self.books_list:
+            if book.book_id in changes:
+                self.version += 1
+                for key, value in changes[book.book_id].items():
+                    setattr(book, key, value)
+                updated.append(book.book_id)
+        return updated
+
     def find_book_by_name(self, query):
         return [b for b in self.books_list if b.title == query]
+
+    def find_first_book_by_name(self, query):
+        return next((b for b in self.books_list if b.title == query), None)
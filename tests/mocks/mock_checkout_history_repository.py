@@ -18,6 +18,19 @@ class MockCheckoutHistoryRepository:
         return [h for h in self.checkout_history_list 
                 if h.book_id == book_id and h.is_checked_out()]
     
+    def get_active_checkouts_by_book_ids(self, book_ids):
+        active = {}
+        for book_id in book_ids:
+            records = self.get_active_checkouts_by_book_id(book_id)
+            if records:
+                active[book_id] = records
+        return active
+
+    def save_checkout_histories(self, checkout_histories):
+        for h in checkout_histories:
+            if not self.update_checkout_history(h).startswith("Successfully"):
+                self.add_checkout_history(h)
+
     def update_checkout_history(self, checkout_history: CheckoutHistory) -> str:
         for i, h in enumerate(self.checkout_history_list):
             if h.checkout_history_id == checkout_history.checkout_history_id:
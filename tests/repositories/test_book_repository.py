@@ -0,0 +1,110 @@
+import io
+import json
+import threading
+import pytest
+from src.domain.book import Book
+from src.repositories.book_predicates import parse_filters
+from src.repositories.book_repository import BookRepository
+from src.repositories.json_stream import iter_json_records
+from src.repositories.parsed_file_cache import ParsedFileCache
+
+BOOKS = [
+    Book(title="Dune", author="Herbert", book_id="id-1", price_usd=10.0),
+    Book(title="Emma", author="Austen", book_id="id-2", price_usd=20.0),
+    Book(title="Dune", author="Someone Else", book_id="id-3", price_usd=30.0),
+]
+
+@pytest.fixture(params=["books.json", "books.ndjson"])
+def repo(request, tmp_path):
+    repo = BookRepository(str(tmp_path / request.param))
+    repo._write_books(BOOKS)
+    return repo
+
+class TestBookRepositoryStreaming:
+
+    def test_iter_books_matches_get_all_books(self, repo):
+        assert list(repo.iter_books()) == repo.get_all_books() == BOOKS
+
+    def test_iter_books_projection_only_sets_requested_fields(self, repo):
+        books = list(repo.iter_books(fields=["price_usd"]))
+        assert [b.price_usd for b in books] == [10.0, 20.0, 30.0]
+        assert all(b.title is None and b.book_id is None for b in books)
+
+    def test_iter_books_where_filters_and_keeps_filtered_fields(self, repo):
+        predicates = parse_filters(title="Dune", price_usd__gt=15)
+        result = list(repo.iter_books_where(predicates, fields=["price_usd"]))
+        assert [(b.title, b.price_usd) for b in result] == [("Dune", 30.0)]
+
+    def test_find_first_book_by_name_stops_at_first_match(self, repo):
+        assert repo.find_first_book_by_name("Dune").book_id == "id-1"
+        assert repo.find_first_book_by_name("Missing") is None
+
+    def test_ndjson_layout_writes_one_record_per_line(self, tmp_path):
+        repo = BookRepository(str(tmp_path / "books.ndjson"))
+        repo._write_books(BOOKS)
+        repo.add_book(Book(title="Ulysses", author="Joyce", book_id="id-4"))
+        lines = (tmp_path / "books.ndjson").read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["book_id"] for line in lines] == ["id-1", "id-2", "id-3", "id-4"]
+
+def test_iter_json_records_handles_records_split_across_chunks():
+    data = [b.to_dict() for b in BOOKS]
+    records = iter_json_records(io.StringIO(json.dumps(data, indent=2)), chunk_size=16)
+    assert list(records) == data
+
+def test_add_books_writes_once_and_skips_known_ids(repo, monkeypatch):
+    writes = []
+    original = repo._write_books
+    monkeypatch.setattr(repo, "_write_books", lambda books: writes.append(1) or original(books))
+    added = repo.add_books([
+        Book(title="Ulysses", author="Joyce", book_id="id-4"),
+        Book(title="Dune", author="Herbert", book_id="id-1"),
+        Book(title="Ulysses", author="Joyce", book_id="id-4"),
+    ])
+    assert added == ["id-4"]
+    assert len(writes) == 1
+    assert [b.book_id for b in repo.get_all_books()] == ["id-1", "id-2", "id-3", "id-4"]
+
+def test_update_books_writes_once_and_reports_known_ids(repo, monkeypatch):
+    writes = []
+    original = repo._write_books
+    monkeypatch.setattr(repo, "_write_books", lambda books: writes.append(1) or original(books))
+    updated = repo.update_books([
+        Book(title="Dune", author="Herbert", book_id="id-1", available=False),
+        Book(title="Nope", author="Nobody", book_id="id-9"),
+    ])
+    assert updated == ["id-1"]
+    assert len(writes) == 1
+    assert set(repo.find_books_by_ids(["id-1", "id-9"])) == {"id-1"}
+    assert repo.find_book_by_id("id-1").available is False
+
+def test_cached_lookups_by_id_use_an_index_and_hand_out_copies(tmp_path, monkeypatch):
+    repo = BookRepository(str(tmp_path / "books.json"), cache=ParsedFileCache())
+    repo._write_books(BOOKS)
+    monkeypatch.setattr(repo, "get_all_books", lambda: pytest.fail("lookups by id should not copy the catalog"))
+    book = repo.find_book_by_id("id-2")
+    assert book == BOOKS[1]
+    book.price_usd = 99.0
+    assert repo.find_book_by_id("id-2").price_usd == 20.0
+    assert set(repo.find_books_by_ids(["id-1", "id-3", "missing"])) == {"id-1", "id-3"}
+    assert repo.find_book_by_id("missing") is None
+
+    monkeypatch.undo()
+    repo.update_book(Book(title="Emma", author="Austen", book_id="id-2", price_usd=25.0))
+    assert repo.find_book_by_id("id-2").price_usd == 25.0
+
+def test_concurrent_writers_keep_every_book(tmp_path):
+    path = str(tmp_path / "books.json")
+    BookRepository(path)._write_books([])
+
+    def add(worker):
+        # one repository per thread: each holds its own flock, as separate processes would
+        repo = BookRepository(path)
+        for i in range(10):
+            repo.add_book(Book(title=f"T{worker}-{i}", author="A", book_id=f"{worker}-{i}"))
+
+    threads = [threading.Thread(target=add, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(BookRepository(path).get_all_books()) == 40
@@ -0,0 +1,89 @@
+import json
+import pytest
+from src.domain.book import Book
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.book_repository import BookRepository
+from src.repositories.checkout_history_repository import CheckoutHistoryRepository
+from src.repositories.checkout_transaction_protocol import CheckoutConflictError
+from src.repositories.file_checkout_transaction import FileCheckoutTransaction
+from src.repositories.indexed_book_repository import IndexedBookRepository
+from src.repositories.indexed_checkout_history_repository import IndexedCheckoutHistoryRepository
+from src.services.checkout_history_service import CheckoutHistoryService
+
+@pytest.fixture
+def books_file(tmp_path):
+    path = tmp_path / "books.json"
+    books = [
+        Book(title="Dune", author="Herbert", book_id="id-1", available=True),
+        Book(title="Emma", author="Austen", book_id="id-2", available=True),
+    ]
+    path.write_text(json.dumps([b.to_dict() for b in books]), encoding="utf-8")
+    return path
+
+@pytest.fixture(params=["json", "indexed"])
+def repos(request, books_file):
+    history_path = str(books_file.parent / "checkout_history.json")
+    if request.param == "json":
+        return BookRepository(str(books_file)), CheckoutHistoryRepository(history_path)
+    return IndexedBookRepository(str(books_file)), IndexedCheckoutHistoryRepository(history_path)
+
+def available(books_file, book_id):
+    return next(item["available"] for item in json.loads(books_file.read_text(encoding="utf-8")) if item["book_id"] == book_id)
+
+class TestFileCheckoutTransaction:
+
+    def test_checkout_and_checkin_write_both_files(self, repos, books_file):
+        book_repo, history_repo = repos
+        service = CheckoutHistoryService(history_repo, book_repo, FileCheckoutTransaction(book_repo, history_repo))
+        service.checkout_book("id-1")
+        assert available(books_file, "id-1") is False
+        assert len(history_repo.get_active_checkouts_by_book_id("id-1")) == 1
+        assert not (books_file.parent / "books.json.checkout").exists()
+
+        service.checkin_book("id-1")
+        assert available(books_file, "id-1") is True
+        assert history_repo.get_active_checkouts_by_book_id("id-1") == []
+
+    def test_crash_between_the_writes_is_finished_on_the_next_start(self, repos, books_file, monkeypatch):
+        book_repo, history_repo = repos
+        transaction = FileCheckoutTransaction(book_repo, history_repo)
+        record = CheckoutHistory(book_id="id-2", checked_out_time="2025-01-01T10:00:00")
+
+        def crash(_changes):
+            raise OSError("power cut")
+        monkeypatch.setattr(book_repo, "update_book_fields", crash)
+        with pytest.raises(OSError):
+            transaction.commit_checkouts([("id-2", False)], [record])
+        monkeypatch.undo()
+        # the history was saved, the book was not
+        assert available(books_file, "id-2") is True
+        assert (books_file.parent / "books.json.checkout").exists()
+
+        reopened_books = type(book_repo)(str(books_file))
+        reopened_history = type(history_repo)(str(books_file.parent / "checkout_history.json"))
+        FileCheckoutTransaction(reopened_books, reopened_history)
+        assert available(books_file, "id-2") is False
+        assert [r.checkout_history_id for r in reopened_history.get_active_checkouts_by_book_id("id-2")] == [record.checkout_history_id]
+        assert not (books_file.parent / "books.json.checkout").exists()
+
+    def test_second_checkout_of_the_same_book_conflicts(self, repos):
+        book_repo, history_repo = repos
+        transaction = FileCheckoutTransaction(book_repo, history_repo)
+        first = CheckoutHistory(book_id="id-1", checked_out_time="2025-01-01T10:00:00")
+        second = CheckoutHistory(book_id="id-1", checked_out_time="2025-01-01T10:00:01")
+        transaction.commit_checkouts([], [first])
+        with pytest.raises(CheckoutConflictError):
+            transaction.commit_checkouts([], [second])
+        assert len(history_repo.get_active_checkouts_by_book_id("id-1")) == 1
+
+    def test_commit_keeps_edits_made_since_the_books_were_read(self, repos, books_file):
+        book_repo, history_repo = repos
+        transaction = FileCheckoutTransaction(book_repo, history_repo)
+        # another process reprices the book after `book_repo` read it
+        other = type(book_repo)(str(books_file))
+        edited = other.find_book_by_id("id-1")
+        edited.price_usd = 99.0
+        other.update_book(edited)
+        transaction.commit_checkouts([("id-1", False)], [CheckoutHistory(book_id="id-1", checked_out_time="2025-01-01T10:00:00")])
+        stored = type(book_repo)(str(books_file)).find_book_by_id("id-1")
+        assert stored.price_usd == 99.0 and stored.available is False
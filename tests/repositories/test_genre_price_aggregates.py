@@ -0,0 +1,75 @@
+import json
+import random
+import pytest
+from src.domain.book import Book
+from src.repositories.genre_price_aggregates import GenrePriceAggregates
+from src.repositories.indexed_book_repository import IndexedBookRepository
+from src.repositories.journaled_book_repository import JournaledBookRepository
+from src.services.book_analytics_service import BookAnalyticsService
+
+def make_books(n, seed=0):
+    rng = random.Random(seed)
+    genres = ["Fantasy", "Mystery", "Romance", None]
+    return [
+        Book(title=f"T{i}", author="A", book_id=f"id-{i}", genre=rng.choice(genres),
+             price_usd=None if i % 7 == 0 else round(rng.uniform(1, 50), 2))
+        for i in range(n)
+    ]
+
+def assert_matches_analytics(aggregates, books):
+    analytics = BookAnalyticsService()
+    assert aggregates.average_price() == pytest.approx(analytics.average_price(books))
+    assert aggregates.median_price_by_genre() == pytest.approx(analytics.median_price_by_genre(books))
+
+class TestGenrePriceAggregates:
+
+    def test_matches_full_recompute(self):
+        books = make_books(200)
+        assert_matches_analytics(GenrePriceAggregates.from_books(books), books)
+
+    def test_remove_and_replace_stay_exact(self):
+        books = make_books(100)
+        aggregates = GenrePriceAggregates.from_books(books)
+        for book in books[:40]:
+            aggregates.remove(book)
+        changed = Book(title="T50", author="A", book_id="id-50", genre="Mystery", price_usd=99.0)
+        aggregates.replace(books[50], changed)
+        remaining = books[40:50] + [changed] + books[51:]
+        assert_matches_analytics(aggregates, remaining)
+
+    def test_empty_genre_is_dropped(self):
+        book = Book(title="P", author="A", book_id="a", genre="Poetry", price_usd=5.0)
+        aggregates = GenrePriceAggregates.from_books([book])
+        aggregates.remove(book)
+        assert aggregates.median_price_by_genre() == {}
+        assert aggregates.count_by_genre() == {}
+
+    def test_string_and_junk_prices_match_analytics(self):
+        prices = ["12.5", 20, "n/a", True, float("inf"), "7", None]
+        books = [Book(title=f"T{i}", author="A", book_id=f"id-{i}", genre="Drama", price_usd=p) for i, p in enumerate(prices)]
+        aggregates = GenrePriceAggregates.from_books(books)
+        assert aggregates.count_by_genre() == {"Drama": 3}
+        assert_matches_analytics(aggregates, books)
+
+    def test_even_count_median_is_midpoint(self):
+        books = [Book(title="D", author="A", book_id=str(i), genre="Drama", price_usd=p) for i, p in enumerate([4.0, 1.0, 3.0, 2.0])]
+        assert GenrePriceAggregates.from_books(books).median_price("Drama") == 2.5
+
+@pytest.mark.parametrize("repo_type", [IndexedBookRepository, JournaledBookRepository])
+def test_repository_keeps_aggregates_in_step(tmp_path, repo_type):
+    path = tmp_path / "books.json"
+    books = make_books(50)
+    path.write_text(json.dumps([b.to_dict() for b in books]), encoding="utf-8")
+
+    repo = repo_type(str(path))
+    repo.add_book(Book(title="New", author="A", book_id="new", genre="Fantasy", price_usd=12.5))
+    repo.remove_book("id-3")
+    edited = repo._find_book_by_id("id-4")[0]
+    edited.price_usd = 1.0
+    repo.update_book(edited)
+    assert_matches_analytics(repo.price_aggregates, repo.get_all_books())
+
+    # a fresh instance rebuilds from disk and agrees with the live one
+    restarted = repo_type(str(path))
+    assert restarted.price_aggregates.median_price_by_genre() == repo.price_aggregates.median_price_by_genre()
+    assert restarted.price_aggregates.average_price() == repo.price_aggregates.average_price()
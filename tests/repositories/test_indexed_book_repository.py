@@ -0,0 +1,106 @@
+import json
+import threading
+import pytest
+from src.domain.book import Book
+from src.domain.compact_book import CompactBook
+from src.repositories.indexed_book_repository import IndexedBookRepository
+
+@pytest.fixture
+def books_file(tmp_path):
+    path = tmp_path / "books.json"
+    books = [
+        Book(title="Dune", author="Herbert", book_id="id-1", available=True),
+        Book(title="Emma", author="Austen", book_id="id-2", available=True),
+        Book(title="Dune", author="Someone Else", book_id="id-3", available=False),
+    ]
+    path.write_text(json.dumps([b.to_dict() for b in books]), encoding="utf-8")
+    return path
+
+def read_ids(path):
+    return [item["book_id"] for item in json.loads(path.read_text(encoding="utf-8"))]
+
+class TestIndexedBookRepository:
+
+    def test_get_all_books_keeps_file_order(self, books_file):
+        repo = IndexedBookRepository(str(books_file))
+        assert [b.book_id for b in repo.get_all_books()] == ["id-1", "id-2", "id-3"]
+
+    def test_find_book_by_name_returns_every_match(self, books_file):
+        repo = IndexedBookRepository(str(books_file))
+        result = repo.find_book_by_name("Dune")
+        assert [b.book_id for b in result] == ["id-1", "id-3"]
+        assert repo.find_book_by_name("Missing") == []
+
+    def test_add_book_writes_through(self, books_file):
+        repo = IndexedBookRepository(str(books_file))
+        repo.add_book(Book(title="Ulysses", author="Joyce", book_id="id-4"))
+        assert read_ids(books_file) == ["id-1", "id-2", "id-3", "id-4"]
+        assert repo.find_book_by_name("Ulysses")[0].book_id == "id-4"
+
+    def test_remove_book_updates_indexes_and_file(self, books_file):
+        repo = IndexedBookRepository(str(books_file))
+        assert repo.remove_book("id-1") == "Book id-1 Successfully Removed"
+        assert [b.book_id for b in repo.find_book_by_name("Dune")] == ["id-3"]
+        assert read_ids(books_file) == ["id-2", "id-3"]
+        assert repo.remove_book("id-1") == "Book id-1 Not Found"
+
+    def test_update_book_reindexes_title(self, books_file):
+        repo = IndexedBookRepository(str(books_file))
+        book = repo.find_book_by_name("Emma")[0]
+        book.title = "Persuasion"
+        repo.update_book(book)
+        assert repo.find_book_by_name("Emma") == []
+        assert repo.find_book_by_name("Persuasion")[0].book_id == "id-2"
+        assert IndexedBookRepository(str(books_file)).find_book_by_name("Persuasion")
+
+    def test_returned_books_are_copies(self, books_file):
+        repo = IndexedBookRepository(str(books_file))
+        repo.get_all_books()[0].available = False
+        assert repo.find_book_by_name("Dune")[0].available is True
+
+    def test_failed_write_leaves_indexes_untouched(self, books_file, monkeypatch):
+        repo = IndexedBookRepository(str(books_file))
+        def fail(_books):
+            raise OSError("disk full")
+        monkeypatch.setattr(repo, "_write_books", fail)
+        with pytest.raises(OSError):
+            repo.add_book(Book(title="Ulysses", author="Joyce", book_id="id-4"))
+        with pytest.raises(OSError):
+            repo.remove_book("id-1")
+        assert [b.book_id for b in repo.get_all_books()] == ["id-1", "id-2", "id-3"]
+        assert repo.find_book_by_name("Ulysses") == []
+
+    def test_edit_book_uses_indexes(self, books_file, monkeypatch):
+        repo = IndexedBookRepository(str(books_file))
+        book = repo.find_book_by_name("Emma")[0]
+        monkeypatch.setattr("builtins.input", lambda _: "12.5")
+        assert "Successfully changed" in repo.edit_book(book, "price_usd")
+        assert repo.find_book_by_name("Emma")[0].price_usd == 12.5
+
+def test_indexed_repository_can_hold_compact_books(books_file):
+    repo = IndexedBookRepository(str(books_file), book_type=CompactBook)
+    assert all(isinstance(b, CompactBook) for b in repo.get_all_books())
+    repo.add_book(CompactBook(title="Ulysses", author="Joyce", book_id="id-4"))
+    assert IndexedBookRepository(str(books_file)).find_book_by_name("Ulysses")[0].book_id == "id-4"
+
+def test_writes_pick_up_another_instance_and_keep_every_book(books_file):
+    first = IndexedBookRepository(str(books_file))
+    second = IndexedBookRepository(str(books_file))
+    first.add_book(Book(title="Ulysses", author="Joyce", book_id="id-4"))
+    second.add_book(Book(title="Walden", author="Thoreau", book_id="id-5"))
+    assert [b.book_id for b in IndexedBookRepository(str(books_file)).get_all_books()] == ["id-1", "id-2", "id-3", "id-4", "id-5"]
+    first.refresh()
+    assert first.find_book_by_name("Walden")[0].book_id == "id-5"
+
+def test_concurrent_indexed_writers_keep_every_book(books_file):
+    def add(worker):
+        repo = IndexedBookRepository(str(books_file))
+        for i in range(10):
+            repo.add_book(Book(title=f"T{worker}-{i}", author="A", book_id=f"{worker}-{i}"))
+
+    threads = [threading.Thread(target=add, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(IndexedBookRepository(str(books_file)).get_all_books()) == 43
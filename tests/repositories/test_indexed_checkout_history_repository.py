@@ -0,0 +1,69 @@
+import json
+import threading
+from src.domain.book import Book
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.indexed_checkout_history_repository import IndexedCheckoutHistoryRepository
+from src.services.checkout_history_service import CheckoutHistoryService
+from tests.mocks.mock_book_repository import MockBookRepo
+
+def make_repo(tmp_path, records=()):
+    path = tmp_path / "checkout_history.json"
+    path.write_text(json.dumps([r.to_dict() for r in records]), encoding="utf-8")
+    return IndexedCheckoutHistoryRepository(str(path)), path
+
+class TestIndexedCheckoutHistoryRepository:
+
+    def test_loads_indexes_from_file(self, tmp_path):
+        records = [
+            CheckoutHistory(book_id="b1", checked_out_time="2025-01-01", checked_in_time="2025-01-02", checkout_history_id="h1"),
+            CheckoutHistory(book_id="b1", checked_out_time="2025-01-03", checkout_history_id="h2"),
+            CheckoutHistory(book_id="b2", checked_out_time="2025-01-04", checked_in_time="2025-01-05", checkout_history_id="h3"),
+        ]
+        repo, _ = make_repo(tmp_path, records)
+        assert [h.checkout_history_id for h in repo.get_checkout_history_by_book_id("b1")] == ["h1", "h2"]
+        assert [h.checkout_history_id for h in repo.get_active_checkouts_by_book_id("b1")] == ["h2"]
+        assert repo.get_active_checkouts_by_book_id("b2") == []
+        assert repo.is_checked_out("b1") and not repo.is_checked_out("b2")
+
+    def test_check_in_removes_from_active_index_and_writes_through(self, tmp_path):
+        repo, path = make_repo(tmp_path)
+        record = CheckoutHistory(book_id="b1", checked_out_time="2025-01-01", checkout_history_id="h1")
+        repo.add_checkout_history(record)
+        assert repo.is_checked_out("b1")
+
+        record.check_in("2025-01-02")
+        assert repo.is_checked_out("b1"), "indexes only change through the repository"
+        repo.update_checkout_history(record)
+        assert not repo.is_checked_out("b1")
+
+        reopened = IndexedCheckoutHistoryRepository(str(path))
+        assert reopened.get_checkout_history_by_book_id("b1")[0].checked_in_time == "2025-01-02"
+
+    def test_update_unknown_record(self, tmp_path):
+        repo, _ = make_repo(tmp_path)
+        record = CheckoutHistory(book_id="b1", checked_out_time="2025-01-01", checkout_history_id="nope")
+        assert repo.update_checkout_history(record) == "Checkout history nope not found"
+
+    def test_service_checkout_cycle(self, tmp_path):
+        repo, _ = make_repo(tmp_path)
+        service = CheckoutHistoryService(repo, MockBookRepo())
+        service.checkout_book("test-id-1")
+        service.checkin_book("test-id-1")
+        service.checkout_book("test-id-1")
+        assert len(repo.get_checkout_history_by_book_id("test-id-1")) == 2
+        assert len(repo.get_active_checkouts_by_book_id("test-id-1")) == 1
+
+    def test_concurrent_instances_keep_every_record(self, tmp_path):
+        _, path = make_repo(tmp_path)
+
+        def add(worker):
+            repo = IndexedCheckoutHistoryRepository(str(path))
+            for i in range(10):
+                repo.add_checkout_history(CheckoutHistory(book_id=f"b{worker}", checked_out_time="2025-01-01", checkout_history_id=f"{worker}-{i}"))
+
+        threads = [threading.Thread(target=add, args=(w,)) for w in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(IndexedCheckoutHistoryRepository(str(path)).get_all_checkout_history()) == 40
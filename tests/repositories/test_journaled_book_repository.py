@@ -0,0 +1,313 @@
+import json
+import multiprocessing
+import os
+import threading
+import pytest
+from src.domain.book import Book
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.checkout_transaction_protocol import CheckoutConflictError
+from src.repositories.indexed_checkout_history_repository import IndexedCheckoutHistoryRepository
+from src.repositories.journaled_book_repository import JournaledBookRepository
+from src.services.checkout_history_service import CheckoutHistoryService
+
+@pytest.fixture
+def books_file(tmp_path):
+    path = tmp_path / "books.json"
+    books = [
+        Book(title="Dune", author="Herbert", book_id="id-1", available=True),
+        Book(title="Emma", author="Austen", book_id="id-2", available=True),
+    ]
+    path.write_text(json.dumps([b.to_dict() for b in books]), encoding="utf-8")
+    return path
+
+class TestJournaledBookRepository:
+
+    def test_mutations_append_to_log_without_touching_snapshot(self, books_file):
+        snapshot = books_file.read_text(encoding="utf-8")
+        repo = JournaledBookRepository(str(books_file), fsync=False)
+        repo.add_book(Book(title="Ulysses", author="Joyce", book_id="id-3"))
+        repo.remove_book("id-1")
+
+        assert books_file.read_text(encoding="utf-8") == snapshot
+        log_lines = (books_file.parent / "books.json.log").read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["op"] for line in log_lines] == ["put", "remove"]
+
+    def test_reload_replays_snapshot_plus_log(self, books_file):
+        repo = JournaledBookRepository(str(books_file), fsync=False)
+        repo.add_book(Book(title="Ulysses", author="Joyce", book_id="id-3"))
+        book = repo.find_book_by_name("Emma")[0]
+        book.available = False
+        repo.update_book(book)
+        repo.remove_book("id-1")
+
+        reopened = JournaledBookRepository(str(books_file), fsync=False)
+        assert [b.book_id for b in reopened.get_all_books()] == ["id-2", "id-3"]
+        assert reopened.find_book_by_name("Emma")[0].available is False
+
+    def test_compaction_folds_log_into_snapshot(self, books_file):
+        repo = JournaledBookRepository(str(books_file), compact_threshold=2, fsync=False)
+        repo.add_book(Book(title="Ulysses", author="Joyce", book_id="id-3"))
+        repo.remove_book("id-1")
+
+        assert (books_file.parent / "books.json.log").read_text(encoding="utf-8") == ""
+        snapshot_ids = [item["book_id"] for item in json.loads(books_file.read_text(encoding="utf-8"))]
+        assert snapshot_ids == ["id-2", "id-3"]
+        assert repo.log_records == 0
+
+    def test_torn_final_record_is_truncated(self, books_file):
+        repo = JournaledBookRepository(str(books_file), fsync=False)
+        repo.add_book(Book(title="Ulysses", author="Joyce", book_id="id-3"))
+        log_path = books_file.parent / "books.json.log"
+        good = log_path.read_bytes()
+        with open(log_path, "ab") as f:
+            f.write(b'{"op": "remove", "book_')
+
+        reopened = JournaledBookRepository(str(books_file), fsync=False)
+        assert [b.book_id for b in reopened.get_all_books()] == ["id-1", "id-2", "id-3"]
+        # loading holds only the shared lock, the next writer cuts the tail off
+        assert log_path.read_bytes() != good
+        reopened.remove_book("id-1")
+        assert log_path.read_bytes().startswith(good)
+        assert [json.loads(line)["op"] for line in log_path.read_text(encoding="utf-8").splitlines()] == ["put", "remove"]
+
+    def test_short_writes_still_append_the_whole_record(self, books_file, monkeypatch):
+        real_write = os.write
+        monkeypatch.setattr(os, "write", lambda fd, data: real_write(fd, bytes(data[:5])))
+        repo = JournaledBookRepository(str(books_file), fsync=False)
+        repo.add_book(Book(title="Ulysses", author="Joyce", book_id="id-3"))
+        monkeypatch.undo()
+
+        reopened = JournaledBookRepository(str(books_file), fsync=False)
+        assert [b.book_id for b in reopened.get_all_books()] == ["id-1", "id-2", "id-3"]
+
+    def test_works_without_flock_or_positional_io(self, books_file, monkeypatch):
+        # what Windows offers: no fcntl, no os.pread / os.pwrite
+        monkeypatch.setattr("src.repositories.file_lock.fcntl", None)
+        monkeypatch.delattr(os, "pread")
+        monkeypatch.delattr(os, "pwrite")
+        repo = JournaledBookRepository(str(books_file), fsync=True, compact_threshold=2)
+        repo.add_book(Book(title="Ulysses", author="Joyce", book_id="id-3"))
+        repo.remove_book("id-1")
+        assert repo.generation == 1
+        reopened = JournaledBookRepository(str(books_file), fsync=False)
+        assert reopened.generation == 1
+        assert [b.book_id for b in reopened.get_all_books()] == ["id-2", "id-3"]
+
+    def test_corrupt_record_in_the_middle_raises(self, books_file):
+        log_path = books_file.parent / "books.json.log"
+        log_path.write_text('not json\n{"op": "remove", "book_id": "id-1"}\n', encoding="utf-8")
+        with pytest.raises(ValueError):
+            JournaledBookRepository(str(books_file), fsync=False)
+
+    def test_add_books_is_a_single_log_record(self, books_file):
+        repo = JournaledBookRepository(str(books_file), fsync=False)
+        added = repo.add_books([
+            Book(title="Ulysses", author="Joyce", book_id="id-3"),
+            Book(title="Dune", author="Herbert", book_id="id-1"),
+        ])
+        assert added == ["id-3"]
+        assert repo.log_records == 1
+        reopened = JournaledBookRepository(str(books_file), fsync=False)
+        assert [b.book_id for b in reopened.get_all_books()] == ["id-1", "id-2", "id-3"]
+
+class TestJournaledCheckouts:
+
+    def _open(self, books_file, **kwargs):
+        history = IndexedCheckoutHistoryRepository(str(books_file.parent / "checkout_history.json"))
+        repo = JournaledBookRepository(str(books_file), fsync=False, history_repo=history, **kwargs)
+        return repo, history, CheckoutHistoryService(history, repo, repo)
+
+    def test_checkout_is_one_log_record_and_no_snapshot_rewrite(self, books_file):
+        snapshot = books_file.read_text(encoding="utf-8")
+        repo, history, service = self._open(books_file)
+        history_path = books_file.parent / "checkout_history.json"
+        history_snapshot = history_path.read_text(encoding="utf-8")
+        service.checkout_book("id-1")
+
+        assert books_file.read_text(encoding="utf-8") == snapshot
+        assert history_path.read_text(encoding="utf-8") == history_snapshot
+        log_lines = (books_file.parent / "books.json.log").read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["op"] for line in log_lines] == ["checkout"]
+        assert repo.find_book_by_id("id-1").available is False
+        assert len(history.get_active_checkouts_by_book_id("id-1")) == 1
+
+    def test_reload_restores_book_and_history_together(self, books_file):
+        _, _, service = self._open(books_file)
+        service.checkout_book("id-1")
+        service.checkout_book("id-2")
+        service.checkin_book("id-1")
+
+        repo, history, _ = self._open(books_file)
+        assert repo.find_book_by_id("id-1").available is True
+        assert repo.find_book_by_id("id-2").available is False
+        assert history.get_active_checkouts_by_book_id("id-1") == []
+        assert len(history.get_checkout_history_by_book_id("id-1")) == 1
+        assert len(history.get_active_checkouts_by_book_id("id-2")) == 1
+
+    def test_torn_checkout_drops_both_halves(self, books_file):
+        _, _, service = self._open(books_file)
+        service.checkout_book("id-1")
+        log_path = books_file.parent / "books.json.log"
+        line = log_path.read_bytes()
+        log_path.write_bytes(line[:len(line) // 2])
+
+        repo, history, _ = self._open(books_file)
+        assert repo.find_book_by_id("id-1").available is True
+        assert history.get_checkout_history_by_book_id("id-1") == []
+
+    def test_compaction_writes_history_snapshot(self, books_file):
+        repo, _, service = self._open(books_file, compact_threshold=2)
+        service.checkout_book("id-1")
+        service.checkin_book("id-1")
+
+        assert repo.log_records == 0
+        saved = json.loads((books_file.parent / "checkout_history.json").read_text(encoding="utf-8"))
+        assert len(saved) == 1 and saved[0]["checked_in_time"] is not None
+        _, history, _ = self._open(books_file)
+        assert history.get_active_checkouts_by_book_id("id-1") == []
+
+    def test_batch_checkout_is_one_log_record(self, books_file):
+        repo, history, service = self._open(books_file)
+        result = service.checkout_books(["id-1", "id-2", "id-9"])
+
+        assert list(result["succeeded"]) == ["id-1", "id-2"]
+        assert list(result["failed"]) == ["id-9"]
+        assert repo.log_records == 1
+        reopened, reopened_history, _ = self._open(books_file)
+        assert not any(b.available for b in reopened.get_all_books())
+        assert set(reopened_history.get_active_checkouts_by_book_ids(["id-1", "id-2"])) == {"id-1", "id-2"}
+
+    def test_checkout_log_without_history_repo_raises(self, books_file):
+        _, _, service = self._open(books_file)
+        service.checkout_book("id-1")
+        with pytest.raises(ValueError):
+            JournaledBookRepository(str(books_file), fsync=False)
+
+def _open_shared(directory, compact_threshold=1000, fsync=False):
+    history = IndexedCheckoutHistoryRepository(str(directory / "checkout_history.json"))
+    repo = JournaledBookRepository(str(directory / "books.json"), compact_threshold=compact_threshold, fsync=fsync, history_repo=history)
+    return repo, history, CheckoutHistoryService(history, repo, repo)
+
+def _churn(directory, worker, rounds, compact_threshold, results):
+    done = None
+    try:
+        done = _churn_rounds(directory, worker, rounds, compact_threshold)
+    finally:
+        # report even on a crash, so the test fails fast instead of waiting on the queue
+        results.put((worker, done))
+
+def _churn_rounds(directory, worker, rounds, compact_threshold):
+    """Check the shared books out and in as often as possible, counting what succeeded."""
+    repo, _, service = _open_shared(directory, compact_threshold, fsync=True)
+    done = 0
+    for i in range(rounds):
+        repo.add_book(Book(title=f"w{worker}-{i}", author="Stress", book_id=f"w{worker}-{i}"))
+        for book_id in ("id-1", "id-2"):
+            for step in (service.checkout_book, service.checkin_book):
+                try:
+                    step(book_id)
+                    done += 1
+                except Exception:
+                    # lost the race (or the book was in the other state), nothing was written
+                    pass
+    return done
+
+def _reprice(directory, rounds, results):
+    """Edit a field the checkouts don't own on the books they keep flipping."""
+    done = None
+    try:
+        repo, _, _ = _open_shared(directory, fsync=True)
+        for i in range(rounds):
+            repo.update_book_fields({"id-1": {"price_usd": float(i)}, "id-2": {"price_usd": float(i)}})
+        done = 0
+    finally:
+        results.put(("reprice", done))
+
+class TestConcurrentWriters:
+
+    def test_stale_writer_gets_a_conflict(self, books_file):
+        first, _, first_service = _open_shared(books_file.parent)
+        second, second_history, _ = _open_shared(books_file.parent)
+        first_service.checkout_book("id-1")
+
+        # `second` hasn't refreshed, it still thinks id-1 is on the shelf
+        assert second_history.get_active_checkouts_by_book_id("id-1") == []
+        with pytest.raises(CheckoutConflictError):
+            second.commit_checkouts([("id-1", False)], [CheckoutHistory(book_id="id-1", checked_out_time="2025-01-01")])
+        assert len(second_history.get_active_checkouts_by_book_id("id-1")) == 1
+
+    def test_checkout_keeps_an_edit_made_since_the_book_was_read(self, books_file):
+        first, _, _ = _open_shared(books_file.parent)
+        second, _, _ = _open_shared(books_file.parent)
+        edited = second.find_book_by_id("id-1")
+        edited.price_usd = 99.0
+        second.update_book(edited)
+
+        # `first` still holds the old price in memory
+        first.commit_checkouts([("id-1", False)], [CheckoutHistory(book_id="id-1", checked_out_time="2025-01-01")])
+        for repo in (first, _open_shared(books_file.parent)[0]):
+            stored = repo.find_book_by_id("id-1")
+            assert stored.price_usd == 99.0 and stored.available is False
+
+    def test_writers_see_each_others_appends_and_compactions(self, books_file):
+        first, _, _ = _open_shared(books_file.parent, compact_threshold=2)
+        second, _, _ = _open_shared(books_file.parent, compact_threshold=2)
+        first.add_book(Book(title="Ulysses", author="Joyce", book_id="id-3"))
+        second.add_book(Book(title="Walden", author="Thoreau", book_id="id-4"))
+        first.remove_book("id-1")
+
+        second.refresh()
+        assert [b.book_id for b in second.get_all_books()] == ["id-2", "id-3", "id-4"]
+        assert first.generation == second.generation == 1
+
+    def test_threads_lose_no_updates(self, books_file):
+        repo, history, service = _open_shared(books_file.parent, fsync=True)
+        outcomes = []
+
+        def race():
+            try:
+                service.checkout_book("id-1")
+                outcomes.append("ok")
+            except Exception:
+                outcomes.append("conflict")
+
+        threads = [threading.Thread(target=race) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert outcomes.count("ok") == 1
+        assert len(history.get_checkout_history_by_book_id("id-1")) == 1
+
+    def test_processes_lose_no_updates(self, books_file):
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            pytest.skip("needs fork")
+        workers, rounds = 4, 15
+        results = context.Queue()
+        processes = [
+            context.Process(target=_churn, args=(books_file.parent, w, rounds, 25, results))
+            for w in range(workers)
+        ]
+        processes.append(context.Process(target=_reprice, args=(books_file.parent, 2 * rounds, results)))
+        for p in processes:
+            p.start()
+        done = dict(results.get(timeout=60) for _ in processes)
+        for p in processes:
+            p.join(timeout=60)
+            assert p.exitcode == 0
+        assert None not in done.values()
+
+        repo, history, _ = _open_shared(books_file.parent)
+        # every worker's books arrived, across compactions by the others
+        assert len(repo.get_all_books()) == 2 + workers * rounds
+        records = history.get_all_checkout_history()
+        # each successful checkout wrote one record and each check-in closed one
+        assert 2 * len(records) - sum(r.is_checked_out() for r in records) == sum(done.values())
+        for book_id in ("id-1", "id-2"):
+            out = history.get_active_checkouts_by_book_id(book_id)
+            assert len(out) <= 1
+            assert repo.find_book_by_id(book_id).available is (not out)
+            # no checkout wrote back a stale copy over the last repricing
+            assert repo.find_book_by_id(book_id).price_usd == 2 * rounds - 1
@@ -0,0 +1,59 @@
+import json
+import os
+from src.domain.book import Book
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.book_repository import BookRepository
+from src.repositories.checkout_history_repository import CheckoutHistoryRepository
+from src.repositories.parsed_file_cache import ParsedFileCache
+
+def write_books(path, books):
+    path.write_text(json.dumps([b.to_dict() for b in books]), encoding="utf-8")
+
+class TestParsedFileCache:
+
+    def test_repeated_reads_hit_the_cache(self, tmp_path):
+        path = tmp_path / "books.json"
+        write_books(path, [Book(title="Dune", author="Herbert", book_id="id-1")])
+        cache = ParsedFileCache()
+        repo = BookRepository(str(path), cache=cache)
+
+        repo.get_all_books()
+        repo.get_all_books()
+        repo.find_book_by_name("Dune")
+        assert cache.stats() == {"hits": 2, "misses": 1, "entries": 1}
+
+    def test_returned_books_do_not_leak_into_the_cache(self, tmp_path):
+        path = tmp_path / "books.json"
+        write_books(path, [Book(title="Dune", author="Herbert", book_id="id-1", available=True)])
+        repo = BookRepository(str(path), cache=ParsedFileCache())
+        repo.get_all_books()[0].available = False
+        assert repo.get_all_books()[0].available is True
+
+    def test_own_writes_invalidate(self, tmp_path):
+        path = tmp_path / "books.json"
+        write_books(path, [Book(title="Dune", author="Herbert", book_id="id-1")])
+        cache = ParsedFileCache()
+        repo = BookRepository(str(path), cache=cache)
+        repo.get_all_books()
+        repo.add_book(Book(title="Emma", author="Austen", book_id="id-2"))
+        assert len(repo.get_all_books()) == 2
+        assert cache.misses == 2
+
+    def test_external_change_is_detected(self, tmp_path):
+        path = tmp_path / "books.json"
+        write_books(path, [Book(title="Dune", author="Herbert", book_id="id-1")])
+        repo = BookRepository(str(path), cache=ParsedFileCache())
+        repo.get_all_books()
+
+        write_books(path, [Book(title="Dune", author="Herbert", book_id="id-1"), Book(title="Emma", author="Austen")])
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert len(repo.get_all_books()) == 2
+
+    def test_checkout_history_repository_uses_cache(self, tmp_path):
+        cache = ParsedFileCache()
+        repo = CheckoutHistoryRepository(str(tmp_path / "checkout_history.json"), cache=cache)
+        repo.add_checkout_history(CheckoutHistory(book_id="b1", checked_out_time="2025-01-01"))
+        assert len(repo.get_active_checkouts_by_book_id("b1")) == 1
+        assert len(repo.get_checkout_history_by_book_id("b1")) == 1
+        assert cache.hits == 1
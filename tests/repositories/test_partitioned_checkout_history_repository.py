@@ -0,0 +1,118 @@
+import gzip
+import json
+import os
+import threading
+import pytest
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.parsed_file_cache import ParsedFileCache
+from src.repositories.partitioned_checkout_history_repository import (
+    PartitionedCheckoutHistoryRepository,
+    partition_checkout_history,
+)
+from src.services.checkout_history_service import CheckoutHistoryService
+from tests.mocks.mock_book_repository import MockBookRepo
+
+RECORDS = [
+    CheckoutHistory(book_id="b1", checked_out_time="2025-01-05T10:00:00", checked_in_time="2025-01-09T10:00:00", checkout_history_id="h1"),
+    CheckoutHistory(book_id="b2", checked_out_time="2025-02-01T10:00:00", checked_in_time="2025-02-03T10:00:00", checkout_history_id="h2"),
+    CheckoutHistory(book_id="b1", checked_out_time="2025-03-02T10:00:00", checkout_history_id="h3"),
+]
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = PartitionedCheckoutHistoryRepository(str(tmp_path / "history"))
+    repo.save_checkout_histories(RECORDS)
+    return repo
+
+class TestPartitionedCheckoutHistoryRepository:
+
+    def test_closed_records_go_to_month_segments_and_open_ones_stay_hot(self, repo):
+        assert sorted(os.listdir(repo.directory)) == ["2025-01.json", "2025-02.json", "open.json"]
+        assert [h.checkout_history_id for h in repo.get_active_checkouts_by_book_id("b1")] == ["h3"]
+        assert [h.checkout_history_id for h in repo.get_checkout_history_by_book_id("b1")] == ["h1", "h3"]
+
+    def test_check_in_moves_record_out_of_the_hot_segment(self, repo):
+        record = repo.get_active_checkouts_by_book_id("b1")[0]
+        record.check_in("2025-03-04T10:00:00")
+        assert repo.update_checkout_history(record).startswith("Successfully")
+
+        assert repo.get_active_checkouts_by_book_id("b1") == []
+        with open(os.path.join(repo.directory, "2025-03.json"), encoding="utf-8") as f:
+            assert [item["checkout_history_id"] for item in json.load(f)] == ["h3"]
+        assert "not found" in repo.update_checkout_history(CheckoutHistory(book_id="x", checked_out_time="2025-03-01", checked_in_time="2025-03-02"))
+
+    def test_range_query_reads_only_overlapping_segments(self, repo, monkeypatch):
+        read = []
+        original = repo._read
+        monkeypatch.setattr(repo, "_read", lambda path: read.append(os.path.basename(path)) or original(path))
+
+        found = repo.get_checkout_history_between("2025-02-01", "2025-04-01")
+
+        assert [h.checkout_history_id for h in found] == ["h2", "h3"]
+        assert read == ["2025-02.json"]
+
+    def test_archive_compresses_and_freezes_old_segments(self, repo):
+        # h3 is still out, so March and later stay writable whatever `before` says
+        assert repo.archive("2025-12") == ["2025-01", "2025-02"]
+
+        archive = os.path.join(repo.directory, "2025-01.json.gz")
+        assert os.stat(archive).st_mode & 0o222 == 0
+        with gzip.open(archive, "rt", encoding="utf-8") as f:
+            assert [item["checkout_history_id"] for item in json.load(f)] == ["h1"]
+        assert [h.checkout_history_id for h in repo.get_all_checkout_history()] == ["h1", "h2", "h3"]
+
+        late = CheckoutHistory(book_id="b9", checked_out_time="2025-01-20", checked_in_time="2025-01-21")
+        with pytest.raises(ValueError):
+            repo.add_checkout_history(late)
+
+        # the open loan can still be returned after archiving
+        record = repo.get_active_checkouts_by_book_id("b1")[0]
+        record.check_in("2025-03-04T10:00:00")
+        repo.update_checkout_history(record)
+        assert repo.get_active_checkouts_by_book_id("b1") == []
+
+    def test_archived_segments_are_served_from_the_cache(self, tmp_path):
+        cache = ParsedFileCache()
+        repo = PartitionedCheckoutHistoryRepository(str(tmp_path / "history"), cache=cache)
+        repo.save_checkout_histories(RECORDS[:2])
+        repo.archive("2025-03")
+        repo.get_all_checkout_history()
+        repo.get_all_checkout_history()
+        assert cache.stats()["hits"] == 2
+
+def test_partition_checkout_history_runs_once(tmp_path):
+    source = tmp_path / "checkout_history.json"
+    source.write_text(json.dumps([r.to_dict() for r in RECORDS]), encoding="utf-8")
+    directory = str(tmp_path / "history")
+
+    assert partition_checkout_history(str(source), directory) is True
+    assert partition_checkout_history(str(source), directory) is False
+    repo = PartitionedCheckoutHistoryRepository(directory)
+    assert [h.checkout_history_id for h in repo.get_all_checkout_history()] == ["h1", "h2", "h3"]
+
+def test_service_checkout_cycle(tmp_path):
+    book_repo = MockBookRepo()
+    repo = PartitionedCheckoutHistoryRepository(str(tmp_path / "history"))
+    service = CheckoutHistoryService(repo, book_repo)
+
+    service.checkout_books(["test-id-1"])
+    assert len(repo.get_active_checkouts_by_book_id("test-id-1")) == 1
+    service.checkin_book("test-id-1")
+    assert repo.get_active_checkouts_by_book_id("test-id-1") == []
+    assert len(service.get_checkout_history_for_book("test-id-1")) == 1
+
+def test_concurrent_writers_keep_every_record(tmp_path):
+    directory = str(tmp_path / "history")
+
+    def add(worker):
+        repo = PartitionedCheckoutHistoryRepository(directory)
+        for i in range(10):
+            repo.add_checkout_history(CheckoutHistory(book_id=f"b{worker}", checked_out_time="2025-01-01T10:00:00", checkout_history_id=f"{worker}-{i}"))
+
+    threads = [threading.Thread(target=add, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(PartitionedCheckoutHistoryRepository(directory).get_all_checkout_history()) == 40
+    assert "open.json.lock" not in os.listdir(directory)
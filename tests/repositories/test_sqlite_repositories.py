@@ -0,0 +1,152 @@
+import json
+import pytest
+from src.domain.book import Book
+from src.domain.checkout_history import CheckoutHistory
+from src.repositories.book_repository import BookRepository
+from src.repositories.sqlite_book_repository import SqliteBookRepository
+from src.repositories.sqlite_checkout_history_repository import SqliteCheckoutHistoryRepository
+from src.repositories.sqlite_database import connect, migrate_json_to_sqlite
+from src.services.checkout_history_service import CheckoutHistoryService
+
+@pytest.fixture
+def connection():
+    conn = connect(":memory:")
+    yield conn
+    conn.close()
+
+class TestSqliteBookRepository:
+
+    def test_add_and_find_round_trip(self, connection):
+        repo = SqliteBookRepository(connection)
+        repo.add_book(Book(title="Dune", author="Herbert", genre="Sci-Fi", book_id="id-1", available=True, in_print=False))
+        repo.add_book(Book(title="Emma", author="Austen", genre=2, book_id="id-2"))
+
+        dune = repo.find_book_by_name("Dune")[0]
+        assert dune.available is True and dune.in_print is False
+        assert repo.find_book_by_name("Emma")[0].genre == 2
+        assert [b.book_id for b in repo.get_all_books()] == ["id-1", "id-2"]
+
+    def test_update_and_remove(self, connection):
+        repo = SqliteBookRepository(connection)
+        repo.add_book(Book(title="Dune", author="Herbert", book_id="id-1"))
+        book = repo.find_book_by_name("Dune")[0]
+        book.price_usd = 9.99
+        assert repo.update_book(book) == "Successfully updated book id-1"
+        assert repo.find_book_by_name("Dune")[0].price_usd == 9.99
+
+        assert repo.remove_book("id-1") == "Book id-1 Successfully Removed"
+        assert repo.remove_book("id-1") == "Book id-1 Not Found"
+        assert repo.update_book(book) == "Book id-1 not found"
+
+    def test_projected_rows_convert_bools(self, connection):
+        repo = SqliteBookRepository(connection)
+        repo.add_book(Book(title="Dune", author="Herbert", book_id="id-1", available=True, in_print=False))
+        book = next(repo.iter_books(fields=["available"]))
+        assert book.available is True and book.title is None
+        assert next(repo.iter_books(fields=["in_print"])).in_print is False
+
+    def test_is_not_a_json_file_repository(self, connection):
+        assert not isinstance(SqliteBookRepository(connection), BookRepository)
+
+    def test_edit_book(self, connection, monkeypatch):
+        repo = SqliteBookRepository(connection)
+        repo.add_book(Book(title="Dune", author="Herbert", book_id="id-1"))
+        book = repo.find_book_by_id("id-1")
+        monkeypatch.setattr("builtins.input", lambda _: "12.5")
+        assert "Successfully changed" in repo.edit_book(book, "price_usd")
+        assert repo.find_book_by_id("id-1").price_usd == 12.5
+        assert repo.find_book_by_id("missing") is None
+
+    def test_lookups_use_indexes(self, connection):
+        for column in ("title", "genre", "author", "publication_year"):
+            plan = connection.execute(f"EXPLAIN QUERY PLAN SELECT * FROM books WHERE {column} = ?", (1,)).fetchall()
+            assert "USING INDEX" in plan[0][-1]
+
+class TestSqliteCheckoutHistoryRepository:
+
+    def test_active_checkouts(self, connection):
+        repo = SqliteCheckoutHistoryRepository(connection)
+        record = CheckoutHistory(book_id="id-1", checked_out_time="2025-01-01T00:00:00")
+        repo.add_checkout_history(record)
+        assert len(repo.get_active_checkouts_by_book_id("id-1")) == 1
+
+        record.check_in("2025-01-02T00:00:00")
+        repo.update_checkout_history(record)
+        assert repo.get_active_checkouts_by_book_id("id-1") == []
+        assert repo.get_checkout_history_by_book_id("id-1")[0].checked_in_time == "2025-01-02T00:00:00"
+
+    def test_service_works_against_sqlite(self, connection):
+        book_repo = SqliteBookRepository(connection)
+        book_repo.add_book(Book(title="Dune", author="Herbert", book_id="id-1", available=True))
+        service = CheckoutHistoryService(SqliteCheckoutHistoryRepository(connection), book_repo)
+
+        service.checkout_book("id-1")
+        assert book_repo.find_book_by_name("Dune")[0].available is False
+        service.checkin_book("id-1")
+        assert book_repo.find_book_by_name("Dune")[0].available is True
+
+    def test_commit_checkouts_is_one_transaction(self, connection):
+        book_repo = SqliteBookRepository(connection)
+        history_repo = SqliteCheckoutHistoryRepository(connection)
+        book_repo.add_book(Book(title="Dune", author="Herbert", book_id="id-1", available=True))
+        service = CheckoutHistoryService(history_repo, book_repo, book_repo)
+
+        service.checkout_book("id-1")
+        assert book_repo.find_book_by_id("id-1").available is False
+        assert len(history_repo.get_active_checkouts_by_book_id("id-1")) == 1
+
+        # a failing statement rolls back the availability change made before it
+        with pytest.raises(Exception):
+            book_repo.commit_checkouts([("id-1", True)], [CheckoutHistory(book_id=None, checked_out_time="2025-01-01")])
+        assert book_repo.find_book_by_id("id-1").available is False
+
+        service.checkin_book("id-1")
+        assert book_repo.find_book_by_id("id-1").available is True
+        assert history_repo.get_active_checkouts_by_book_id("id-1") == []
+
+    def test_update_book_fields_sets_only_those_columns(self, connection):
+        book_repo = SqliteBookRepository(connection)
+        book_repo.add_book(Book(title="Dune", author="Herbert", book_id="id-1", price_usd=10.0, available=True))
+        assert book_repo.update_book_fields({"id-1": {"available": False}, "missing": {"available": False}}) == ["id-1"]
+        book = book_repo.find_book_by_id("id-1")
+        assert book.available is False and book.price_usd == 10.0
+        with pytest.raises(ValueError, match="Unknown book fields"):
+            book_repo.update_book_fields({"id-1": {"nope": 1}})
+
+    def test_batch_checkout_with_and_without_transaction(self, connection):
+        book_repo = SqliteBookRepository(connection)
+        history_repo = SqliteCheckoutHistoryRepository(connection)
+        book_repo.add_books([
+            Book(title="Dune", author="Herbert", book_id="id-1", available=True),
+            Book(title="Emma", author="Austen", book_id="id-2", available=True),
+        ])
+
+        result = CheckoutHistoryService(history_repo, book_repo, book_repo).checkout_books(["id-1", "id-2", "id-3"])
+        assert list(result["succeeded"]) == ["id-1", "id-2"]
+        assert set(history_repo.get_active_checkouts_by_book_ids(["id-1", "id-2", "id-3"])) == {"id-1", "id-2"}
+
+        result = CheckoutHistoryService(history_repo, book_repo).checkin_books(["id-2", "id-1"])
+        assert list(result["succeeded"]) == ["id-2", "id-1"]
+        assert all(b.available for b in book_repo.find_books_by_ids(["id-1", "id-2"]).values())
+        assert history_repo.get_active_checkouts_by_book_ids(["id-1", "id-2"]) == {}
+
+def test_migrate_json_to_sqlite_runs_once(tmp_path, connection):
+    books_path = tmp_path / "books.json"
+    history_path = tmp_path / "checkout_history.json"
+    books_path.write_text(json.dumps([{"book_id": "id-1", "title": "Dune", "author": "Herbert", "available": True}]), encoding="utf-8")
+    history_path.write_text(json.dumps([CheckoutHistory(book_id="id-1", checked_out_time="2025-01-01").to_dict()]), encoding="utf-8")
+
+    assert migrate_json_to_sqlite(connection, str(books_path), str(history_path)) is True
+    assert migrate_json_to_sqlite(connection, str(books_path), str(history_path)) is False
+    assert len(SqliteBookRepository(connection).get_all_books()) == 1
+    assert len(SqliteCheckoutHistoryRepository(connection).get_active_checkouts_by_book_id("id-1")) == 1
+
+def test_sqlite_add_books_ignores_existing_ids(connection):
+    repo = SqliteBookRepository(connection)
+    repo.add_book(Book(title="Dune", author="Herbert", book_id="id-1"))
+    added = repo.add_books([
+        Book(title="Emma", author="Austen", book_id="id-2"),
+        Book(title="Dune", author="Herbert", book_id="id-1"),
+    ])
+    assert added == ["id-2"]
+    assert len(repo.get_all_books()) == 2
@@ -0,0 +1,54 @@
+import json
+import pytest
+from src.services.analytics_benchmark import LOADS, METHODS, catalog_path, compare_to_baseline, main, run_benchmarks
+
+def test_run_benchmarks_reports_every_method_and_size(tmp_path):
+    report = run_benchmarks(sizes=[200, 400], seed=1, warmup=0, repeats=2, data_dir=str(tmp_path))
+    assert set(report["results"]) == {"200", "400"}
+    for methods in report["results"].values():
+        assert set(methods) == set(METHODS) | set(LOADS)
+        assert "warm" not in methods["load:IndexedBookRepository"]
+        for row in methods.values():
+            assert row["cold"]["median_ms"] <= row["cold"]["p95_ms"]
+            assert row["peak_mb"] > 0
+    # catalogs are generated once and reused
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["books_200_seed1.json", "books_400_seed1.json"]
+    json.dumps(report)
+
+def test_compare_to_baseline_flags_changes_over_the_threshold():
+    def report(ms):
+        return {"results": {"1000": {"top_rated": {"cold": {"median_ms": ms}, "warm": {"median_ms": 1.0}}}}}
+    assert compare_to_baseline(report(10.5), report(10.0)) == []
+    load = {"results": {"1000": {"load:IndexedBookRepository": {"cold": {"median_ms": 30.0}}}}}
+    slower = compare_to_baseline(load, {"results": {"1000": {"load:IndexedBookRepository": {"cold": {"median_ms": 10.0}}}}})
+    assert len(slower) == 1
+    assert slower[0]["regression"] and slower[0]["method"] == "load:IndexedBookRepository"
+    changes = compare_to_baseline(report(15.0), report(10.0))
+    assert len(changes) == 1
+    change = changes[0]
+    assert change["mode"] == "cold" and change["regression"] and change["change_pct"] == 50.0
+
+def test_main_writes_json_and_diffs_against_a_baseline(tmp_path, capsys):
+    output = tmp_path / "run.json"
+    args = ["--sizes", "150", "--repeats", "1", "--warmup", "0", "--methods", "top_rated", "--loads", "--data-dir", str(tmp_path)]
+    assert main(args + ["--output", str(output)]) == 0
+    assert main(args + ["--baseline", str(output), "--threshold", "1000"]) == 0
+    assert "No changes beyond the threshold." in capsys.readouterr().out
+
+def test_small_catalogs_without_books_from_any_fixed_year_still_run(tmp_path):
+    report = run_benchmarks(sizes=[3], seed=2, warmup=0, repeats=1, methods=["most_popular_genre"], loads=[], data_dir=str(tmp_path))
+    assert "most_popular_genre" in report["results"]["3"]
+
+def test_unknown_names_are_reported_as_methods_or_loads():
+    with pytest.raises(ValueError, match="Unknown methods: \\['nope'\\]"):
+        run_benchmarks(methods=["nope"])
+    with pytest.raises(ValueError, match="Unknown loads: \\['load:nope'\\]"):
+        run_benchmarks(loads=["load:nope"])
+
+def test_the_same_seed_generates_the_same_catalog(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    first = catalog_path(str(tmp_path / "a"), 20, 7)
+    second = catalog_path(str(tmp_path / "b"), 20, 7)
+    with open(first, encoding="utf-8") as f, open(second, encoding="utf-8") as g:
+        assert f.read() == g.read()
@@ -0,0 +1,88 @@
+import json
+import pytest
+from src.domain.book import Book
+from src.services import approximate_analytics_service
+from src.services.approximate_analytics_service import ApproximateAnalyticsService, compare_with_exact
+from src.services.book_batch import BookBatch
+from src.services.book_generator_service_V2 import generate_books_json
+from src.services.sketches import CountMinSketch, HyperLogLog, KllSketch
+import numpy as np
+
+@pytest.fixture(scope="module")
+def books(tmp_path_factory):
+    path = tmp_path_factory.mktemp("catalog") / "books.json"
+    generate_books_json(str(path), count=5000, seed=11)
+    return [Book.from_dict(item) for item in json.loads(path.read_text(encoding="utf-8"))]
+
+class TestSketches:
+
+    def test_kll_median_rank_error_is_small(self):
+        values = np.random.default_rng(1).normal(size=50_000)
+        kll = KllSketch.for_error(0.01, seed=1)
+        kll.update_many(values.tolist())
+        rank = np.searchsorted(np.sort(values), kll.quantile(0.5)) / len(values)
+        assert abs(rank - 0.5) < 0.02
+        assert len(kll) < 2000
+
+    def test_kll_update_many_matches_update(self):
+        values = np.random.default_rng(2).normal(size=5000).tolist()
+        one_by_one, chunked = KllSketch(50, seed=3), KllSketch(50, seed=3)
+        for value in values:
+            one_by_one.update(value)
+        chunked.update_many(values[:1234])
+        chunked.update_many(values[1234:])
+        assert chunked._compactors == one_by_one._compactors
+
+    def test_kll_merge_equals_union(self):
+        left, right = KllSketch(200, seed=1), KllSketch(200, seed=2)
+        left.update_many(range(0, 10_000))
+        right.update_many(range(10_000, 20_000))
+        left.merge(right)
+        assert left.count == 20_000
+        assert abs(left.quantile(0.5) - 10_000) < 400
+
+    def test_hyperloglog_estimate_and_merge(self):
+        a, b = HyperLogLog(12), HyperLogLog(12)
+        a.update_many(f"author-{i}" for i in range(30_000))
+        b.update_many(f"author-{i}" for i in range(20_000, 50_000))
+        a.merge(b)
+        assert a.estimate() == pytest.approx(50_000, rel=0.05)
+
+    def test_hyperloglog_small_counts_are_near_exact(self):
+        hll = HyperLogLog.for_error(0.02)
+        hll.update_many(["a", "b", "c", "a"])
+        assert round(hll.estimate()) == 3
+
+    def test_count_min_never_undercounts(self):
+        cm = CountMinSketch(epsilon=0.01, delta=0.01)
+        keys = [f"k{i % 50}" for i in range(5000)]
+        cm.update_many(keys)
+        for i in range(50):
+            assert 100 <= cm.estimate(f"k{i}") <= 100 + 0.01 * 5000
+
+class TestApproximateAnalyticsService:
+
+    def test_comparison_stays_within_the_configured_bounds(self, books):
+        report = compare_with_exact(books, ApproximateAnalyticsService(quantile_error=0.01, distinct_error=0.02))
+        assert report["median_price_by_genre"]["approx"].keys() == report["median_price_by_genre"]["exact"].keys()
+        assert report["median_price_by_genre"]["max_rank_error"] < 0.03
+        assert report["distinct_authors"]["relative_error"] < 0.06
+        assert report["distinct_publishers"]["relative_error"] < 0.06
+        assert 0 <= report["genre_counts"]["max_overcount"] <= report["genre_counts"]["bound"]
+
+    def test_batch_and_stream_give_the_same_sketch(self, books):
+        service = ApproximateAnalyticsService(seed=4)
+        assert service.median_price_by_genre(BookBatch.from_books(books)) == service.median_price_by_genre(iter(books))
+        assert service.genre_counts(books) == service.genre_counts(BookBatch.from_books(books))
+
+    def test_stream_split_into_chunks_matches_the_batch(self, books, monkeypatch):
+        monkeypatch.setattr(approximate_analytics_service, "CHUNK_ROWS", 700)
+        service = ApproximateAnalyticsService(seed=4)
+        assert service.median_price_by_genre(iter(books)) == service.median_price_by_genre(BookBatch.from_books(books))
+        assert service.distinct_authors(iter(books)) == service.distinct_authors(BookBatch.from_books(books))
+
+    def test_versioned_batch_is_sketched_once(self, books):
+        service = ApproximateAnalyticsService()
+        batch = BookBatch.from_books(books, version=1)
+        assert service.sketch(batch) is service.sketch(batch)
+        assert service.sketch(BookBatch.from_books(books, version=2)) is not service.sketch(batch)
@@ -1,6 +1,9 @@
 import pytest
 from src.services.book_analytics_service import BookAnalyticsService
 from src.domain.book import Book
+from src.services.book_batch import BookBatch
+from src.services.book_service import BookService
+from tests.mocks.mock_book_repository import MockBookRepo
 
 class TestBookAnalyticsService:
     
@@ -103,3 +106,57 @@ class TestBookAnalyticsService:
         ]
         with pytest.raises(IndexError):
             service.most_popular_genre(books, year=2021)
+
+class TestBookAnalyticsFrameCache:
+
+    def books(self):
+        return [
+            Book(title="Book 1", author="Author 1", book_id="id1", genre=1, price_usd=10.0, average_rating=4.0, ratings_count=100),
+            Book(title="Book 2", author="Author 2", book_id="id2", genre=1, price_usd=20.0, average_rating=5.0, ratings_count=1000),
+        ]
+
+    def test_plain_lists_are_not_cached_and_read_only_needed_columns(self, monkeypatch):
+        service = BookAnalyticsService()
+        builds = []
+        original = BookBatch.from_books
+        monkeypatch.setattr(BookBatch, "from_books", lambda books, version=None, columns=None: builds.append(columns) or original(books, version, columns))
+
+        books = self.books()
+        assert service.average_price(books) == 15.0
+        assert builds == [["price_usd"]]
+        assert service._frame_cache is None
+
+        # mutated in place, the next call still sees it
+        books[0].price_usd = 30.0
+        assert service.average_price(books) == 25.0
+        assert service.median_price_by_genre(books) == {1: 25.0}
+        assert builds[-1] == ["genre", "price_usd"]
+
+    def test_versioned_batch_is_trusted_until_version_changes(self):
+        service = BookAnalyticsService()
+        batch = BookBatch.from_books(self.books(), version=1)
+        assert service.average_price(batch) == 15.0
+        frame = service._frame_cache
+        # same version, different object: the cached frame is kept
+        service.average_price(BookBatch.from_books(self.books(), version=1))
+        assert service._frame_cache is frame
+
+        other = BookBatch.from_books(self.books()[:1], version=2)
+        assert service.average_price(other) == 10.0
+
+    def test_invalidate_forces_rebuild(self):
+        service = BookAnalyticsService()
+        batch = BookBatch.from_books(self.books(), version=1)
+        service.average_price(batch)
+        frame = service._frame_cache
+        service.invalidate()
+        service.average_price(batch)
+        assert service._frame_cache is not frame
+
+    def test_book_service_reuses_batch_until_repository_writes(self):
+        repo = MockBookRepo()
+        svc = BookService(repo)
+        first = svc.get_book_batch()
+        assert svc.get_book_batch() is first
+        repo.add_book(Book(title="new", author="someone"))
+        assert len(svc.get_book_batch()) == 2
@@ -0,0 +1,79 @@
+import numpy as np
+from src.domain.book import Book
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_batch import BookBatch
+from src.services.book_service import BookService
+from src.services.book_visualization_service import BookVisualizationService
+from tests.mocks.mock_book_repository import MockBookRepo
+
+BOOKS = [
+    Book(title="Book 1", author="Author 1", book_id="id1", genre="Fantasy", publication_year=2020,
+         average_rating=4.5, ratings_count=500, price_usd=10.0, available=True),
+    Book(title="Book 2", author="Author 2", book_id="id2", genre="Sci-Fi", publication_year=2021,
+         average_rating=4.8, ratings_count=1500, price_usd=20.0, available=False),
+    Book(title="Book 3", author="Author 1", book_id="id3", genre="Fantasy",
+         average_rating=4.2, ratings_count=2000, price_usd=30.0),
+]
+
+class TestBookBatch:
+
+    def test_rows_round_trip(self):
+        batch = BookBatch.from_books(BOOKS)
+        assert len(batch) == 3
+        assert list(batch) == BOOKS
+        assert batch[1] == BOOKS[1]
+        assert BookBatch.from_records(b.to_dict() for b in BOOKS)[2] == BOOKS[2]
+
+    def test_list_and_stream_builds_match(self):
+        odd = Book(title="Odd", author="X", book_id="id4", price_usd=True, page_count="n/a", average_rating="4.5")
+        books = BOOKS + [odd]
+        from_list, from_stream = BookBatch.from_books(books), BookBatch.from_books(iter(books))
+        for name, array in from_list.arrays().items():
+            np.testing.assert_array_equal(array, from_stream.arrays()[name])
+        assert from_list.column("average_rating")[3] == 4.5
+        assert np.isnan(from_list.column("price_usd")[3])
+
+    def test_columns_limits_what_is_built(self):
+        batch = BookBatch.from_books(BOOKS, columns=["price_usd", "genre"])
+        assert set(batch.arrays()) == {"price_usd", "genre"}
+        assert list(batch.to_frame().columns) == ["price_usd", "genre"]
+        assert batch[0].genre == "Fantasy" and batch[0].title is None
+
+    def test_columns_are_typed(self):
+        batch = BookBatch.from_books(BOOKS)
+        assert batch.column("price_usd").dtype == np.float64
+        assert np.isnan(batch.column("publication_year")[2])
+        assert batch.codes("genre").tolist() == [0, 1, 0]
+        assert batch.column("available").tolist() == [True, False, None]
+
+    def test_to_frame_does_not_copy_numeric_columns(self):
+        batch = BookBatch.from_books(BOOKS)
+        df = batch.to_frame()
+        assert np.shares_memory(df["price_usd"].to_numpy(), batch.column("price_usd"))
+        assert df["genre"].tolist() == ["Fantasy", "Sci-Fi", "Fantasy"]
+        assert df["available"].isna().tolist() == [False, False, True]
+
+    def test_bad_values_become_missing(self):
+        batch = BookBatch.from_records([{"title": "A", "author": "X", "price_usd": "n/a", "available": "yes"}])
+        book = batch[0]
+        assert book.price_usd is None and book.available is None
+
+    def test_analytics_accept_batches(self):
+        service = BookAnalyticsService()
+        batch = BookBatch.from_books(BOOKS)
+        assert service.median_price_by_genre(batch) == service.median_price_by_genre(BOOKS)
+        assert service.top_rated_with_pandas(batch, min_ratings=1000) == service.top_rated_with_pandas(BOOKS, min_ratings=1000)
+        assert service.value_scores_with_pandas(batch) == service.value_scores_with_pandas(BOOKS)
+
+    def test_top_rated_with_pandas_returns_callers_books(self):
+        result = BookAnalyticsService().top_rated_with_pandas(BOOKS, min_ratings=1000)
+        assert result[0] is BOOKS[1]
+
+    def test_book_service_builds_batch_from_repository(self):
+        batch = BookService(MockBookRepo()).get_book_batch()
+        assert batch.column("book_id").tolist() == ["test-id-1"]
+
+def test_visualization_clean_data_uses_batch_columns():
+    df = BookVisualizationService()._clean_data(BOOKS + [Book(title="Book 4", author="Author 4")])
+    assert df["genre"].tolist() == ["Fantasy", "Sci-Fi", "Fantasy", "Unknown"]
+    assert df["available"].value_counts().get(True, 0) == 1
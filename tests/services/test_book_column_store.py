@@ -0,0 +1,87 @@
+import json
+import os
+import pytest
+from src.domain.book import Book
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_column_store import BookColumnStore
+
+BOOKS = [
+    Book(title="Book 1", author="Author 1", book_id="id1", genre="Fantasy", average_rating=4.0,
+         ratings_count=100, price_usd=10.0, available=True),
+    Book(title="Book 2", author="Author 2", book_id="id2", genre="Sci-Fi", average_rating=4.8,
+         ratings_count=1500, price_usd=20.0, available=False),
+    Book(title="Book 3", author="Author 1", book_id="id3", genre="Fantasy", average_rating=4.2,
+         ratings_count=2000, price_usd=30.0),
+]
+
+@pytest.fixture
+def books_file(tmp_path):
+    path = tmp_path / "books.json"
+    path.write_text(json.dumps([b.to_dict() for b in BOOKS]), encoding="utf-8")
+    return path
+
+class TestBookColumnStore:
+
+    def test_columns_round_trip_books(self, books_file):
+        columns = BookColumnStore(str(books_file)).load()
+        assert len(columns) == 3
+        assert [columns.book(i) for i in range(3)] == BOOKS
+        assert columns.categories("genre") == ["Fantasy", "Sci-Fi"]
+        assert columns.codes("genre").tolist() == [0, 1, 0]
+
+    def test_numeric_columns_are_memory_mapped(self, books_file):
+        prices = BookColumnStore(str(books_file)).load().column("price_usd")
+        assert prices.tolist() == [10.0, 20.0, 30.0]
+        assert prices.base is not None and not prices.flags.writeable
+
+    def test_sidecar_is_rebuilt_when_catalog_changes(self, books_file):
+        store = BookColumnStore(str(books_file))
+        store.load()
+
+        data = json.loads(books_file.read_text(encoding="utf-8"))
+        data[0]["price_usd"] = 99.0
+        books_file.write_text(json.dumps(data), encoding="utf-8")
+        stat = os.stat(books_file)
+        os.utime(books_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert store.load().column("price_usd").tolist() == [99.0, 20.0, 30.0]
+
+    def test_replaced_catalog_with_same_size_and_mtime_is_rebuilt(self, books_file):
+        store = BookColumnStore(str(books_file))
+        store.load()
+        stat = os.stat(books_file)
+
+        data = json.loads(books_file.read_text(encoding="utf-8"))
+        data[0]["price_usd"] = 90.0
+        replacement = books_file.parent / "books.json.tmp"
+        replacement.write_text(json.dumps(data), encoding="utf-8")
+        os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(replacement, books_file)
+
+        assert store.load().column("price_usd").tolist() == [90.0, 20.0, 30.0]
+
+    def test_manifest_holds_no_category_lists(self, books_file):
+        store = BookColumnStore(str(books_file))
+        store.load()
+        manifest = json.loads((books_file.parent / "books.json.columns" / "manifest.json").read_text(encoding="utf-8"))
+        assert manifest["inline_categories"] == {}
+        assert "id1" not in json.dumps(manifest)
+
+    def test_load_reuses_the_batch_until_the_catalog_changes(self, books_file):
+        store = BookColumnStore(str(books_file))
+        first = store.load()
+        assert store.load() is first
+        assert first.categories("title") == ["Book 1", "Book 2", "Book 3"]
+
+    def test_mixed_type_categories_round_trip(self, tmp_path):
+        path = tmp_path / "books.json"
+        books = [Book(title="A", author="X", book_id="a", genre=3), Book(title="B", author="Y", book_id="b", genre="Drama")]
+        path.write_text(json.dumps([b.to_dict() for b in books]), encoding="utf-8")
+        assert BookColumnStore(str(path)).load().categories("genre") == [3, "Drama"]
+
+    def test_analytics_match_on_columns_and_books(self, books_file):
+        service = BookAnalyticsService()
+        columns = BookColumnStore(str(books_file)).load()
+        assert service.average_price(columns) == service.average_price(BOOKS)
+        assert service.value_scores(columns) == service.value_scores(BOOKS)
+        assert service.top_rated(columns, min_ratings=1000) == service.top_rated(BOOKS, min_ratings=1000)
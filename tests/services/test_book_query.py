@@ -0,0 +1,114 @@
+import json
+import pytest
+from src.domain.book import Book
+from src.repositories.sqlite_book_repository import SqliteBookRepository
+from src.repositories.sqlite_database import connect
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_batch import BookBatch
+from src.services.book_generator_service_V2 import generate_books_json
+from src.services.book_query import BookQuery
+from src.services.book_service import BookService
+
+@pytest.fixture(scope="module")
+def books(tmp_path_factory):
+    path = tmp_path_factory.mktemp("catalog") / "books.json"
+    generate_books_json(str(path), count=800, seed=5)
+    return [Book.from_dict(item) for item in json.loads(path.read_text(encoding="utf-8"))]
+
+def small_catalog():
+    return [
+        Book(title="A", author="X", book_id="1", genre="Fantasy", publication_year=2001, price_usd=10.0, available=True),
+        Book(title="B", author="Y", book_id="2", genre="Mystery", publication_year=2005, price_usd=None, available=False),
+        Book(title="C", author="X", book_id="3", genre=None, publication_year=2010, price_usd=30.0, available=None),
+        Book(title="D", author="Z", book_id="4", genre="Fantasy", publication_year=None, price_usd=20.0, available=True),
+    ]
+
+class TestBookQueryFilters:
+
+    @pytest.mark.parametrize("filters, expected", [
+        ({"genre": "Fantasy"}, ["1", "4"]),
+        ({"genre__ne": "Fantasy"}, ["2"]),
+        ({"genre__in": ["Mystery", "Horror"]}, ["2"]),
+        ({"genre__isnull": True}, ["3"]),
+        ({"publication_year__between": (2003, 2010)}, ["2", "3"]),
+        ({"price_usd__ge": 20}, ["3", "4"]),
+        ({"price_usd__ne": 10.0}, ["3", "4"]),
+        ({"available": True}, ["1", "4"]),
+        ({"available__isnull": True}, ["3"]),
+        ({"author": "X", "price_usd__lt": 25}, ["1"]),
+    ])
+    def test_mask_matches_python_predicates(self, filters, expected):
+        books = small_catalog()
+        query = BookQuery().filter(**filters)
+        assert [b.book_id for b in query.run(books)] == expected
+        assert [b.book_id for b in books if all(p.matches(b) for p in query.predicates)] == expected
+
+    def test_unknown_field_and_operator_are_rejected(self):
+        with pytest.raises(ValueError):
+            BookQuery().filter(colour="red")
+        with pytest.raises(ValueError):
+            BookQuery().filter(price_usd__about=3)
+
+    def test_order_by_puts_missing_last_and_keeps_ties_in_order(self):
+        books = small_catalog()
+        assert [b.book_id for b in BookQuery().order_by("-price_usd").run(books)] == ["3", "4", "1", "2"]
+        assert [b.book_id for b in BookQuery().order_by("genre", "-book_id").run(books)] == ["4", "1", "2", "3"]
+        assert [b.book_id for b in BookQuery().order_by("price_usd").limit(4).run(books)] == ["1", "4", "3", "2"]
+
+    def test_group_by_with_several_aggregates(self):
+        result = BookQuery().group_by("author").agg(
+            books="count", priced=("price_usd", "count"), total=("price_usd", "sum"), cheapest=("price_usd", "min"),
+        ).run(small_catalog())
+        # Y has no prices, so its min is NaN
+        no_prices = result.pop(1)
+        assert no_prices["cheapest"] != no_prices["cheapest"]
+        assert {k: v for k, v in no_prices.items() if k != "cheapest"} == {"author": "Y", "books": 1, "priced": 0, "total": 0.0}
+        assert result == [
+            {"author": "X", "books": 2, "priced": 2, "total": 40.0, "cheapest": 10.0},
+            {"author": "Z", "books": 1, "priced": 1, "total": 20.0, "cheapest": 20.0},
+        ]
+
+class TestExistingAnalyticsOnTopOfQueries:
+
+    def test_average_price(self, books):
+        result = BookQuery().agg(avg=("price_usd", "mean")).run(books)
+        assert result[0]["avg"] == pytest.approx(BookAnalyticsService().average_price(books))
+
+    def test_median_price_by_genre(self, books):
+        rows = BookQuery().group_by("genre").agg(median=("price_usd", "median")).run(books)
+        assert {r["genre"]: r["median"] for r in rows} == BookAnalyticsService().median_price_by_genre(books)
+
+    def test_top_rated(self, books):
+        query = BookQuery().filter(ratings_count__ge=1000).order_by("-average_rating").limit(10)
+        assert query.run(books) == BookAnalyticsService().top_rated(books, min_ratings=1000, limit=10)
+        assert query.run(BookBatch.from_books(books)) == query.run(books)
+
+    def test_most_popular_genre(self, books):
+        year = books[0].publication_year
+        rows = BookQuery().filter(publication_year=year).group_by("genre").agg(books="count").order_by("-books").run(books)
+        counts = [b.genre for b in books if b.publication_year == year]
+        assert rows[0]["books"] == max(counts.count(g) for g in set(counts))
+
+class TestBookServiceQuery:
+
+    def test_sqlite_pushdown_gives_the_same_answers(self, books):
+        connection = connect(":memory:")
+        repo = SqliteBookRepository(connection)
+        repo.add_books(books)
+        pushed = BookService(repo)
+        query = BookQuery().filter(genre__in=["Fantasy", "Mystery"], average_rating__ge=3.5)
+
+        assert [b.book_id for b in pushed.query(query)] == [b.book_id for b in query.run(books)]
+        grouped = query.group_by("genre").agg(n="count", median=("price_usd", "median"))
+        assert sorted(pushed.query(grouped), key=lambda r: r["genre"]) == sorted(grouped.run(books), key=lambda r: r["genre"])
+        connection.close()
+
+    def test_sqlite_only_reads_matching_rows(self, books):
+        connection = connect(":memory:")
+        repo = SqliteBookRepository(connection)
+        repo.add_books(books)
+        year = books[0].publication_year
+        read = list(repo.iter_books_where(BookQuery().filter(publication_year=year).predicates, fields=["genre"]))
+        assert len(read) == sum(b.publication_year == year for b in books)
+        assert all(b.book_id is None for b in read)
+        connection.close()
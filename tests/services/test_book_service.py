@@ -17,3 +17,26 @@ def test_find_book_name_negative():
     with pytest.raises(TypeError) as e:
         book = svc.find_book_by_name(name)
     assert str(e.value) == 'Expected str, got something else.'
+
+def test_find_first_book_by_name():
+    repo = MockBookRepo()
+    svc = book_service.BookService(repo)
+    assert svc.find_first_book_by_name("test").book_id == "test-id-1"
+    assert svc.find_first_book_by_name("missing") is None
+
+def test_import_books_dedupes_and_reports_invalid(tmp_path):
+    path = tmp_path / "import.ndjson"
+    path.write_text(
+        '{"book_id": "new-1", "title": "A", "author": "X"}\n'
+        '{"book_id": "new-1", "title": "A again", "author": "X"}\n'
+        '{"book_id": "test-id-1", "title": "test", "author": "author"}\n'
+        '{"book_id": "bad", "title": "B", "author": "Y", "colour": "red"}\n',
+        encoding="utf-8",
+    )
+    repo = MockBookRepo()
+    svc = book_service.BookService(repo)
+    result = svc.import_books(str(path))
+    assert result["added"] == 1
+    assert result["duplicates"] == 2
+    assert len(result["invalid"]) == 1 and result["invalid"][0].startswith("record 4")
+    assert [b.book_id for b in repo.books_list] == ["test-id-1", "new-1"]
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from src.domain.book import Book
+from src.domain.checkout_history import CheckoutHistory
+from src.services.book_batch import BookBatch
+from src.services.checkout_analytics_service import CheckoutAnalyticsService
+
+BOOKS = [
+    Book(title="Dune", author="Herbert", book_id="b1", genre="Sci-Fi"),
+    Book(title="Emma", author="Austen", book_id="b2", genre="Romance"),
+    Book(title="Solaris", author="Lem", book_id="b3", genre="Sci-Fi"),
+]
+
+HISTORY = [
+    CheckoutHistory(book_id="b1", checked_out_time="2025-01-01T00:00:00", checked_in_time="2025-01-11T00:00:00"),
+    CheckoutHistory(book_id="b2", checked_out_time="2025-01-05T12:00:00.250000"),
+    CheckoutHistory(book_id="b1", checked_out_time="2025-01-20T00:00:00", checked_in_time="2025-01-21T00:00:00"),
+    CheckoutHistory(book_id="gone", checked_out_time="2025-01-25T00:00:00", checked_in_time="2025-01-26T00:00:00"),
+    CheckoutHistory(book_id="b3", checked_out_time="not a date"),
+]
+
+@pytest.fixture
+def stats():
+    return CheckoutAnalyticsService(HISTORY, BookBatch.from_books(BOOKS), as_of="2025-01-31")
+
+class TestCheckoutAnalyticsService:
+
+    def test_unparseable_records_are_skipped(self, stats):
+        assert stats.skipped == 1
+        assert len(stats) == 4
+        assert np.all(np.diff(stats.checked_out.astype(np.int64)) >= 0)
+
+    def test_loan_durations(self, stats):
+        assert sorted(stats.loan_durations()) == [1.0, 1.0, 10.0]
+        assert len(stats.loan_durations(include_open=True)) == 4
+        summary = stats.loan_duration_summary()
+        assert summary["loans"] == 3 and summary["open"] == 1
+        assert summary["median_days"] == 1.0 and summary["max_days"] == 10.0
+        assert stats.loan_duration_histogram() == {
+            "0-1d": 0, "1-7d": 2, "7-14d": 1, "14-21d": 0, "21-28d": 0, "28-60d": 0, "60-90d": 0, "90d+": 0,
+        }
+
+    def test_checkouts_per_day_fills_empty_days(self, stats):
+        assert stats.checkouts_per_day("2025-01-04", "2025-01-06") == {"2025-01-04": 0, "2025-01-05": 1, "2025-01-06": 0}
+        per_day = stats.checkouts_per_day()
+        assert list(per_day)[0] == "2025-01-01" and list(per_day)[-1] == "2025-01-25"
+        assert sum(per_day.values()) == 4
+        assert all(type(n) is int for n in per_day.values())
+
+    def test_checkouts_per_day_over_the_last_days(self, stats):
+        assert stats.checkouts_per_day(days=7) == {f"2025-01-{d}": int(d == 25) for d in range(25, 32)}
+        assert list(stats.checkouts_per_day(end="2025-01-06", days=2)) == ["2025-01-05", "2025-01-06"]
+
+    def test_utilisation(self, stats):
+        by_book = stats.utilisation_by_book("2025-01-01", "2025-01-31")
+        assert by_book["b1"] == round(11 / 30, 4)
+        # still out: counted up to as_of
+        assert by_book["b2"] == round(25.5 / 30, 4)
+        # Sci-Fi shelf time is two books x 30 days, the loan of a book missing from the catalog is ignored
+        assert stats.utilisation_by_genre("2025-01-01", "2025-01-31") == {"Sci-Fi": round(11 / 60, 4), "Romance": round(25.5 / 30, 4)}
+        with pytest.raises(ValueError):
+            stats.utilisation_by_book("2025-01-31", "2025-01-01")
+
+    def test_busiest_books_joins_catalog_details(self, stats):
+        busiest = stats.busiest_books(window_days=30)
+        assert [(row["book_id"], row["checkouts"]) for row in busiest] == [("b1", 2), ("b2", 1), ("gone", 1)]
+        assert busiest[0]["title"] == "Dune" and busiest[0]["genre"] == "Sci-Fi"
+        assert busiest[2]["title"] is None
+
+        windows = stats.rolling_busiest_books(window_days=7, step_days=7, limit=1)
+        assert [(end, [row["book_id"] for row in rows]) for end, rows in windows] == [
+            ("2025-01-08", ["b1"]), ("2025-01-15", []), ("2025-01-22", ["b1"]), ("2025-01-29", ["gone"]),
+        ]
+
+    def test_without_catalog_or_history(self):
+        empty = CheckoutAnalyticsService([], as_of="2025-01-31")
+        assert empty.loan_duration_summary() == {"loans": 0, "open": 0}
+        assert empty.busiest_books() == []
+        assert empty.checkouts_per_day() == {}
+        assert list(empty.checkouts_per_day(days=2)) == ["2025-01-30", "2025-01-31"]
+        with pytest.raises(ValueError):
+            empty.utilisation_by_genre()
@@ -136,3 +136,57 @@ class TestCheckoutHistoryService:
         history = checkout_repo.get_checkout_history_by_book_id(book.book_id)
         assert len(history) == 1
         assert history[0].checked_in_time is not None
+
+    def test_checkout_books_reports_each_id(self):
+        book_repo = MockBookRepo()
+        book_repo.add_book(Book(title="second", author="author", book_id="test-id-2", available=True))
+        checkout_repo = MockCheckoutHistoryRepository()
+        service = CheckoutHistoryService(checkout_repo, book_repo)
+        service.checkout_book("test-id-2")
+
+        result = service.checkout_books(["test-id-1", "missing", "test-id-2", "test-id-1"])
+
+        assert list(result["succeeded"]) == ["test-id-1"]
+        assert "not found" in result["failed"]["missing"].lower()
+        assert "already checked out" in result["failed"]["test-id-2"].lower()
+        assert book_repo.books_list[0].available is False
+        assert len(checkout_repo.get_active_checkouts_by_book_id("test-id-1")) == 1
+
+    def test_checkin_books_closes_open_checkouts(self):
+        book_repo = MockBookRepo()
+        book_repo.add_book(Book(title="second", author="author", book_id="test-id-2", available=True))
+        checkout_repo = MockCheckoutHistoryRepository()
+        service = CheckoutHistoryService(checkout_repo, book_repo)
+        service.checkout_books(["test-id-1", "test-id-2"])
+
+        result = service.checkin_books(["test-id-1", "test-id-2", "test-id-2"])
+
+        assert list(result["succeeded"]) == ["test-id-1", "test-id-2"]
+        assert result["failed"] == {}
+        assert all(b.available for b in book_repo.books_list)
+        assert all(h.checked_in_time is not None for h in checkout_repo.get_all_checkout_history())
+        assert "not currently checked out" in service.checkin_books(["test-id-1"])["failed"]["test-id-1"]
+
+    def test_only_availability_is_handed_to_the_transaction(self):
+        class RecordingTransaction:
+            def __init__(self):
+                self.commits = []
+
+            def refresh(self):
+                pass
+
+            def commit_checkouts(self, availability, records):
+                self.commits.append((availability, [r.book_id for r in records]))
+
+        book_repo = MockBookRepo()
+        book_repo.add_book(Book(title="second", author="author", book_id="test-id-2", available=True))
+        book_repo.update_book = book_repo.update_books = lambda _: pytest.fail("the service wrote back a whole book")
+        transaction = RecordingTransaction()
+        service = CheckoutHistoryService(MockCheckoutHistoryRepository(), book_repo, transaction)
+
+        service.checkout_book("test-id-1")
+        service.checkout_books(["test-id-2"])
+        assert transaction.commits == [
+            ([("test-id-1", False)], ["test-id-1"]),
+            ([("test-id-2", False)], ["test-id-2"]),
+        ]
@@ -0,0 +1,76 @@
+import pytest
+from src.domain.book import Book
+from src.services.book_service import BookService
+from src.services.genre_year_table import GenreYearTable
+from tests.mocks.mock_book_repository import MockBookRepo
+
+def book(book_id, genre, year):
+    return Book(title=book_id, author="A", book_id=book_id, genre=genre, publication_year=year)
+
+BOOKS = [
+    book("1", "Fantasy", 1995),
+    book("2", "Mystery", 1995),
+    book("3", "Mystery", 1995),
+    book("4", "Fantasy", 1999),
+    book("5", "Romance", 2003),
+    book("6", None, 1995),
+    book("7", "Fantasy", None),
+]
+
+class TestGenreYearTable:
+
+    def test_year_range_and_decade_lookups(self):
+        table = GenreYearTable.from_books(BOOKS)
+        assert table.count(1995, "Mystery") == 2
+        assert table.count(1800, "Mystery") == 0
+        assert table.genre_counts(1995) == {"Fantasy": 1, "Mystery": 2}
+        assert table.genre_counts(1990, 2010) == {"Fantasy": 2, "Mystery": 2, "Romance": 1}
+        assert table.genre_counts_for_decade(1997) == {"Fantasy": 2, "Mystery": 2}
+        assert table.genre_counts(2050) == {}
+
+    def test_top_genres_break_ties_by_first_seen(self):
+        table = GenreYearTable.from_books(BOOKS)
+        assert table.top_genres(1995, 5) == [("Mystery", 2), ("Fantasy", 1)]
+        assert table.top_genres(1990, 2, end=1999) == [("Fantasy", 2), ("Mystery", 2)]
+        assert table.most_popular(1995) == "Mystery"
+        with pytest.raises(IndexError):
+            table.most_popular(1996)
+
+    def test_incremental_updates_match_a_rebuild(self):
+        table = GenreYearTable.from_books(BOOKS[:3], track_ids=True)
+        for b in BOOKS[3:]:
+            table.add(b)
+        table.add(book("8", "Horror", 1980))
+        table.remove("2")
+        table.update(book("1", "Romance", 2003))
+
+        current = [b for b in BOOKS if b.book_id not in ("1", "2")] + [book("8", "Horror", 1980), book("1", "Romance", 2003)]
+        rebuilt = GenreYearTable.from_books(current)
+        for year in range(1975, 2010):
+            assert table.genre_counts(year) == rebuilt.genre_counts(year)
+
+    def test_remove_needs_tracked_ids(self):
+        with pytest.raises(ValueError):
+            GenreYearTable.from_books(BOOKS).remove("1")
+
+class TestBookServiceGenreYearTable:
+
+    def test_service_writes_patch_the_table_instead_of_rebuilding(self):
+        repo = MockBookRepo()
+        repo.books_list = list(BOOKS)
+        svc = BookService(repo)
+        table = svc.get_genre_year_table()
+
+        svc.add_book(book("9", "Horror", 1995))
+        svc.remove_book("2")
+        assert svc.get_genre_year_table() is table
+        assert table.genre_counts(1995) == {"Fantasy": 1, "Mystery": 1, "Horror": 1}
+
+    def test_outside_writes_trigger_a_rebuild(self):
+        repo = MockBookRepo()
+        repo.books_list = list(BOOKS)
+        svc = BookService(repo)
+        table = svc.get_genre_year_table()
+        repo.add_book(book("9", "Horror", 1995))
+        assert svc.get_genre_year_table() is not table
+        assert svc.get_genre_year_table().count(1995, "Horror") == 1
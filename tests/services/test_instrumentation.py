@@ -0,0 +1,55 @@
+import json
+from src.domain.book import Book
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_service import BookService
+from src.services.instrumentation import Instrumentation, MethodStats
+from tests.mocks.mock_book_repository import MockBookRepo
+
+def test_method_stats_percentiles_come_from_the_histogram():
+    stats = MethodStats()
+    for ms in [1.0] * 90 + [50.0] * 10:
+        stats.record(ms)
+    row = stats.to_dict()
+    assert row["count"] == 100 and row["max_ms"] == 50.0
+    assert 1.0 <= row["p50_ms"] <= 1.28
+    assert row["p99_ms"] == 50.0
+
+class TestInstrumentation:
+
+    def test_instrumented_service_records_calls(self):
+        metrics = Instrumentation()
+        svc = metrics.instrument(BookService(MockBookRepo()))
+        svc.add_book(Book(title="new", author="someone"))
+        svc.get_all_books()
+        svc.get_all_books()
+        snapshot = metrics.snapshot()
+        assert snapshot["BookService.get_all_books"]["count"] == 2
+        assert snapshot["BookService.add_book"]["count"] == 1
+        assert "BookService.get_all_books" in metrics.format_table()
+
+    def test_disabled_instrumentation_records_nothing(self):
+        metrics = Instrumentation(enabled=False)
+        svc = metrics.instrument(BookService(MockBookRepo()))
+        assert len(svc.get_all_books()) == 1
+        assert metrics.snapshot() == {}
+
+    def test_profile_and_dump(self, tmp_path):
+        metrics = Instrumentation(profile=True)
+        analytics = metrics.instrument(BookAnalyticsService())
+        books = [Book(title="A", author="X", price_usd=10.0), Book(title="B", author="Y", price_usd=20.0)]
+        assert analytics.average_price(books) == 15.0
+        assert "average_price" in metrics.profile_report()
+
+        path = tmp_path / "stats.json"
+        metrics.dump(str(path))
+        assert json.loads(path.read_text())["BookAnalyticsService.average_price"]["count"] == 1
+        assert (tmp_path / "stats.json.prof").exists()
+
+    def test_profile_report_before_any_call_and_after_reset(self):
+        metrics = Instrumentation(profile=True)
+        assert metrics.profile_report() == "No profile data yet."
+        analytics = metrics.instrument(BookAnalyticsService())
+        analytics.average_price([Book(title="A", author="X", price_usd=10.0)])
+        assert "average_price" in metrics.profile_report()
+        metrics.reset()
+        assert metrics.profile_report() == "No profile data yet."
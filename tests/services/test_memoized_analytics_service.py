@@ -0,0 +1,85 @@
+from src.domain.book import Book
+from src.services.book_service import BookService
+from src.services.memoized_analytics_service import MemoizedAnalyticsService, ResultCache
+from tests.mocks.mock_book_repository import MockBookRepo
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def priced_repo():
+    repo = MockBookRepo()
+    repo.books_list = [
+        Book(title="A", author="X", book_id="1", genre="Fantasy", price_usd=10.0, average_rating=4.0, ratings_count=2000),
+        Book(title="B", author="Y", book_id="2", genre="Mystery", price_usd=30.0, average_rating=4.5, ratings_count=3000),
+    ]
+    return repo
+
+class TestResultCache:
+
+    def test_lru_evicts_the_least_recently_used(self):
+        cache = ResultCache(max_entries=2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("b", lambda: 2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("c", lambda: 3)
+        assert cache.get_or_compute("a", lambda: "recomputed") == 1
+        assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+        assert cache.stats()["evictions"] == 2
+
+    def test_ttl_expires_entries(self):
+        clock = FakeClock()
+        cache = ResultCache(ttl_seconds=10, clock=clock)
+        cache.get_or_compute("a", lambda: 1)
+        clock.now = 9
+        assert cache.get_or_compute("a", lambda: 2) == 1
+        clock.now = 20
+        assert cache.get_or_compute("a", lambda: 2) == 2
+        assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 0, "expirations": 1, "invalidations": 0, "entries": 1}
+
+class TestMemoizedAnalyticsService:
+
+    def test_repeated_calls_hit_until_the_repository_writes(self):
+        repo = priced_repo()
+        book_svc = BookService(repo)
+        analytics = MemoizedAnalyticsService()
+
+        first = analytics.median_price_by_genre(book_svc.get_book_batch())
+        assert analytics.median_price_by_genre(book_svc.get_book_batch()) == first
+        assert analytics.stats()["hits"] == 1
+
+        repo.add_book(Book(title="C", author="Z", book_id="3", genre="Fantasy", price_usd=20.0))
+        assert analytics.median_price_by_genre(book_svc.get_book_batch())["Fantasy"] == 15.0
+        assert analytics.stats()["invalidations"] == 1
+        assert analytics.stats()["entries"] == 1
+
+    def test_arguments_are_part_of_the_key(self):
+        batch = BookService(priced_repo()).get_book_batch()
+        analytics = MemoizedAnalyticsService()
+        assert [b.book_id for b in analytics.top_rated(batch, min_ratings=1000, limit=1)] == ["2"]
+        assert [b.book_id for b in analytics.top_rated(batch, min_ratings=1000, limit=2)] == ["2", "1"]
+        assert analytics.stats()["misses"] == 2
+
+    def test_mutating_a_result_does_not_change_the_cache(self):
+        batch = BookService(priced_repo()).get_book_batch()
+        analytics = MemoizedAnalyticsService()
+        analytics.value_scores(batch).clear()
+        analytics.top_rated(batch, limit=1)[0].title = "changed"
+        assert len(analytics.value_scores(batch)) == 2
+        assert analytics.top_rated(batch, limit=1)[0].title == "B"
+        assert analytics.stats()["hits"] == 2
+
+    def test_plain_lists_are_not_cached(self):
+        books = priced_repo().books_list
+        analytics = MemoizedAnalyticsService()
+        assert analytics.average_price(books) == 20.0
+        books[0].price_usd = 30.0
+        assert analytics.average_price(books) == 30.0
+        assert analytics.stats()["entries"] == 0
+
+    def test_unmemoised_methods_pass_through(self):
+        books = priced_repo().books_list
+        assert [b.book_id for b in MemoizedAnalyticsService().top_rated_streaming(iter(books), limit=1)] == ["2"]
@@ -0,0 +1,22 @@
+import json
+from src.domain.compact_book import CompactBook
+from src.services.book_generator_service_V2 import generate_books_json
+from src.services.memory_report_service import memory_report
+
+def test_memory_report_shows_compact_types_are_smaller():
+    report = memory_report(book_count=300, history_count=300, seed=1)
+    for name in ("books", "checkout_history"):
+        assert report[name]["bytes_after"] < report[name]["bytes_before"]
+        assert report[name]["saved_pct"] > 0
+
+def test_generated_catalog_shares_interned_fields(tmp_path):
+    path = tmp_path / "books.json"
+    generate_books_json(str(path), count=200, seed=1)
+    books = [CompactBook.from_dict(item) for item in json.loads(path.read_text(encoding="utf-8"))]
+    for name in ("genre", "publisher", "language", "format"):
+        by_value = {}
+        for book in books:
+            value = getattr(book, name)
+            if value is not None:
+                assert by_value.setdefault(value, value) is value
+        assert len(by_value) < len(books)
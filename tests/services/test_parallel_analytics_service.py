@@ -0,0 +1,69 @@
+import json
+from collections import Counter
+import pytest
+from src.domain.book import Book
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.book_batch import BookBatch
+from src.services.book_generator_service_V2 import generate_books_json
+from src.services.parallel_analytics_service import ParallelAnalyticsService, _kth_smallest
+import numpy as np
+
+@pytest.fixture(scope="module")
+def books(tmp_path_factory):
+    path = tmp_path_factory.mktemp("catalog") / "books.json"
+    generate_books_json(str(path), count=600, seed=3)
+    return [Book.from_dict(item) for item in json.loads(path.read_text(encoding="utf-8"))]
+
+@pytest.fixture(params=[1, 3], ids=["inline", "process-pool"])
+def service(request):
+    with ParallelAnalyticsService(workers=request.param) as svc:
+        yield svc
+
+class TestParallelAnalyticsService:
+
+    def test_average_price_matches_serial(self, service, books):
+        assert service.average_price(books) == pytest.approx(BookAnalyticsService().average_price(books))
+
+    def test_median_price_by_genre_matches_serial(self, service, books):
+        assert service.median_price_by_genre(books) == BookAnalyticsService().median_price_by_genre(books)
+
+    def test_top_rated_matches_serial(self, service, books):
+        expected = BookAnalyticsService().top_rated(books, min_ratings=1000, limit=15)
+        assert service.top_rated(books, min_ratings=1000, limit=15) == expected
+
+    def test_value_scores_top_matches_serial(self, service, books):
+        expected = BookAnalyticsService().value_scores_with_pandas(books, limit=15)
+        assert service.value_scores_top(books, limit=15) == expected
+
+    def test_genre_counts_and_most_popular(self, service, books):
+        year = books[0].publication_year
+        expected = Counter(b.genre for b in books if b.publication_year == year and b.genre is not None)
+        assert service.genre_counts(books, year) == dict(expected)
+        assert expected[service.most_popular_genre(books, year)] == max(expected.values())
+
+    def test_most_popular_genre_matches_serial(self, service, books):
+        year = books[0].publication_year
+        assert service.most_popular_genre(books, year) == BookAnalyticsService().most_popular_genre(books, year)
+        with pytest.raises(IndexError):
+            BookAnalyticsService().most_popular_genre(books, 1000)
+        with pytest.raises(IndexError):
+            service.most_popular_genre(books, 1000)
+
+    def test_accepts_a_batch(self, service, books):
+        batch = BookBatch.from_books(books)
+        assert service.median_price_by_genre(batch) == service.median_price_by_genre(books)
+        assert [b.book_id for b in service.top_rated(batch)] == [b.book_id for b in service.top_rated(books)]
+
+def test_lists_are_built_with_only_the_columns_read(books, monkeypatch):
+    builds = []
+    original = BookBatch.from_books
+    monkeypatch.setattr(BookBatch, "from_books", lambda books, version=None, columns=None: builds.append(columns) or original(books, version, columns))
+    service = ParallelAnalyticsService(workers=1)
+    service.average_price(books)
+    service.value_scores_top(books)
+    assert builds == [["price_usd"], ["average_rating", "ratings_count", "price_usd", "book_id"]]
+
+def test_kth_smallest_across_runs():
+    runs = [np.array([1.0, 4.0, 4.0, 9.0]), np.array([2.0, 4.0]), np.array([])]
+    merged = sorted(np.concatenate(runs))
+    assert [_kth_smallest(runs, k) for k in range(len(merged))] == merged
@@ -0,0 +1,44 @@
+import numpy as np
+from src.domain.book import Book
+from src.services.book_analytics_service import BookAnalyticsService
+from src.services.top_k import top_k_indices, top_k_stream
+
+def test_top_k_indices_orders_by_score_then_position():
+    scores = np.array([1.0, 3.0, 3.0, 2.0, 3.0, np.nan, 3.0])
+    assert top_k_indices(scores, 3).tolist() == [1, 2, 4]
+    assert top_k_indices(scores, 10).tolist() == [1, 2, 4, 6, 3, 0]
+    assert top_k_indices(scores, 0).tolist() == []
+
+def test_top_k_indices_matches_full_stable_sort():
+    rng = np.random.default_rng(7)
+    scores = rng.integers(0, 20, size=500).astype(float)
+    expected = np.argsort(-scores, kind="stable")[:25]
+    assert top_k_indices(scores, 25).tolist() == expected.tolist()
+
+def test_top_k_stream_keeps_first_seen_on_ties():
+    items = [("a", 1.0), ("b", 3.0), ("c", None), ("d", 3.0), ("e", 2.0)]
+    assert top_k_stream(iter(items), lambda pair: pair[1], 2) == [("b", 3.0), ("d", 3.0)]
+
+class TestStreamingAnalytics:
+
+    def books(self):
+        return [
+            Book(title="Book 1", author="A", book_id="id1", average_rating=4.5, ratings_count=500, price_usd=10.0),
+            Book(title="Book 2", author="A", book_id="id2", average_rating=4.8, ratings_count=1500, price_usd=20.0),
+            Book(title="Book 3", author="A", book_id="id3", average_rating=4.2, ratings_count=2000, price_usd=30.0),
+            Book(title="Book 4", author="A", book_id="id4", average_rating=4.8, ratings_count=1200, price_usd=5.0),
+        ]
+
+    def test_streaming_matches_in_memory_top_rated(self):
+        service = BookAnalyticsService()
+        expected = service.top_rated(self.books(), min_ratings=1000, limit=2)
+        assert [b.book_id for b in expected] == ["id2", "id4"]
+        assert service.top_rated_streaming(iter(self.books()), min_ratings=1000, limit=2) == expected
+        assert service.top_rated_with_pandas(self.books(), min_ratings=1000, limit=2) == expected
+
+    def test_streaming_matches_pandas_value_scores(self):
+        service = BookAnalyticsService()
+        expected = service.value_scores_with_pandas(self.books(), limit=3)
+        result = service.value_scores_streaming(iter(self.books()), limit=3)
+        assert list(result) == list(expected)
+        assert all(np.isclose(result[k], expected[k]) for k in expected)